@@ -1,141 +1,174 @@
 from langgraph.graph import StateGraph, END
-from typing import TypedDict, Annotated, Dict
+from langgraph.config import get_stream_writer
+from typing import TypedDict, Annotated, AsyncIterator, Dict, List, Tuple
+import asyncio
 import operator
+import time
 from .state import AgentState
-from .prompts import SYSTEM_CONSTITUTION
+from .prompts import PROMPT_PREFIX, SYSTEM_CONSTITUTION_VERSION
 from utils.logger_config import setup_logger
 
 logger = setup_logger("graph")
 
 # Logic Core Imports
 from memory.sovereign_memory import sovereign_memory
-from filters.strictness_filter import StrictnessFilter
-from filters.majesty_filter import MajestyFilter
-from filters.superiority_filter import SuperiorityFilter
+from memory.manuscript_cache import manuscript_cache, make_cache_key
+from memory.version_store import version_store, paragraph_hash, reusable_units
+from memory.job_store import job_store
+from filters.analysis import get_engine, merge_results, score_chunks
 from processors.arabization_engine import ArabizationEngine
+from processors.chunker import TextChunker, estimate_tokens
+from monitoring.metrics import (
+    LLM_ERRORS, LLM_IN_FLIGHT, LLM_LATENCY, LLM_TTFT, instrument_node, record_cache, record_usage
+)
 
 from langchain_core.messages import SystemMessage, HumanMessage
-from langchain_openai import ChatOpenAI
-from langchain_anthropic import ChatAnthropic
-from dotenv import load_dotenv, find_dotenv
-# Load env vars independently of settings
-load_dotenv(find_dotenv())
-
-# ... imports ...
-try:
-    from langchain_google_genai import ChatGoogleGenerativeAI
-except ImportError:
-    ChatGoogleGenerativeAI = None # prevent crash if dependency fails
-    print("WARNING: ChatGoogleGenerativeAI import failed.")
+from .providers import provider_registry
 import os
 import json
 
 # --- Initialization ---
 from config.settings import settings
 
-def check_deepseek_availability(api_key: str) -> bool:
-    """Check key validity and balance before reliance."""
-    if not api_key:
-        return False
-    try:
-        import httpx
-        # Very simple request to check balance/validity
-        response = httpx.get(
-            "https://api.deepseek.com/user/balance", 
-            headers={"Authorization": f"Bearer {api_key}"},
-            timeout=5.0
-        )
-        if response.status_code != 200:
-            return False
-        data = response.json()
-        return data.get("is_available", False)
-    except Exception:
-        return False
-
-def get_llm():
-    """Returns a tuple: (LLM_Object, Model_Name_String)"""
-    google_key = settings.GOOGLE_API_KEY
-    deepseek_key = settings.DEEPSEEK_API_KEY
-    
-    # 1. Implementation of Programmer's Proposal: Check DeepSeek First
-    is_deepseek_ok = check_deepseek_availability(deepseek_key)
-    
-    if is_deepseek_ok:
-        logger.info("DeepSeek is available and healthy. Using deepseek-chat.")
-        llm = ChatOpenAI(
-            model="deepseek-chat",
-            api_key=deepseek_key,
-            base_url="https://api.deepseek.com"
-        )
-        return llm, "DeepSeek-V3 (Sovereign Engine)"
-    
-    # 2. Automatic Fallback to Gemini if DeepSeek fails
-    if google_key and ChatGoogleGenerativeAI:
-        logger.warning("DeepSeek unavailable. Falling back to Gemini.")
-        llm = ChatGoogleGenerativeAI(model="gemini-flash-latest", google_api_key=google_key, temperature=0.7)
-        return llm, "Gemini Flash (Fallback Engine)"
-    
-    # Priority 3: Claude
-    if settings.ANTHROPIC_API_KEY and "sk-ant" in settings.ANTHROPIC_API_KEY:
-         logger.info("Using Claude Model")
-         llm = ChatAnthropic(model="claude-3-5-sonnet-20240620", temperature=0.7)
-         return llm, "Claude 3.5 Sonnet"
-    
-    # Priority 4: OpenAI
-    logger.info("Fallback to OpenAI Model")
-    llm = ChatOpenAI(model="gpt-4o", temperature=0.7)
-    return llm, "GPT-4o"
-
 # Initialize Logic Components
-# (Filters are kept for potential future use, but not used in the optimized path to save tokens)
-strictness_filter = StrictnessFilter()
-majesty_filter = MajestyFilter()
-superiority_filter = SuperiorityFilter()
+# (Filters run locally in the analysis node: no tokens spent)
+filter_engine = get_engine()
+strictness_filter, majesty_filter, superiority_filter = filter_engine.filters
 arabization_engine = ArabizationEngine()
+text_chunker = TextChunker()
+
+# --- Concurrency Model ---
+# The graph is driven with `ainvoke`/`astream` from async FastAPI handlers, so a single
+# uvicorn worker multiplexes every in-flight generation on one event loop:
+# - LLM calls are native coroutines (`astream` on long-lived clients sharing one
+#   httpx.AsyncClient pool); per request, at most CHUNK_CONCURRENCY chunks are in flight.
+# - Provider health probes use the async HTTP client and run as background tasks.
+# - ChromaDB queries (blocking embedding + HNSW) run on SovereignMemory's bounded
+#   pool (MEMORY_QUERY_WORKERS threads), shared by all requests.
+# - Cheap CPU-only nodes (chunking) stay sync; LangGraph runs them in its executor.
+# - Uploads are spooled to disk and parsed incrementally on a worker thread; blocks reach
+#   the generation node through a bounded queue, so early chunks start before parsing ends.
+# Nothing on the request path blocks the loop, so concurrency is bounded by provider
+# rate limits and the connection pool rather than by worker count.
 
 # --- Nodes ---
 
-def memory_retrieval(state: AgentState):
+async def memory_retrieval(state: AgentState):
     """
     Node 1: Retrieve context (Fast & Cheap).
     """
     logger.info("Node: memory_retrieval started.")
     input_text = state["input_text"]
-    relevant_terms = sovereign_memory.find_term(input_text, n_results=5)
-    return {"memory_context": relevant_terms}
+    started_at = time.time()  # Wall clock: a resumed job may continue in another process
+    if state.get("block_feed") is not None:
+        # Streamed upload: the text is not available yet; chunks retrieve their own context
+        return {"memory_context": [], "started_at": started_at}
+    relevant_terms = await sovereign_memory.aretrieve_context(input_text)
+    get_stream_writer()({"event": "progress", "node": "memory", "terms": len(relevant_terms)})
+    return {"memory_context": relevant_terms, "started_at": started_at}
+
+# Violations a rewrite can remove from the text it was given. "missing_authority" is a
+# length heuristic over the whole chunk, not an error in it, so it never triggers a pass.
+REVISABLE_VIOLATIONS = {"weak_language", "submissive_tone", "weak_lexicon"}
 
-def generate_manuscript(state: AgentState):
+def _revisable(violations: List[Dict]) -> int:
+    return sum(v.get("type") in REVISABLE_VIOLATIONS for v in violations)
+
+def _fails(scores: Dict[str, float], violations: List[Dict]) -> bool:
+    """Revision gate: a chunk goes back to the LLM only for issues a rewrite can fix."""
+    return _revisable(violations) > 0 or scores["strictness"] < settings.STRICTNESS_THRESHOLD
+
+def _needs_rewrite(paragraph: str) -> bool:
     """
-    Node 2: DIRECT GENERATION (Optimized).
-    Bypasses analysis to save tokens. Enforces strict length.
+    A (locally corrected) paragraph still needs the LLM if it fails the revision gate.
+    Majesty is not gated: its exact-token density misses clitic forms ("الجليل"),
+    so nearly all prose, good output included, scores below MAJESTY_THRESHOLD.
     """
-    logger.info("Node: generate_manuscript started.")
-    context_str = json.dumps(state.get("memory_context", []), ensure_ascii=False)
-    
-    # Dynamic LLM Selection
-    llm, model_name = get_llm()
-    
-    prompt = [
-        SystemMessage(content=SYSTEM_CONSTITUTION),
-        SystemMessage(content=f"""
-        CONTEXT FROM MEMORY:
-        {context_str}
-        
-        CRITICAL INSTRUCTIONS (ZERO-OMISSION):
-        1. YOU MUST PROCESS THE TEXT VERBATIM. DO NOT SUMMARIZE.
-        2. MAINTAIN THE EXACT LENGTH OF THE ORIGINAL CONTENT OR EXPAND IT.
-        3. FORMAT THE OUTPUT CLEARLY WITH MARKDOWN (BOLD HEADERS, LISTS).
-        4. IF THE INPUT IS LONG, PROCESS IT CHUNK BY CHUNK (internally) TO ENSURE NO LOSS.
-        
-        Apply the "Sovereign Tone" to everything.
-        """),
-        HumanMessage(content=state["input_text"])
-    ]
-    
-    logger.info(f"Invoking {model_name} for manuscript generation...")
-    response = llm.invoke(prompt)
-    
-    # Handle list-type content (possible with Gemini/LangChain updates)
+    scores, violations = filter_engine.process(paragraph)
+    return _fails(scores, violations)
+
+def _triage(input_text: str) -> Dict:
+    """
+    Selective mode: apply the deterministic `correct()` fixes to every paragraph locally,
+    then keep only paragraphs still below threshold for the LLM.
+    """
+    paragraphs = [filter_engine.correct(p) for p in text_chunker.split_paragraphs(input_text)]
+    flags = [_needs_rewrite(p) for p in paragraphs]
+    spans = text_chunker.pack_runs(paragraphs, flags)
+    logger.info("Selective triage: %s/%s paragraph(s) need the LLM.", sum(flags), len(paragraphs))
+    return {
+        "segments": [{"text": p, "rewrite": f} for p, f in zip(paragraphs, flags)],
+        "chunk_spans": spans,
+        "chunks": ["\n\n".join(paragraphs[a:b]) for a, b in spans]
+    }
+
+def _surrounding(segments: List[Dict], start: int, end: int) -> str:
+    """Final text just before/after a regenerated span, so the rewrite joins its neighbours seamlessly."""
+    n = settings.VERSION_CONTEXT_PARAGRAPHS
+    parts = []
+    if n and start > 0 and not segments[start - 1]["rewrite"]:
+        parts.append("BEFORE:\n" + "\n\n".join(text_chunker.split_paragraphs(segments[start - 1]["text"])[-n:]))
+    if n and end < len(segments) and not segments[end]["rewrite"]:
+        parts.append("AFTER:\n" + "\n\n".join(text_chunker.split_paragraphs(segments[end]["text"])[:n]))
+    return "\n\n".join(parts)
+
+def _plan_versioned(state: AgentState) -> Dict:
+    """
+    Versioned documents: diff the paragraphs against the stored version, reuse the
+    output of every unit whose paragraphs are unchanged, and regenerate the rest.
+    """
+    paragraphs = text_chunker.split_paragraphs(state["input_text"])
+    hashes = [paragraph_hash(p) for p in paragraphs]
+    previous = version_store.load(state["document_id"], SYSTEM_CONSTITUTION_VERSION) or {"units": []}
+    units = previous["units"]
+    starts = reusable_units(units, hashes)
+
+    segments = []
+    i = 0
+    while i < len(paragraphs):
+        if i in starts:
+            unit = units[starts[i]]
+            segments.append({"text": unit["output"], "rewrite": False, "hashes": unit["hashes"]})
+            i += len(unit["hashes"])
+        else:
+            segments.append({"text": paragraphs[i], "rewrite": True, "hashes": [hashes[i]]})
+            i += 1
+
+    spans = text_chunker.pack_runs([s["text"] for s in segments], [s["rewrite"] for s in segments])
+    logger.info(
+        "Document %s: reusing %s/%s stored unit(s), regenerating %s/%s paragraph(s).",
+        state["document_id"], len(starts), len(units), sum(s["rewrite"] for s in segments), len(paragraphs)
+    )
+    return {
+        "segments": segments,
+        "chunk_spans": spans,
+        "chunks": ["\n\n".join(s["text"] for s in segments[a:b]) for a, b in spans],
+        "chunk_context": [_surrounding(segments, a, b) for a, b in spans]
+    }
+
+def chunk_input(state: AgentState):
+    """
+    Node 2: Split the input into token-budgeted chunks on paragraph/heading boundaries.
+    In selective mode, only paragraphs that fail the local filters become chunks.
+    Streamed uploads are chunked incrementally by the generation node instead.
+    Documents with a `document_id` only send changed paragraphs (see _plan_versioned).
+    """
+    logger.info("Node: chunk_input started.")
+    if state.get("block_feed") is not None:
+        logger.info("Streamed input: chunks are built during generation.")
+        return {"segments": []}
+    if state.get("document_id"):
+        update = _plan_versioned(state)
+    elif (state.get("rewrite_mode") or settings.REWRITE_MODE) == "selective":
+        update = _triage(state["input_text"])
+    else:
+        update = {"chunks": text_chunker.chunk(state["input_text"]) or [state["input_text"]], "segments": []}
+    logger.info("Input split into %s chunk(s).", len(update['chunks']))
+    get_stream_writer()({"event": "progress", "node": "chunking", "chunks": len(update["chunks"])})
+    return update
+
+def _extract_text(response) -> str:
+    """Handle list-type content (possible with Gemini/LangChain updates)"""
     content_text = response.content
     if isinstance(content_text, list):
         parts = []
@@ -147,50 +180,562 @@ def generate_manuscript(state: AgentState):
             else:
                 parts.append(str(item))
         content_text = "".join(parts)
+    return content_text
 
-    # Append Signature
-    final_text = content_text + f"\n\n---\n> **Processed by: {model_name}**"
-    
-    # Extract Token Usage (Robust Extraction for Gemini/OpenAI)
+def _extract_usage(response) -> Dict[str, int]:
+    """Extract Token Usage (Robust Extraction for Gemini/OpenAI)"""
     raw_usage = getattr(response, 'usage_metadata', {})
     
     # Fallback to response_metadata if main attribute is empty (Common with Gemini)
     if not raw_usage:
         raw_usage = response.response_metadata.get('usage_metadata') or {}
         
+    # Prompt-cache details: LangChain normalizes these into input_token_details;
+    # DeepSeek (prompt_cache_hit_tokens) and Gemini (cached_content_token_count) may only expose raw keys
+    details = raw_usage.get("input_token_details") or {}
+    raw_openai = response.response_metadata.get("token_usage") or {}
+    
     # Standardize Keys (Map Gemini keys to Standard keys)
     # Gemini uses: prompt_token_count, candidates_token_count, total_token_count
     # Frontend expects: input_tokens, output_tokens, total_tokens
-    final_usage = {
+    return {
         "input_tokens": raw_usage.get("input_tokens") or raw_usage.get("prompt_token_count", 0),
         "output_tokens": raw_usage.get("output_tokens") or raw_usage.get("candidates_token_count", 0),
-        "total_tokens": raw_usage.get("total_tokens") or raw_usage.get("total_token_count", 0)
+        "total_tokens": raw_usage.get("total_tokens") or raw_usage.get("total_token_count", 0),
+        "cached_input_tokens": (
+            details.get("cache_read")
+            or raw_openai.get("prompt_cache_hit_tokens")
+            or raw_usage.get("cached_content_token_count", 0)
+        ),
+        "cache_creation_input_tokens": details.get("cache_creation", 0)
     }
+
+USAGE_KEYS = ("input_tokens", "output_tokens", "total_tokens", "cached_input_tokens", "cache_creation_input_tokens")
+
+def _sum_usage(usages: List[Dict[str, int]]) -> Dict[str, int]:
+    total = dict.fromkeys(USAGE_KEYS, 0)
+    for usage in usages:
+        for key in total:
+            total[key] += usage.get(key) or 0
+    # input_tokens includes cache reads on every provider; this is the part billed at full price
+    total["uncached_input_tokens"] = max(0, total["input_tokens"] - total["cached_input_tokens"])
+    return total
+
+def _cacheable(text: str, cache_control: bool):
+    """Mark a system block as a prompt-cache breakpoint (Anthropic); plain text otherwise."""
+    if not cache_control:
+        return text
+    return [{"type": "text", "text": text, "cache_control": {"type": "ephemeral"}}]
+
+def _build_prompt(
+    context_str: str, chunk_text: str, index: int, total: int, cache_control: bool = False, surrounding: str = ""
+) -> list:
+    """
+    Order matters for prompt caching: static prefix, then per-request memory context
+    (shared by every chunk of the request), then the per-chunk position and text.
+    With `cache_control`, both shared blocks become Anthropic cache breakpoints.
+    """
+    if total == 1:
+        position = "THE COMPLETE TEXT"
+    else:
+        # total is None while a streamed upload is still being extracted
+        position = f"PART {index + 1}{f' OF {total}' if total else ''} OF A LONGER MANUSCRIPT"
+    instructions = f"YOU ARE RECEIVING {position}."
+    if surrounding:
+        instructions += (
+            "\n\nSURROUNDING TEXT (ALREADY FINAL, FOR CONTINUITY ONLY; DO NOT REWRITE OR REPEAT IT):\n"
+            + surrounding
+        )
+    return [
+        SystemMessage(content=_cacheable(PROMPT_PREFIX, cache_control)),
+        SystemMessage(content=_cacheable(f"CONTEXT FROM MEMORY:\n{context_str}", cache_control)),
+        SystemMessage(content=instructions),
+        HumanMessage(content=chunk_text)
+    ]
+
+def _build_revision_prompt(
+    context_str: str, source_text: str, draft: str, notes: List[str], index: int, total: int,
+    cache_control: bool = False, surrounding: str = ""
+) -> list:
+    issues = "\n".join(f"- {note}" for note in notes)
+    return _build_prompt(context_str, source_text, index, total, cache_control, surrounding) + [
+        HumanMessage(content=f"""
+        YOUR PREVIOUS REWRITE OF THIS PART FAILED THE EDITORIAL CHECKS:
+        {issues}
+        
+        PREVIOUS REWRITE:
+        {draft}
+        
+        Return a corrected rewrite of the same part that resolves every issue above.
+        """)
+    ]
+
+async def _generate_chunk(
+    llm, messages: list, index: int, total: int, node: str = "generation", provider: str = "unknown"
+) -> Tuple[str, Dict[str, int]]:
+    """
+    Stream one chunk through the provider's `astream`, forwarding tokens to any
+    streaming consumer (no-op writer for plain `ainvoke`) and aggregating the
+    message chunks into the full response.
+    Revisions are not streamed token by token; a single `revision` event carries
+    the replacement text for the chunk.
+    """
+    writer = get_stream_writer()
+    response = None
+    started = time.perf_counter()
+    LLM_IN_FLIGHT.labels(provider).inc()
+    try:
+        async for piece in llm.astream(messages):
+            if response is None:
+                LLM_TTFT.labels(provider, node).observe(time.perf_counter() - started)
+            token = _extract_text(piece) if node == "generation" else None
+            if token:
+                writer({"event": "token", "chunk": index, "text": token})
+            response = piece if response is None else response + piece
+    except Exception:
+        LLM_ERRORS.labels(provider, node).inc()
+        raise
+    finally:
+        LLM_IN_FLIGHT.labels(provider).dec()
+    LLM_LATENCY.labels(provider, node).observe(time.perf_counter() - started)
+
+    if response is None:
+        return "", _sum_usage([])
+
+    text = _extract_text(response)
+    usage = _extract_usage(response)
+    record_usage(provider, usage)
+    logger.info("Chunk %s/%s completed (%s). Usage: %s", index + 1, total or '?', node, usage)
+    if node == "revision":
+        writer({"event": "revision", "chunk": index, "text": text})
+    writer({"event": "progress", "node": node, "chunk": index + 1, "total": total})
+    return text, usage
+
+async def _chunk_source(state: AgentState, chunks: List[str]) -> AsyncIterator[str]:
+    """Chunks in document order: from state, or built on the fly from a streamed block feed."""
+    feed = state.get("block_feed")
+    if feed is None:
+        for chunk_text in chunks:
+            yield chunk_text
+        return
+    builder = text_chunker.builder()
+    async for block in feed:
+        for chunk_text in builder.push(block):
+            yield chunk_text
+    for chunk_text in builder.close():
+        yield chunk_text
+
+def _merge_context(contexts: List[List[Dict]]) -> List[Dict]:
+    merged, seen = [], set()
+    for context in contexts:
+        for term in context:
+            key = term.get("id") or json.dumps(term, sort_keys=True, ensure_ascii=False)
+            if key not in seen:
+                seen.add(key)
+                merged.append(term)
+    return merged
+
+async def _cancel(tasks: List[asyncio.Future]):
+    """Cancel unfinished tasks and wait until they have stopped."""
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+async def generate_manuscript(state: AgentState):
+    """
+    Node 3: DIRECT GENERATION (Optimized).
+    Fans the chunks out concurrently (bounded by CHUNK_CONCURRENCY) and
+    reassembles the outputs in document order.
+    With a `block_feed` (streamed upload), chunks are built and dispatched while the
+    document is still being extracted; each chunk then retrieves its own memory context.
+    """
+    logger.info("Node: generate_manuscript started.")
+    streamed = state.get("block_feed") is not None
+    segments = state.get("segments") or []
+    # Selective mode may legitimately leave nothing for the LLM
+    chunks = state.get("chunks") if segments else (state.get("chunks") or [state["input_text"]])
+    total = None if streamed else len(chunks)
     
-    logger.info(f"Extracted Usage: {final_usage}")
+    # Dynamic LLM Selection (cached health + circuit breaker, no network round-trip).
+    # Cache keys carry the label of the provider `select()` would pick; the provider itself
+    # (and a half-open circuit's single trial) is only claimed on the first cache miss.
+    if total != 0:
+        expected = provider_registry.peek()
+        model_name = expected.label
+    else:
+        label = "Stored Version" if state.get("document_id") else "Local Filters"
+        expected, model_name = None, f"{label} (no LLM call)"
+    warmup = settings.PROMPT_CACHE_WARMUP and expected is not None and expected.prompt_cache and total != 1
+    call = {"provider": None, "failed": False}
+
+    def claim():
+        if call["provider"] is None:
+            call["provider"] = provider_registry.select()
+        return call["provider"]
+    
+    logger.info("Invoking %s for manuscript generation (%s chunk(s))...", model_name, total if total is not None else 'streamed')
+    semaphore = asyncio.Semaphore(max(1, settings.CHUNK_CONCURRENCY))
+
+    cache_stats = {"cache_hits": 0, "cache_misses": 0, "tokens_saved": 0}
+    contexts: Dict[int, List[Dict]] = {}
+    keys: Dict[int, str] = {}
+    costs: Dict[int, Dict[str, int]] = {}  # Tokens each chunk's output cost, cached or not
+    chunk_context = state.get("chunk_context") or []
+    job_id = state.get("job_id")
+    if job_id:
+        cache_stats["resumed_chunks"] = 0
+
+    async def run(index: int, chunk_text: str):
+        memory_context = await sovereign_memory.aretrieve_context(chunk_text) if streamed else state.get("memory_context", [])
+        contexts[index] = memory_context
+        context_str = json.dumps(memory_context, ensure_ascii=False)
+        surrounding = chunk_context[index] if index < len(chunk_context) else ""
+        key = make_cache_key(
+            chunk_text, SYSTEM_CONSTITUTION_VERSION, memory_context,
+            model_name, position=f"{index + 1}/{total or 'stream'}", surrounding=surrounding
+        )
+        keys[index] = key
+
+        # Job checkpoint first (a resumed job already paid for this chunk), then the shared cache
+        saved, usage = None, _sum_usage([])
+        if job_id:
+            saved = await job_store.aload_chunk(job_id, key)
+            if saved is not None:
+                usage = saved[1]
+                cache_stats["resumed_chunks"] += 1
+        if saved is None and settings.MANUSCRIPT_CACHE_ENABLED:
+            saved = await manuscript_cache.aget(key)
+            if saved is not None:
+                cache_stats["cache_hits"] += 1
+                record_cache("manuscript", True)
+                cache_stats["tokens_saved"] += saved[1].get("total_tokens") or 0
+        if saved is not None:
+            costs[index] = saved[1]
+            writer = get_stream_writer()
+            writer({"event": "token", "chunk": index, "text": saved[0]})
+            writer({"event": "progress", "node": "generation", "chunk": index + 1, "total": total, "cached": True})
+            return saved[0], usage
+
+        provider = claim()
+        if provider.label != model_name:
+            # Selection changed since the lookup: key the output to the provider that writes it
+            key = keys[index] = make_cache_key(
+                chunk_text, SYSTEM_CONSTITUTION_VERSION, memory_context,
+                provider.label, position=f"{index + 1}/{total or 'stream'}", surrounding=surrounding
+            )
+        cache_control = provider.prompt_cache == "explicit"
+        async with semaphore:
+            try:
+                text, usage = await _generate_chunk(
+                    provider.client, _build_prompt(context_str, chunk_text, index, total, cache_control, surrounding),
+                    index, total, provider=provider.name
+                )
+            except Exception:
+                call["failed"] = True
+                raise
+        costs[index] = usage
+        if settings.MANUSCRIPT_CACHE_ENABLED:
+            cache_stats["cache_misses"] += 1
+            record_cache("manuscript", False)
+            if text:
+                await manuscript_cache.aput(key, text, usage)
+        if job_id and text:
+            await job_store.asave_chunk(job_id, key, text, usage)
+        return text, usage
+
+    # Tasks are started in document order; gather preserves that order regardless of completion order
+    pass_started = time.monotonic()
+    source = _chunk_source(state, chunks)
+    chunks, tasks = [], []
+    try:
+        async for chunk_text in source:
+            chunks.append(chunk_text)
+            tasks.append(asyncio.ensure_future(run(len(chunks) - 1, chunk_text)))
+            if warmup and len(tasks) == 1:
+                # A prefix is only cached once a request using it has been processed:
+                # fanning out cold would pay the full prefix on every concurrent chunk
+                await asyncio.wait(tasks)
+    except Exception:
+        await _cancel(tasks)  # Extraction failed: do not keep paying for orphaned chunks
+        raise
+    finally:
+        if state.get("block_feed") is not None:
+            await state["block_feed"].aclose()
+
+    try:
+        results = await asyncio.gather(*tasks)
+    except Exception:
+        await _cancel(tasks)  # A chunk failed: the node raises, so stop spending on the others
+        if call["failed"]:
+            provider_registry.record_failure(call["provider"])
+        raise
+    # Only real LLM calls feed the circuit breaker (an all-cached pass claims no provider)
+    provider = call["provider"]
+    if provider is not None:
+        provider_registry.record_success(provider)
+        model_name = provider.label
+
+    final_usage = _sum_usage([usage for _, usage in results])
+    final_usage.update(cache_stats)
+    if segments:
+        final_usage.update(_versioned_stats(segments) if state.get("document_id") else _selective_stats(segments))
+    logger.info("Extracted Usage: %s", final_usage)
+    
+    update = {}
+    if streamed:
+        # The full text only exists now; later nodes (analysis, revision) read it from state
+        update = {
+            "input_text": "\n\n".join(chunks),
+            "chunks": chunks,
+            "memory_context": _merge_context([contexts[i] for i in sorted(contexts)]),
+            "block_feed": None
+        }
     
     logger.info("Node: generate_manuscript completed.")
     return {
-        "manuscript": final_text, 
-        "current_text": final_text,
+        **update,
+        **_assemble({**state, **update}, [text for text, _ in results], model_name),
+        "provider_name": provider.name if provider is not None else None,
+        "chunk_keys": [keys[i] for i in range(len(results))],
+        "chunk_costs": [costs[i] for i in range(len(results))],
         "token_usage": final_usage,
-        # Return empty analysis artifacts to satisfy the frontend schema if needed
-        "violations": [],
-        "metric_scores": {"strictness": 1.0, "majesty": 1.0, "superiority": 1.0},
-        "editor_notes": ["Analysis skipped for performance optimization."]
+        "last_pass_seconds": time.monotonic() - pass_started
+    }
+
+def _stitch(segments: List[Dict], spans: List[Tuple[int, int]], outputs: List[str]) -> Tuple[List[str], List[int]]:
+    """
+    Rebuild the document in order: generated output for each span, corrected paragraphs elsewhere.
+    Returns the blocks and, per block, the chunk it came from (-1 for kept paragraphs).
+    """
+    starts = {start: (end, k) for k, (start, end) in enumerate(spans)}
+    blocks, sources = [], []
+    i = 0
+    while i < len(segments):
+        if i in starts:
+            end, k = starts[i]
+            blocks.append(outputs[k])
+            sources.append(k)
+            i = end
+        else:
+            blocks.append(segments[i]["text"])
+            sources.append(-1)
+            i += 1
+    return blocks, sources
+
+def _assemble(state: AgentState, generated: List[str], model_name: str) -> Dict:
+    """Join the per-chunk outputs (stitched around kept paragraphs in selective mode) and sign the manuscript."""
+    segments = state.get("segments") or []
+    if segments:
+        blocks, sources = _stitch(segments, state.get("chunk_spans") or [], generated)
+    else:
+        blocks, sources = list(generated), list(range(len(generated)))
+    content_text = "\n\n".join(blocks)
+
+    # Append Signature
+    final_text = content_text + f"\n\n---\n> **Processed by: {model_name}**"
+    return {
+        "manuscript": final_text,
+        "current_text": final_text,
+        "generated": generated,
+        "chunk_outputs": blocks,
+        "chunk_sources": sources,
+        "model_label": model_name
+    }
+
+def _selective_stats(segments: List[Dict]) -> Dict[str, int]:
+    skipped = [s["text"] for s in segments if not s["rewrite"]]
+    # Each skipped paragraph saves its input tokens and (Law of Expansion, >= 1:1) as many output tokens
+    return {
+        "paragraphs_total": len(segments),
+        "paragraphs_skipped": len(skipped),
+        "estimated_tokens_saved": 2 * sum(estimate_tokens(t) for t in skipped)
     }
 
+def _versioned_stats(segments: List[Dict]) -> Dict[str, int]:
+    reused = [s for s in segments if not s["rewrite"]]
+    return {
+        "paragraphs_total": sum(len(s["hashes"]) for s in segments),
+        "paragraphs_reused": sum(len(s["hashes"]) for s in reused),
+        "units_reused": len(reused),
+        "estimated_tokens_saved": 2 * sum(estimate_tokens(s["text"]) for s in reused)
+    }
+
+def _editor_notes(scores: Dict[str, float], violation_count: int) -> List[str]:
+    notes = [f"Local analysis: {violation_count} violation(s) detected."]
+    if scores.get("strictness", 1.0) < settings.STRICTNESS_THRESHOLD:
+        notes.append(f"Strictness {scores['strictness']:.2f} is below the {settings.STRICTNESS_THRESHOLD:.2f} threshold.")
+    if scores.get("majesty", 1.0) < 1.0:
+        notes.append(f"Majestic lexical density is below the {settings.MAJESTY_THRESHOLD:.2f} target.")
+    if scores.get("superiority", 1.0) < 1.0:
+        notes.append("Submissive tone or missing authority markers detected.")
+    return notes
+
+async def analyze_manuscript(state: AgentState):
+    """
+    Node 4: Local quality analysis (no tokens).
+    Scores each generated chunk with the single-pass FilterEngine (process pool for
+    large documents) and fills the real violations/metric_scores. Generated chunks
+    that fail the local gate become revision targets, with their own notes.
+    """
+    logger.info("Node: analyze_manuscript started.")
+    chunks = state.get("chunk_outputs") or [state.get("manuscript", "")]
+    sources = state.get("chunk_sources") or [-1] * len(chunks)
+    results = await score_chunks(chunks)
+    scores, violations, violation_count = merge_results(chunks, results)
+
+    targets = [
+        {"index": source, "notes": _editor_notes(chunk_scores, count)}
+        for source, (chunk_scores, chunk_violations, count, _) in zip(sources, results)
+        if source >= 0 and _fails(chunk_scores, chunk_violations)
+    ]
+    get_stream_writer()({
+        "event": "progress", "node": "analysis", "violations": violation_count, "failing_chunks": len(targets)
+    })
+    logger.info("Analysis scores: %s | Violations: %s | Failing chunks: %s", scores, violation_count, len(targets))
+    return {
+        "metric_scores": scores,
+        "violations": violations,
+        "editor_notes": _editor_notes(scores, violation_count),
+        "revision_targets": targets
+    }
+
+def should_revise(state: AgentState) -> str:
+    """Loop back only while chunks fail, revisions remain, and another pass fits the latency budget."""
+    targets = state.get("revision_targets") or []
+    if not targets:
+        return "end"
+    if state.get("revision_count", 0) >= settings.MAX_REVISIONS:
+        logger.info("Revision limit reached with %s failing chunk(s).", len(targets))
+        return "end"
+    elapsed = time.time() - state.get("started_at", time.time())
+    if elapsed + state.get("last_pass_seconds", 0.0) > settings.REVISION_LATENCY_BUDGET_SECONDS:
+        logger.info("Latency budget exhausted after %.1fs; skipping revision.", elapsed)
+        return "end"
+    return "revise"
+
+async def revise_manuscript(state: AgentState):
+    """
+    Node 5: Critique-and-revise.
+    Regenerates only the chunks flagged by the analysis node, feeding each its
+    previous draft and local editor notes. Passing chunks are left untouched.
+    Uses the generation provider and context, and stores each revised chunk under
+    its generation cache key and job checkpoint, so a repeat request or a resumed
+    job gets the final text rather than the rejected draft.
+    """
+    revision = state.get("revision_count", 0) + 1
+    targets = state["revision_targets"]
+    logger.info("Node: revise_manuscript started (pass %s, %s chunk(s)).", revision, len(targets))
+    context_str = json.dumps(state.get("memory_context", []), ensure_ascii=False)
+    chunks = state.get("chunks") or [state["input_text"]]
+    generated = list(state["generated"])
+    total = len(chunks)
+    chunk_context = state.get("chunk_context") or []
+    keys = state.get("chunk_keys") or []
+    costs = list(state.get("chunk_costs") or [])
+    job_id = state.get("job_id")
+
+    # Same provider as the drafts: the cache keys carry its label
+    provider = provider_registry.get(state.get("provider_name")) or provider_registry.select()
+    cache_control = provider.prompt_cache == "explicit"
+    semaphore = asyncio.Semaphore(max(1, settings.CHUNK_CONCURRENCY))
+
+    async def run(target: Dict):
+        index = target["index"]
+        surrounding = chunk_context[index] if index < len(chunk_context) else ""
+        messages = _build_revision_prompt(
+            context_str, chunks[index], generated[index], target["notes"], index, total, cache_control, surrounding
+        )
+        async with semaphore:
+            text, usage = await _generate_chunk(provider.client, messages, index, total, node="revision", provider=provider.name)
+        if text and index < len(keys):
+            # Cached usage is the full cost of the final text (draft plus revisions)
+            costs[index] = _sum_usage([costs[index], usage])
+            if settings.MANUSCRIPT_CACHE_ENABLED:
+                await manuscript_cache.aput(keys[index], text, costs[index])
+            if job_id:
+                await job_store.asave_chunk(job_id, keys[index], text, costs[index])
+        return text, usage
+
+    pass_started = time.monotonic()
+    tasks = [asyncio.ensure_future(run(t)) for t in targets]
+    try:
+        results = await asyncio.gather(*tasks)
+    except Exception:
+        await _cancel(tasks)
+        provider_registry.record_failure(provider)
+        raise
+    provider_registry.record_success(provider)
+
+    for target, (text, _) in zip(targets, results):
+        if text:
+            generated[target["index"]] = text
+
+    usage = dict(state.get("token_usage") or {})
+    for key, value in _sum_usage([u for _, u in results]).items():
+        usage[key] = usage.get(key, 0) + value
+    usage["revised_chunks"] = usage.get("revised_chunks", 0) + len(targets)
+
+    logger.info("Node: revise_manuscript completed.")
+    return {
+        **_assemble(state, generated, state.get("model_label") or provider.label),
+        "chunk_costs": costs,
+        "token_usage": usage,
+        "revision_count": revision,
+        "last_pass_seconds": time.monotonic() - pass_started
+    }
+
+async def save_version(state: AgentState):
+    """
+    Node 6: Record the final per-unit outputs of a versioned document, so the next
+    upload of the same `document_id` only regenerates what changed.
+    """
+    doc_id = state.get("document_id")
+    if not doc_id:
+        return {}
+    segments = state.get("segments") or []
+    generated = state.get("generated") or []
+    starts = {start: (end, k) for k, (start, end) in enumerate(state.get("chunk_spans") or [])}
+
+    units = []
+    i = 0
+    while i < len(segments):
+        if i in starts:
+            end, k = starts[i]
+            unit = {"hashes": [h for s in segments[i:end] for h in s["hashes"]], "output": generated[k]}
+            i = end
+        else:
+            unit = {"hashes": segments[i]["hashes"], "output": segments[i]["text"]}
+            i += 1
+        if unit["output"]:
+            units.append(unit)  # Empty outputs (failed calls) are regenerated next time
+
+    version = await version_store.asave(doc_id, SYSTEM_CONSTITUTION_VERSION, units)
+    logger.info("Saved document %s v%s (%s unit(s)).", doc_id, version, len(units))
+    return {"token_usage": {**(state.get("token_usage") or {}), "document_version": version}}
+
 # --- Graph Definition ---
 
 workflow = StateGraph(AgentState)
 
-# Optimized Flow: Memory -> Generation -> End
-workflow.add_node("memory", memory_retrieval)
-workflow.add_node("generation", generate_manuscript)
+# Optimized Flow: Memory -> Chunking -> Generation -> Analysis -> (Revision -> Analysis)* -> Versioning -> End
+# Every node is timed (sovereign_graph_node_duration_seconds{node=...})
+for name, node in (
+    ("memory", memory_retrieval),
+    ("chunking", chunk_input),
+    ("generation", generate_manuscript),
+    ("analysis", analyze_manuscript),
+    ("revision", revise_manuscript),
+    ("versioning", save_version),
+):
+    workflow.add_node(name, instrument_node(name, node))
 
 workflow.set_entry_point("memory")
 
-workflow.add_edge("memory", "generation")
-workflow.add_edge("generation", END)
+workflow.add_edge("memory", "chunking")
+workflow.add_edge("chunking", "generation")
+workflow.add_edge("generation", "analysis")
+workflow.add_conditional_edges("analysis", should_revise, {"revise": "revision", "end": "versioning"})
+workflow.add_edge("revision", "analysis")
+workflow.add_edge("versioning", END)
 
 app_graph = workflow.compile()
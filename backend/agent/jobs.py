@@ -0,0 +1,160 @@
+import asyncio
+from typing import Dict, List, Optional
+
+from config.settings import settings
+from memory.job_store import job_store
+from monitoring.metrics import JOBS_IN_FLIGHT
+from utils.logger_config import bind_request_id, setup_logger
+from utils.sqlite import sqlite_path
+from .graph import app_graph, workflow
+
+logger = setup_logger("jobs")
+
+MAX_BACKOFF_SECONDS = 30.0  # Cap on the pause after repeated worker errors
+
+try:
+    import aiosqlite
+    from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+except ImportError:
+    AsyncSqliteSaver = None  # Jobs still resume from per-chunk checkpoints
+    print("WARNING: langgraph-checkpoint-sqlite import failed. Job graph checkpoints disabled.")
+
+
+def job_result(result: Dict, include_original: bool = False) -> Dict:
+    """Same payload as the blocking endpoints."""
+    response = {
+        "manuscript": result.get("manuscript"),
+        "editor_notes": result.get("editor_notes"),
+        "metric_scores": result.get("metric_scores", {}),
+        "violations": result.get("violations", []),
+        "token_usage": result.get("token_usage", {}),
+        "status": "completed"
+    }
+    if include_original:
+        response["original_text"] = result.get("input_text")
+    return response
+
+
+class JobRunner:
+    """
+    Runs queued jobs on JOB_WORKERS asyncio workers inside the API process.
+    Each job is a LangGraph thread (thread_id = job id). With graph checkpoints a
+    resumed job continues after its last completed node; inside generation, the
+    per-chunk checkpoints in JobStore skip every chunk that had already finished.
+    """
+
+    def __init__(self):
+        self.graph = app_graph
+        self._saver = None
+        self._conn = None
+        self._workers: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+
+    async def start(self, workers: int = None):
+        count = settings.JOB_WORKERS if workers is None else workers
+        if count <= 0 or self._workers:
+            return
+        if settings.JOB_GRAPH_CHECKPOINTS and AsyncSqliteSaver is not None:
+            self._conn = await aiosqlite.connect(sqlite_path())
+            self._saver = AsyncSqliteSaver(self._conn)
+            await self._saver.setup()
+            self.graph = workflow.compile(checkpointer=self._saver)
+        self._wakeup = asyncio.Event()
+        self._workers = [asyncio.create_task(self._work()) for _ in range(count)]
+        logger.info("Job runner started with %s worker(s).", count)
+
+    async def stop(self):
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        if self._conn is not None:
+            await self._conn.close()
+            self._conn = None
+            self._saver = None
+            self.graph = app_graph
+
+    def notify(self):
+        """Wake an idle worker right away instead of at its next poll."""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _work(self):
+        """
+        Claim and run jobs until cancelled. An error outside the graph run (claim, state
+        lookup, bookkeeping) is logged, the job goes back to the queue (spending an attempt,
+        so a job that always fails ends up failed) and the worker backs off, then continues.
+        """
+        errors = 0
+        while True:
+            job = None
+            try:
+                job = await job_store.aclaim()
+                if job is None:
+                    errors = 0
+                    self._wakeup.clear()
+                    try:
+                        await asyncio.wait_for(self._wakeup.wait(), settings.JOB_POLL_INTERVAL_SECONDS)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+                await self.run(job)
+                errors = 0
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                errors += 1
+                delay = min(settings.JOB_POLL_INTERVAL_SECONDS * 2 ** errors, MAX_BACKOFF_SECONDS)
+                if job is None:
+                    logger.exception("Job worker error; retrying in %.1fs.", delay)
+                else:
+                    logger.exception("Job worker error on job %s; retrying in %.1fs.", job["id"], delay)
+                    try:
+                        await job_store.afail(job["id"], str(e), retry=True)
+                    except Exception:
+                        logger.exception("Could not requeue job %s; it resumes once its heartbeat is stale.", job["id"])
+                await asyncio.sleep(delay)
+
+    async def _heartbeat(self, job_id: str):
+        while True:
+            await asyncio.sleep(settings.JOB_STALE_SECONDS / 3)
+            await job_store.aheartbeat(job_id)
+
+    async def run(self, job: Dict):
+        job_id = job["id"]
+        bind_request_id(job_id)  # Job logs carry the job id as their correlation id
+        config = {"configurable": {"thread_id": job_id}}
+        inputs = {**job["payload"]["state"], "job_id": job_id}
+        if self._saver is not None:
+            snapshot = await self.graph.aget_state(config)
+            if snapshot.next:
+                logger.info("Resuming job %s at node(s) %s.", job_id, list(snapshot.next))
+                inputs = None  # Continue the checkpointed thread
+        logger.info("Running job %s (attempt %s).", job_id, job['attempts'])
+
+        heartbeat = asyncio.create_task(self._heartbeat(job_id))
+        result = {}
+        JOBS_IN_FLIGHT.inc()
+        try:
+            async for mode, payload in self.graph.astream(inputs, config, stream_mode=["custom", "values"]):
+                if mode == "values":
+                    result = payload
+                elif payload.get("event") != "token":
+                    await job_store.aheartbeat(job_id, payload)
+            await job_store.acomplete(job_id, job_result(result, job["payload"].get("include_original", False)))
+            if self._saver is not None:
+                await self._saver.adelete_thread(job_id)
+            logger.info("Job %s completed.", job_id)
+        except asyncio.CancelledError:
+            # Shutdown: hand the job back so the next start resumes it immediately
+            await job_store.arelease(job_id)
+            raise
+        except Exception as e:
+            logger.error("Job %s failed: %s", job_id, e, exc_info=True)
+            await job_store.afail(job_id, str(e), retry=True)
+        finally:
+            heartbeat.cancel()
+            JOBS_IN_FLIGHT.dec()
+
+
+job_runner = JobRunner()
@@ -1,3 +1,5 @@
+import hashlib
+
 
 SYSTEM_CONSTITUTION = """
 # Role & Identity
@@ -57,4 +59,23 @@ Your goal is to rewrite, merge, and polish Arabic content.
 "قصة ماجيك جونسون، عرضوا عليه كاش أو أسهم في نايكي عام 1979 ورفض الأسهم وخسر مليارات."
 **Output (Expanded Style):**
 "لنتأمل مأساة التوقيت في قصة أسطورة السلة 'ماجيك جونسون'. في عام 1979، وقف هذا الشاب على مفترق طرق حين عُرض عليه خياران: إما عقد نقدي فوري (Cash) من شركة Converse، وإما حصة أسهم (Equity) في شركة ناشئة تدعى Nike. ولأن وعيه الاستثماري لم يكن قد نضج بعد، اختار المال السائل ورفض الملكية. النتيجة؟ تلك الأسهم التي زهد فيها تقدر قيمتها اليوم بأكثر من 5 مليارات دولار. درسٌ قاسٍ يعلمنا أن الجهل في وقت الغرس كارثة لا تُعوض وقت الحصاد."
-"""
\ No newline at end of file
+"""
+
+# Static generation rules. Nothing request-specific may appear here (see PROMPT_PREFIX).
+GENERATION_INSTRUCTIONS = """
+CRITICAL INSTRUCTIONS (ZERO-OMISSION):
+1. YOU MUST PROCESS THE TEXT VERBATIM. DO NOT SUMMARIZE.
+2. MAINTAIN THE EXACT LENGTH OF THE ORIGINAL CONTENT OR EXPAND IT.
+3. FORMAT THE OUTPUT CLEARLY WITH MARKDOWN (BOLD HEADERS, LISTS).
+4. WHEN YOU RECEIVE ONE PART OF A LONGER MANUSCRIPT, RETURN ONLY THE REWRITE OF THAT PART,
+   WITHOUT INTRODUCTIONS, CONCLUSIONS OR COMMENTARY, SO THE PARTS CAN BE JOINED IN ORDER.
+
+Apply the "Sovereign Tone" to everything.
+"""
+
+# Byte-stable prefix sent first on every call, so provider prompt caches
+# (Anthropic cache_control, DeepSeek/OpenAI/Gemini automatic prefix caching) can reuse it.
+PROMPT_PREFIX = SYSTEM_CONSTITUTION + GENERATION_INSTRUCTIONS
+
+# Content hash of the static prefix; part of every cache key so edits invalidate cached output
+SYSTEM_CONSTITUTION_VERSION = hashlib.sha256(PROMPT_PREFIX.encode("utf-8")).hexdigest()[:16]
@@ -0,0 +1,315 @@
+import asyncio
+import importlib.util
+import time
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import httpx
+from dotenv import load_dotenv, find_dotenv
+
+# Load env vars independently of settings (Claude/OpenAI clients read keys from env)
+load_dotenv(find_dotenv())
+
+from config.settings import settings
+from utils.logger_config import setup_logger
+
+logger = setup_logger("providers")
+
+# Circuit-breaker states
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class Provider:
+    """
+    A single LLM backend: a lazily built, long-lived client plus its cached
+    health and circuit-breaker state.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        label: str,
+        factory: Callable[[], object],
+        is_configured: Callable[[], bool],
+        probe: Optional[Callable[[], Awaitable[bool]]] = None,
+        prompt_cache: Optional[str] = None,
+    ):
+        self.name = name
+        self.label = label
+        self._factory = factory
+        self._is_configured = is_configured
+        self._probe = probe
+        # "explicit": needs cache_control blocks (Anthropic); "automatic": server-side prefix caching
+        self.prompt_cache = prompt_cache
+
+        self._client = None
+        self.healthy = True  # Optimistic until the first probe says otherwise
+        self.last_checked: Optional[float] = None  # time.monotonic() of the last probe; None = never probed
+        self.circuit = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.trial_started = 0.0
+
+    @property
+    def configured(self) -> bool:
+        return self._is_configured()
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = self._factory()
+        return self._client
+
+    async def probe(self) -> bool:
+        """Run the provider's async health check (providers without one are assumed healthy)."""
+        if self._probe is None:
+            return True
+        try:
+            return await self._probe()
+        except Exception as e:
+            logger.warning("Health probe for %s raised: %s", self.name, e)
+            return False
+
+    def available(self, now: float, claim: bool = True) -> bool:
+        """Whether a call may go to this provider; with `claim=False` no trial is taken."""
+        if not self.configured or not self.healthy:
+            return False
+        if self.circuit == OPEN:
+            if now - self.opened_at < settings.PROVIDER_COOLDOWN_SECONDS:
+                return False
+            if claim:
+                # Cooldown elapsed: this caller carries the single trial request
+                self.circuit = HALF_OPEN
+                self.trial_started = now
+            return True
+        if self.circuit == HALF_OPEN:
+            # Everyone else falls back until the trial resolves (or outlives the call timeout)
+            if now - self.trial_started < settings.PROVIDER_TIMEOUT_SECONDS:
+                return False
+            if claim:
+                self.trial_started = now
+        return True
+
+    def snapshot(self) -> Dict:
+        return {
+            "label": self.label,
+            "configured": self.configured,
+            "healthy": self.healthy,
+            "circuit": self.circuit,
+            "consecutive_failures": self.consecutive_failures,
+            "last_checked": self.last_checked,
+            "prompt_cache": self.prompt_cache,
+        }
+
+
+class ProviderRegistry:
+    """
+    Priority-ordered provider registry.
+    Health probes run as a background task on the event loop and are cached for
+    PROVIDER_HEALTH_TTL seconds (stale-while-revalidate), so `select()` never blocks
+    on the network.
+    Call outcomes feed a per-provider circuit breaker.
+    """
+
+    def __init__(self, providers: List[Provider], fallback: Provider):
+        self.providers = providers
+        self.fallback = fallback
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    def get(self, name: str) -> Optional[Provider]:
+        for provider in self.providers + [self.fallback]:
+            if provider.name == name:
+                return provider
+        return None
+
+    # --- Health ---
+
+    async def refresh(self):
+        """Probe every configured provider concurrently. Used by warm-up and the background task."""
+        configured = [p for p in self.providers if p.configured]
+        results = await asyncio.gather(*(p.probe() for p in configured))
+        for provider, healthy in zip(configured, results):
+            if healthy != provider.healthy:
+                logger.info("Provider %s health changed: %s -> %s", provider.name, provider.healthy, healthy)
+            provider.healthy = healthy
+            provider.last_checked = time.monotonic()
+
+    def _maybe_schedule_refresh(self, now: float):
+        stale = any(
+            p.configured and (p.last_checked is None or now - p.last_checked > settings.PROVIDER_HEALTH_TTL)
+            for p in self.providers
+        )
+        if not stale or (self._refresh_task and not self._refresh_task.done()):
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return  # Sync caller (scripts): keep cached health, refresh on the next async select
+        self._refresh_task = loop.create_task(self.refresh())
+
+    # --- Selection ---
+
+    def select(self) -> Provider:
+        """Return the highest-priority provider that is configured, healthy and not tripped."""
+        now = time.monotonic()
+        self._maybe_schedule_refresh(now)
+        for provider in self.providers:
+            if provider.available(now):
+                return provider
+        logger.warning("No preferred provider available. Falling back to %s.", self.fallback.label)
+        return self.fallback
+
+    def peek(self) -> Provider:
+        """The provider `select()` would return now, without claiming a half-open trial."""
+        now = time.monotonic()
+        for provider in self.providers:
+            if provider.available(now, claim=False):
+                return provider
+        return self.fallback
+
+    # --- Circuit Breaker ---
+
+    def record_success(self, provider: Provider):
+        provider.consecutive_failures = 0
+        if provider.circuit != CLOSED:
+            logger.info("Circuit for %s closed.", provider.name)
+        provider.circuit = CLOSED
+
+    def record_failure(self, provider: Provider):
+        provider.consecutive_failures += 1
+        if provider.circuit == HALF_OPEN or provider.consecutive_failures >= settings.PROVIDER_FAILURE_THRESHOLD:
+            if provider.circuit != OPEN:
+                logger.warning("Circuit for %s opened after %s failure(s).", provider.name, provider.consecutive_failures)
+            provider.circuit = OPEN
+            provider.opened_at = time.monotonic()
+
+    def status(self) -> Dict[str, Dict]:
+        return {p.name: p.snapshot() for p in self.providers + [self.fallback]}
+
+
+# --- Shared Connection Pools ---
+
+_limits = httpx.Limits(
+    max_connections=settings.PROVIDER_MAX_CONNECTIONS,
+    max_keepalive_connections=settings.PROVIDER_MAX_CONNECTIONS,
+)
+http_client = httpx.Client(limits=_limits, timeout=settings.PROVIDER_TIMEOUT_SECONDS)
+http_async_client = httpx.AsyncClient(limits=_limits, timeout=settings.PROVIDER_TIMEOUT_SECONDS)
+
+
+async def check_deepseek_availability(api_key: str) -> bool:
+    """Check key validity and balance before reliance."""
+    if not api_key:
+        return False
+    response = await http_async_client.get(
+        f"{settings.DEEPSEEK_BASE_URL}/user/balance",
+        headers={"Authorization": f"Bearer {api_key}"},
+        timeout=5.0
+    )
+    if response.status_code != 200:
+        return False
+    data = response.json()
+    return data.get("is_available", False)
+
+
+# --- Client Factories ---
+# Provider SDKs take seconds to import, so each one is imported the first time its
+# provider builds a client (see Provider.client), not when this module loads.
+
+def _chat_openai(**kwargs):
+    from langchain_openai import ChatOpenAI
+    return ChatOpenAI(**kwargs)
+
+
+def _chat_anthropic(**kwargs):
+    from langchain_anthropic import ChatAnthropic
+    return ChatAnthropic(**kwargs)
+
+
+def _chat_gemini(**kwargs):
+    from langchain_google_genai import ChatGoogleGenerativeAI
+    return ChatGoogleGenerativeAI(**kwargs)
+
+
+def _installed(package: str) -> bool:
+    """Importability check without importing the package."""
+    return importlib.util.find_spec(package) is not None
+
+
+def _build_stub_registry() -> ProviderRegistry:
+    """Every call goes to the local OpenAI-compatible stand-in (load tests, offline runs)."""
+    stub = Provider(
+        name="stub",
+        label=f"Local Stub ({settings.LLM_STUB_MODEL})",
+        factory=lambda: _chat_openai(
+            model=settings.LLM_STUB_MODEL,
+            api_key="stub",
+            base_url=settings.LLM_STUB_BASE_URL,
+            stream_usage=True,
+            http_client=http_client,
+            http_async_client=http_async_client
+        ),
+        is_configured=lambda: True,
+        prompt_cache="automatic",
+    )
+    return ProviderRegistry([stub], fallback=stub)
+
+
+def _build_registry() -> ProviderRegistry:
+    if settings.LLM_STUB_BASE_URL:
+        logger.warning("LLM_STUB_BASE_URL set: routing all LLM calls to %s.", settings.LLM_STUB_BASE_URL)
+        return _build_stub_registry()
+
+    # 1. DeepSeek First (health-probed via the balance endpoint)
+    deepseek = Provider(
+        name="deepseek",
+        label="DeepSeek-V3 (Sovereign Engine)",
+        factory=lambda: _chat_openai(
+            model="deepseek-chat",
+            api_key=settings.DEEPSEEK_API_KEY,
+            base_url=settings.DEEPSEEK_BASE_URL,
+            stream_usage=True,
+            http_client=http_client,
+            http_async_client=http_async_client
+        ),
+        is_configured=lambda: bool(settings.DEEPSEEK_API_KEY),
+        probe=lambda: check_deepseek_availability(settings.DEEPSEEK_API_KEY),
+        prompt_cache="automatic",
+    )
+    # 2. Gemini Fallback
+    gemini = Provider(
+        name="gemini",
+        label="Gemini Flash (Fallback Engine)",
+        factory=lambda: _chat_gemini(
+            model="gemini-flash-latest", google_api_key=settings.GOOGLE_API_KEY, temperature=0.7
+        ),
+        is_configured=lambda: bool(settings.GOOGLE_API_KEY and _installed("langchain_google_genai")),
+        prompt_cache="automatic",
+    )
+    # 3. Claude
+    claude = Provider(
+        name="claude",
+        label="Claude 3.5 Sonnet",
+        factory=lambda: _chat_anthropic(model="claude-3-5-sonnet-20240620", temperature=0.7),
+        is_configured=lambda: bool(settings.ANTHROPIC_API_KEY and "sk-ant" in settings.ANTHROPIC_API_KEY),
+        prompt_cache="explicit",
+    )
+    # 4. OpenAI (last resort)
+    openai = Provider(
+        name="openai",
+        label="GPT-4o",
+        factory=lambda: _chat_openai(
+            model="gpt-4o",
+            temperature=0.7,
+            stream_usage=True,
+            http_client=http_client,
+            http_async_client=http_async_client
+        ),
+        is_configured=lambda: True,
+        prompt_cache="automatic",
+    )
+    return ProviderRegistry([deepseek, gemini, claude], fallback=openai)
+
+
+provider_registry = _build_registry()
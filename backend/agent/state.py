@@ -1,4 +1,4 @@
-from typing import TypedDict, List, Optional, Dict
+from typing import AsyncIterator, TypedDict, List, Optional, Dict, Tuple
 
 class AgentState(TypedDict):
     input_text: str
@@ -12,5 +12,33 @@ class AgentState(TypedDict):
     metric_scores: Dict[str, float] # Scores from filters (Strictness, Majesty, Superiority)
     token_usage: Optional[Dict] # Token usage statistics
     
+    # Chunked Generation
+    chunks: List[str] # Token-budgeted slices of input_text, in document order
+    chunk_outputs: List[str] # Generated text per chunk (same order), before the signature
+    block_feed: Optional[AsyncIterator[str]] # Streamed upload: text blocks still being extracted (input_text is filled in by generation)
+    
+    # Selective Rewrite Mode
+    rewrite_mode: str # "full" (whole input to the LLM) or "selective" (only failing paragraphs)
+    segments: List[Dict] # Selective mode: [{"text": locally corrected paragraph, "rewrite": bool}]
+    chunk_spans: List[Tuple[int, int]] # Selective mode: segment range each chunk replaces
+    
+    # Critique-and-Revise Loop
+    generated: List[str] # Raw LLM output per chunk (index-aligned with chunks)
+    chunk_sources: List[int] # Per chunk_outputs block: index of the chunk it came from, -1 if kept verbatim
+    revision_targets: List[Dict] # Chunks failing local analysis: [{"index": int, "notes": [str]}]
+    model_label: str # Provider label used in the signature
+    provider_name: Optional[str] # Registry name of the generation provider (revisions reuse it)
+    chunk_keys: List[str] # Per chunk: generation cache / checkpoint key
+    chunk_costs: List[Dict] # Per chunk: token usage behind its current output (stored with it in the cache)
+    started_at: float # time.time() when the request entered the graph (wall clock: a resumed job may run in another process)
+    last_pass_seconds: float # Duration of the latest generation/revision pass
+    
+    # Incremental Re-processing (document versions)
+    document_id: Optional[str] # Enables paragraph diffing against the stored previous version
+    chunk_context: List[str] # Per chunk: surrounding final text for continuity (versioned documents)
+    
+    # Background Jobs
+    job_id: Optional[str] # Set by the job runner: enables per-chunk generation checkpoints
+    
     revision_count: int
     status: str
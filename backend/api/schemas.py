@@ -66,3 +66,20 @@ class Chapter(BaseModel):
     approval_status: str = Field(default="pending")
     created_at: datetime = Field(default_factory=datetime.now)
     processed_at: Optional[datetime] = None
+
+# --- Background Jobs ---
+
+class JobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+class JobInfo(BaseModel):
+    id: str = Field(..., description="Job ID")
+    status: JobStatus
+    progress: Optional[Dict] = Field(None, description="Latest progress event from the agent graph")
+    error: Optional[str] = None
+    attempts: int = Field(default=0, description="Times a worker has picked the job up")
+    created_at: float
+    updated_at: float
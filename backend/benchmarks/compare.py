@@ -0,0 +1,57 @@
+"""
+Compare two benchmark result files (JSON lines from benchmarks.hot_paths) and flag
+cases whose median latency regressed by more than a threshold.
+
+Usage (from backend/):
+    python -m benchmarks.compare baseline.jsonl current.jsonl --threshold 0.15
+Exits with status 1 when any case regressed.
+"""
+import argparse
+import json
+import sys
+from typing import Dict, Tuple
+
+
+def load(path: str) -> Dict[Tuple, Dict]:
+    """Last record per (suite, case, params) wins, so appended re-runs replace older ones."""
+    records = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if "median_s" not in record:
+                continue  # Skipped cases
+            key = (record["suite"], record["case"], json.dumps(record.get("params", {}), sort_keys=True))
+            records[key] = record
+    return records
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument("--threshold", type=float, default=0.15, help="Allowed median slowdown (0.15 = 15%%)")
+    args = parser.parse_args()
+
+    baseline, current = load(args.baseline), load(args.current)
+    regressions = 0
+    for key in sorted(baseline.keys() & current.keys()):
+        before, after = baseline[key]["median_s"], current[key]["median_s"]
+        change = (after - before) / before if before else 0.0
+        regressed = change > args.threshold
+        regressions += regressed
+        print(json.dumps({
+            "suite": key[0],
+            "case": key[1],
+            "params": json.loads(key[2]),
+            "baseline_median_s": before,
+            "current_median_s": after,
+            "change": round(change, 4),
+            "regressed": regressed,
+        }, ensure_ascii=False))
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
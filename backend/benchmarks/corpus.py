@@ -0,0 +1,95 @@
+"""
+Synthetic Arabic corpus for the benchmarks: deterministic (seeded) manuscripts,
+glossary terms and DOCX files shaped like the real inputs, with a controllable
+density of the phrases the filters react to.
+"""
+import os
+import random
+import sys
+from typing import List
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api.schemas import ArabicTerm
+from filters.majesty_filter import MajestyFilter
+from filters.strictness_filter import StrictnessFilter
+from filters.superiority_filter import SuperiorityFilter
+
+LETTERS = "ابتثجحخدذرزسشصضطظعغفقكلمنهوي"
+CONNECTORS = ["في", "من", "على", "إلى", "أن", "هذا", "التي", "الذي", "مع", "عن"]
+TRIGGERS = (
+    [pattern for pattern, _ in StrictnessFilter.FORBIDDEN_PATTERNS]
+    + [pattern for pattern, _ in SuperiorityFilter.FORBIDDEN_TONES]
+    + list(MajestyFilter.WEAK_TERMS_REPLACEMENT)
+    + sorted(MajestyFilter.MAJESTIC_TERMS)
+)
+
+
+class CorpusGenerator:
+    """Seeded generator; the same seed always yields the same corpus."""
+
+    def __init__(self, seed: int = 42, vocabulary: int = 5000, trigger_rate: float = 0.03):
+        self.random = random.Random(seed)
+        self.trigger_rate = trigger_rate
+        self.vocabulary = [self._word() for _ in range(vocabulary)]
+
+    def _word(self) -> str:
+        stem = "".join(self.random.choice(LETTERS) for _ in range(self.random.randint(3, 6)))
+        return ("ال" + stem) if self.random.random() < 0.4 else stem
+
+    def sentence(self, words: int = None) -> str:
+        words = words or self.random.randint(8, 20)
+        out = []
+        for _ in range(words):
+            roll = self.random.random()
+            if roll < self.trigger_rate:
+                out.append(self.random.choice(TRIGGERS))
+            elif roll < 0.25:
+                out.append(self.random.choice(CONNECTORS))
+            else:
+                out.append(self.random.choice(self.vocabulary))
+        return " ".join(out) + self.random.choice([".", ".", "،", "؟"])
+
+    def paragraph(self, sentences: int = None) -> str:
+        return " ".join(self.sentence() for _ in range(sentences or self.random.randint(2, 6)))
+
+    def manuscript(self, chars: int) -> str:
+        """Paragraphs (with a heading every ~8 paragraphs) until `chars` is reached."""
+        parts: List[str] = []
+        size = 0
+        while size < chars:
+            block = f"## {self.sentence(4).rstrip('.،؟')}" if len(parts) % 8 == 0 else self.paragraph()
+            parts.append(block)
+            size += len(block) + 2
+        return "\n\n".join(parts)
+
+    def terms(self, count: int) -> List[ArabicTerm]:
+        roots = max(1, count // 10)
+        return [
+            ArabicTerm(
+                id=f"term_{i}",
+                english_term=f"concept {i}",
+                arabic_translation=f"{self.random.choice(self.vocabulary)} {i}",
+                arabic_root=f"root_{i % roots}",
+                definition=self.sentence(6),
+                source="Benchmark",
+            )
+            for i in range(count)
+        ]
+
+    def docx(self, path: str, paragraphs: int, table_every: int = 50) -> str:
+        """Write a DOCX with headings, body paragraphs and a small table every `table_every` paragraphs."""
+        from docx import Document
+
+        document = Document()
+        for i in range(paragraphs):
+            if i % 20 == 0:
+                document.add_heading(self.sentence(4).rstrip(".،؟"), level=1 + (i // 20) % 2)
+            document.add_paragraph(self.paragraph())
+            if table_every and i % table_every == table_every - 1:
+                table = document.add_table(rows=3, cols=3)
+                for row in table.rows:
+                    for cell in row.cells:
+                        cell.text = self.random.choice(self.vocabulary)
+        document.save(path)
+        return path
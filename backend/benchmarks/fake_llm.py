@@ -0,0 +1,215 @@
+"""
+Local stand-in for an OpenAI/DeepSeek-compatible chat-completions server, for
+load tests and offline runs. Streaming and non-streaming responses, with
+configurable latency, generation speed and error rate. The reply rewrites
+(echoes) the last user message so downstream filters and stitching see
+realistic Arabic text. Repeated system prompts report `cached_tokens`, like
+the providers' automatic prefix caching.
+
+Usage (from backend/):
+    python -m benchmarks.fake_llm --port 8100 --latency 0.3 --tokens-per-second 60 --error-rate 0.02
+    LLM_STUB_BASE_URL=http://127.0.0.1:8100/v1 uvicorn main:app --port 8000
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import random
+import sys
+import time
+import uuid
+from typing import AsyncIterator, Dict, List
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from processors.chunker import estimate_tokens
+
+
+class FakeLLMConfig:
+    def __init__(
+        self,
+        latency: float = 0.2,
+        jitter: float = 0.05,
+        tokens_per_second: float = 50.0,
+        error_rate: float = 0.0,
+        error_status: int = 500,
+        output_ratio: float = 1.0,
+        max_output_tokens: int = 4096,
+        seed: int = None,
+    ):
+        self.latency = latency  # Seconds before the first token (queueing + prefill)
+        self.jitter = jitter  # Uniform +/- noise on the latency
+        self.tokens_per_second = tokens_per_second  # Generation speed (0 = instant)
+        self.error_rate = error_rate  # Fraction of requests answered with `error_status`
+        self.error_status = error_status  # 500 (server error) or 429 (rate limit)
+        self.output_ratio = output_ratio  # Output words per input word of the last user message
+        self.max_output_tokens = max_output_tokens
+        self.random = random.Random(seed)
+
+
+def _text(content) -> str:
+    """Message content is a string or a list of content blocks."""
+    if isinstance(content, list):
+        return "".join(block.get("text", "") for block in content if isinstance(block, dict))
+    return content or ""
+
+
+def _reply_words(messages: List[Dict], config: FakeLLMConfig, limit: int) -> List[str]:
+    user = next((_text(m.get("content")) for m in reversed(messages) if m.get("role") == "user"), "")
+    words = user.split() or ["نص"]
+    count = max(1, min(limit, int(len(words) * config.output_ratio)))
+    return [words[i % len(words)] for i in range(count)]
+
+
+def create_app(config: FakeLLMConfig) -> FastAPI:
+    app = FastAPI(title="Fake LLM")
+    seen_prefixes = set()
+    stats = {"requests": 0, "errors": 0, "prompt_tokens": 0, "completion_tokens": 0, "cached_tokens": 0}
+
+    def usage(messages: List[Dict], completion_tokens: int) -> Dict:
+        system = "".join(_text(m.get("content")) for m in messages if m.get("role") == "system")
+        prompt_tokens = sum(estimate_tokens(_text(m.get("content"))) for m in messages)
+        digest = hashlib.sha256(system.encode("utf-8")).hexdigest()
+        cached = estimate_tokens(system) if system and digest in seen_prefixes else 0
+        seen_prefixes.add(digest)
+        stats["prompt_tokens"] += prompt_tokens
+        stats["completion_tokens"] += completion_tokens
+        stats["cached_tokens"] += cached
+        return {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+            "prompt_tokens_details": {"cached_tokens": cached},
+            "prompt_cache_hit_tokens": cached,  # DeepSeek spelling
+        }
+
+    async def first_token_delay():
+        delay = config.latency + config.random.uniform(-config.jitter, config.jitter)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    async def token_delay():
+        if config.tokens_per_second > 0:
+            await asyncio.sleep(1.0 / config.tokens_per_second)
+
+    @app.post("/chat/completions")
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        stats["requests"] += 1
+        if config.random.random() < config.error_rate:
+            stats["errors"] += 1
+            await first_token_delay()
+            return JSONResponse(
+                status_code=config.error_status,
+                content={"error": {"message": "Injected failure", "type": "server_error", "code": config.error_status}},
+            )
+
+        messages = body.get("messages", [])
+        model = body.get("model", "fake-chat")
+        limit = body.get("max_tokens") or body.get("max_completion_tokens") or config.max_output_tokens
+        words = _reply_words(messages, config, limit)
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        created = int(time.time())
+
+        if not body.get("stream"):
+            await first_token_delay()
+            if config.tokens_per_second > 0:
+                await asyncio.sleep(len(words) / config.tokens_per_second)
+            return {
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": created,
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": " ".join(words)},
+                    "finish_reason": "stop",
+                }],
+                "usage": usage(messages, len(words)),
+            }
+
+        include_usage = (body.get("stream_options") or {}).get("include_usage", False)
+
+        def chunk(delta: Dict, finish_reason=None, **extra) -> str:
+            payload = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+                **extra,
+            }
+            return f"data: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+        async def stream() -> AsyncIterator[str]:
+            await first_token_delay()
+            yield chunk({"role": "assistant", "content": ""})
+            for i, word in enumerate(words):
+                yield chunk({"content": word if i == 0 else " " + word})
+                await token_delay()
+            yield chunk({}, finish_reason="stop")
+            if include_usage:
+                payload = {
+                    "id": completion_id,
+                    "object": "chat.completion.chunk",
+                    "created": created,
+                    "model": model,
+                    "choices": [],
+                    "usage": usage(messages, len(words)),
+                }
+                yield f"data: {json.dumps(payload)}\n\n"
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(stream(), media_type="text/event-stream")
+
+    @app.get("/user/balance")
+    async def balance():
+        """DeepSeek health probe."""
+        return {"is_available": True, "balance_infos": []}
+
+    @app.get("/v1/models")
+    @app.get("/models")
+    async def models():
+        return {"object": "list", "data": [{"id": "fake-chat", "object": "model", "owned_by": "local"}]}
+
+    @app.get("/stats")
+    async def get_stats():
+        return stats
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--latency", type=float, default=0.2, help="Seconds to first token")
+    parser.add_argument("--jitter", type=float, default=0.05, help="Uniform +/- latency noise (seconds)")
+    parser.add_argument("--tokens-per-second", type=float, default=50.0, help="Generation speed (0 = instant)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests that fail")
+    parser.add_argument("--error-status", type=int, default=500, help="HTTP status of injected failures")
+    parser.add_argument("--output-ratio", type=float, default=1.0, help="Output/input length ratio")
+    parser.add_argument("--seed", type=int, help="Seed for latency noise and error injection")
+    args = parser.parse_args()
+
+    import uvicorn
+
+    config = FakeLLMConfig(
+        latency=args.latency,
+        jitter=args.jitter,
+        tokens_per_second=args.tokens_per_second,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        output_ratio=args.output_ratio,
+        seed=args.seed,
+    )
+    uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Startup-time benchmark: legacy GML snapshot vs. SQLite node/edge snapshot.
+
+Usage (from backend/):
+    python -m benchmarks.graph_startup --terms 10000 --terms 50000
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+import networkx as nx
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from memory.graph_store import GraphStore
+
+
+def build_graph(n_terms: int) -> nx.DiGraph:
+    """Synthetic concept graph shaped like SovereignMemory's: terms -> roots, chapters -> terms."""
+    graph = nx.DiGraph()
+    n_roots = max(1, n_terms // 10)
+    n_chapters = max(1, n_terms // 200)
+    for r in range(n_roots):
+        graph.add_node(f"root_{r}", type="root")
+    for c in range(n_chapters):
+        graph.add_node(f"chapter_{c}", type="chapter", label=f"الفصل {c}")
+    for t in range(n_terms):
+        term_id = f"term_{t}"
+        graph.add_node(term_id, type="term", label=f"مصطلح {t}", english=f"term {t}")
+        graph.add_edge(term_id, f"root_{t % n_roots}", relation="derived_from")
+        graph.add_edge(f"chapter_{t % n_chapters}", term_id, relation="uses_term")
+    return graph
+
+
+def timed(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def run(n_terms: int) -> dict:
+    graph = build_graph(n_terms)
+    with tempfile.TemporaryDirectory() as tmp:
+        base = os.path.join(tmp, "concept_graph")
+        nx.write_gml(graph, base + ".gml")
+        gml_bytes = os.path.getsize(base + ".gml")
+
+        gml_load = timed(lambda: nx.read_gml(base + ".gml"))
+
+        # First SQLite open migrates the GML file
+        migrate = timed(lambda: GraphStore(base, fmt="sqlite", journal=False, flush_interval=0))
+        db_bytes = sum(os.path.getsize(p) for p in (base + ".db", base + ".db-wal") if os.path.exists(p))
+
+        store = GraphStore(base, fmt="sqlite", journal=False, flush_interval=0)
+        term_scan = timed(lambda: list(store.iter_nodes("term")))
+        full_load = timed(store.load)
+
+    return {
+        "terms": n_terms,
+        "nodes": graph.number_of_nodes(),
+        "edges": graph.number_of_edges(),
+        "gml_bytes": gml_bytes,
+        "sqlite_bytes": db_bytes,
+        "gml_load_s": round(gml_load, 4),
+        "sqlite_migrate_s": round(migrate, 4),
+        "sqlite_full_load_s": round(full_load, 4),
+        "sqlite_startup_term_scan_s": round(term_scan, 4),
+        "startup_speedup": round(gml_load / term_scan, 1) if term_scan else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--terms", type=int, action="append", help="Number of term nodes (repeatable)")
+    args = parser.parse_args()
+    for n_terms in args.terms or [1000, 10000, 50000]:
+        print(json.dumps(run(n_terms)))
+
+
+if __name__ == "__main__":
+    main()
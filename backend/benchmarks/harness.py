@@ -0,0 +1,83 @@
+"""
+Timing helpers and the JSON-lines result format shared by the benchmark suites.
+
+Every result is one JSON object:
+    {"suite", "case", "params", "runs", "min_s", "median_s", "mean_s", "p95_s",
+     "throughput", "unit", "meta": {"commit", "python", "timestamp", ...}}
+"""
+import json
+import platform
+import statistics
+import subprocess
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, Optional
+
+_META: Optional[Dict] = None
+
+
+def meta() -> Dict:
+    """Environment the numbers were taken in (commit, interpreter, machine)."""
+    global _META
+    if _META is None:
+        try:
+            commit = subprocess.run(
+                ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5
+            ).stdout.strip() or None
+        except Exception:
+            commit = None
+        _META = {
+            "commit": commit,
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        }
+    return _META
+
+
+def measure(fn: Callable, repeat: int = 5, number: int = 1, warmup: int = 1) -> Dict:
+    """Per-call latency over `repeat` samples of `number` calls each."""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        samples.append((time.perf_counter() - start) / number)
+    samples.sort()
+    return {
+        "runs": repeat * number,
+        "min_s": samples[0],
+        "median_s": statistics.median(samples),
+        "mean_s": statistics.fmean(samples),
+        "p95_s": samples[min(len(samples) - 1, round(0.95 * (len(samples) - 1)))],
+    }
+
+
+def once(fn: Callable) -> Dict:
+    """Single timed run, for setup-heavy cases (bulk loads, file writes)."""
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    return {"runs": 1, "min_s": elapsed, "median_s": elapsed, "mean_s": elapsed, "p95_s": elapsed}
+
+
+def result(suite: str, case: str, timing: Dict, params: Dict = None, work: float = None, unit: str = None, **extra) -> Dict:
+    """Build one result record; `work` units per call give `throughput` (work / median)."""
+    record = {"suite": suite, "case": case, "params": params or {}}
+    record.update({k: round(v, 6) if isinstance(v, float) else v for k, v in timing.items()})
+    if work is not None and timing["median_s"] > 0:
+        record["throughput"] = round(work / timing["median_s"], 2)
+        record["unit"] = unit
+    record.update(extra)
+    record["meta"] = meta()
+    return record
+
+
+def emit(record: Dict, stream=None):
+    line = json.dumps(record, ensure_ascii=False)
+    print(line, flush=True)
+    if stream is not None:
+        stream.write(line + "\n")
+        stream.flush()
@@ -0,0 +1,319 @@
+"""
+Micro-benchmarks for the local (non-LLM) hot paths: filters, SovereignMemory,
+concept graph persistence, DOCX extraction, ContextTracker and the local
+embedding model (settings.EMBEDDING_MODEL / EMBEDDING_MODEL_PATH, CPU).
+Results are JSON lines (see benchmarks/harness.py); compare two runs with
+`python -m benchmarks.compare`.
+
+Usage (from backend/):
+    python -m benchmarks.hot_paths                       # full suite
+    python -m benchmarks.hot_paths --quick               # small sizes only
+    python -m benchmarks.hot_paths --suite filters --suite memory --output results.jsonl
+    EMBEDDING_MODEL_PATH=/models/e5 EMBEDDING_ONNX_FILE=onnx/model_quantized.onnx python -m benchmarks.hot_paths --suite embeddings
+"""
+import argparse
+import io
+import os
+import sys
+import tempfile
+import tracemalloc
+import zlib
+from typing import Dict, Iterator, List
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.corpus import CorpusGenerator
+from benchmarks.graph_startup import build_graph
+from benchmarks.harness import emit, measure, once, result
+from filters.analysis import get_engine
+from memory.context_tracker import ContextTracker
+from memory.graph_store import GraphStore
+from processors.document_processor import DocumentProcessor
+
+FULL_SIZES = {
+    "filters": [10_000, 100_000, 1_000_000],  # characters
+    "memory": [1_000, 10_000, 100_000],  # terms
+    "graph": [1_000, 10_000, 100_000],  # terms
+    "documents": [1_000, 10_000],  # paragraphs
+    "context": [100, 1_000, 10_000],  # active terms
+    "embeddings": [100, 1_000],  # texts
+}
+QUICK_SIZES = {
+    "filters": [10_000, 100_000],
+    "memory": [1_000],
+    "graph": [1_000],
+    "documents": [500],
+    "context": [100, 1_000],
+    "embeddings": [100],
+}
+
+
+def _repeat(size: int, large: int) -> int:
+    return 3 if size >= large else 10
+
+
+# --- Filters ---
+
+def bench_filters(sizes: List[int], corpus: CorpusGenerator) -> Iterator[Dict]:
+    engine = get_engine()
+    for chars in sizes:
+        text = corpus.manuscript(chars)
+        params = {"chars": len(text)}
+        repeat = _repeat(chars, 1_000_000)
+        yield result("filters", "engine.process", measure(lambda: engine.process(text), repeat), params, len(text), "chars/s")
+        yield result("filters", "engine.correct", measure(lambda: engine.correct(text), repeat), params, len(text), "chars/s")
+        for flt in engine.filters:
+            yield result("filters", f"{flt.name}.process", measure(lambda: flt.process(text), repeat), params, len(text), "chars/s")
+            yield result("filters", f"{flt.name}.correct", measure(lambda: flt.correct(text), repeat), params, len(text), "chars/s")
+
+
+# --- SovereignMemory ---
+
+try:
+    from chromadb.api.types import EmbeddingFunction
+except ImportError:
+    EmbeddingFunction = object  # Memory suite reports itself as skipped
+
+
+class HashEmbedding(EmbeddingFunction):
+    """
+    Offline stand-in for ChromaDB's default embedder (hashed bag of words), so the
+    numbers measure storage, HNSW and the exact index rather than a model download.
+    """
+
+    DIMENSIONS = 64
+
+    def __init__(self):
+        pass
+
+    def __call__(self, input):
+        vectors = []
+        for document in input:
+            vector = [0.0] * self.DIMENSIONS
+            for token in document.split():
+                vector[zlib.crc32(token.encode("utf-8")) % self.DIMENSIONS] += 1.0
+            norm = sum(v * v for v in vector) ** 0.5 or 1.0
+            vectors.append(np.array([v / norm for v in vector], dtype=np.float32))
+        return vectors
+
+    @staticmethod
+    def name() -> str:
+        return "benchmark_hash"
+
+    def get_config(self) -> Dict:
+        return {}
+
+    @staticmethod
+    def build_from_config(config: Dict) -> "HashEmbedding":
+        return HashEmbedding()
+
+
+def bench_memory(sizes: List[int], corpus: CorpusGenerator) -> Iterator[Dict]:
+    from memory.sovereign_memory import SovereignMemory
+
+    chapter = corpus.manuscript(5_000)
+    for count in sizes:
+        terms = corpus.terms(count + 200)
+        miss = corpus.sentence(6)
+        for backend in ("chroma", "numpy"):
+            loaded, extra = terms[:count], iter(terms[count:])
+            params = {"terms": count, "backend": backend}
+            with tempfile.TemporaryDirectory() as tmp:
+                memory = SovereignMemory(path=tmp, embedding_function=HashEmbedding(), vector_backend=backend)
+                if memory.vector_backend != backend:
+                    yield {"suite": "memory", "case": "skipped", "params": params, "reason": "ChromaDB unavailable"}
+                    memory.graph_store.close()
+                    continue
+                memory.graph_store.flush_interval = 0
+
+                def bulk_load():
+                    for start in range(0, count, 5000):  # Below ChromaDB's max batch size
+                        memory.add_terms(loaded[start:start + 5000])
+                    memory.flush()
+
+                yield result("memory", "add_terms.bulk", once(bulk_load), params, count, "terms/s")
+                yield result("memory", "add_term", measure(lambda: memory.add_term(next(extra)), 20), params, 1, "ops/s")
+
+                probe = loaded[count // 2]
+                yield result("memory", "find_term.exact", measure(lambda: memory.find_term(probe.arabic_translation), 50), params, 1, "ops/s")
+                yield result("memory", "find_term.semantic", measure(lambda: memory.find_term(miss), 20), params, 1, "ops/s")
+                yield result("memory", "retrieve_context", measure(lambda: memory.retrieve_context(chapter), 5), params, len(chapter), "chars/s")
+
+                memory.graph_store.close()
+                yield result(
+                    "memory", "startup",
+                    once(lambda: SovereignMemory(path=tmp, embedding_function=HashEmbedding(), vector_backend=backend).initialize()),
+                    params, count, "terms/s",
+                )
+
+
+# --- Concept Graph ---
+
+def bench_graph(sizes: List[int]) -> Iterator[Dict]:
+    for count in sizes:
+        graph = build_graph(count)
+        params = {"terms": count, "nodes": graph.number_of_nodes(), "edges": graph.number_of_edges()}
+        for fmt in ("sqlite", "gml"):
+            with tempfile.TemporaryDirectory() as tmp:
+                base = os.path.join(tmp, "concept_graph")
+                store = GraphStore(base, fmt=fmt, journal=False, flush_interval=0)
+
+                def save():
+                    for node, attrs in graph.nodes(data=True):
+                        store.add_node(node, **attrs)
+                    for u, v, attrs in graph.edges(data=True):
+                        store.add_edge(u, v, **attrs)
+                    store.flush()
+
+                elements = params["nodes"] + params["edges"]
+                yield result("graph", f"{fmt}.save", once(save), params, elements, "elements/s")
+                store.close()
+                yield result(
+                    "graph", f"{fmt}.load",
+                    measure(lambda: GraphStore(base, fmt=fmt, journal=False, flush_interval=0).load(), 3, warmup=0),
+                    params, elements, "elements/s",
+                )
+                if fmt == "sqlite":
+                    reopened = GraphStore(base, fmt=fmt, journal=False, flush_interval=0)
+                    yield result("graph", "sqlite.term_scan", measure(lambda: list(reopened.iter_nodes("term")), 3), params, count, "terms/s")
+
+
+# --- DocumentProcessor ---
+
+def bench_documents(sizes: List[int], corpus: CorpusGenerator) -> Iterator[Dict]:
+    for paragraphs in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = corpus.docx(os.path.join(tmp, "manuscript.docx"), paragraphs)
+            with open(path, "rb") as f:
+                data = f.read()
+            params = {"paragraphs": paragraphs}
+            repeat = _repeat(paragraphs, 10_000)
+
+            timing = measure(lambda: sum(1 for _ in DocumentProcessor.iter_docx_blocks(path)), repeat)
+            yield result("documents", "iter_docx_blocks", timing, params, paragraphs, "paragraphs/s", bytes=len(data))
+
+            tracemalloc.start()
+            text = DocumentProcessor.extract_text_from_docx(data)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            yield result(
+                "documents", "extract_text_from_docx",
+                measure(lambda: DocumentProcessor.extract_text_from_docx(data), repeat),
+                params, len(data) / 1e6, "MB/s", peak_bytes=peak, chars=len(text),
+            )
+
+            from docx import Document
+            yield result(
+                "documents", "python_docx.baseline",
+                measure(lambda: Document(io.BytesIO(data)), repeat), params, paragraphs, "paragraphs/s",
+            )
+
+
+# --- ContextTracker ---
+
+def bench_context(sizes: List[int]) -> Iterator[Dict]:
+    tracker = ContextTracker()
+
+    def push_pop():
+        tracker.push_context("chapter", "bench")
+        tracker.pop_context()
+
+    yield result("context", "push_pop", measure(push_pop, 5, number=1000), {}, 1, "ops/s")
+
+    for count in sizes:
+        tracker = ContextTracker()
+        for depth, layer in enumerate(("book", "chapter", "section")):
+            tracker.push_context(layer, f"{layer}_{depth}")
+        params = {"active_terms": count, "layers": len(tracker.stack)}
+
+        def register_all():
+            for i in range(count):
+                tracker.register_term_usage(f"term_{i}")
+
+        yield result("context", "register_term_usage", once(register_all), params, count, "ops/s")
+        yield result(
+            "context", "register_term_usage.repeat",
+            measure(lambda: tracker.register_term_usage(f"term_{count - 1}"), 5, number=100), params, 1, "ops/s",
+        )
+        yield result("context", "get_active_terms", measure(tracker.get_active_terms, 5, number=10), params, 1, "ops/s")
+
+
+# --- Embeddings ---
+
+def bench_embeddings(sizes: List[int], corpus: CorpusGenerator) -> Iterator[Dict]:
+    """Embeddings/s of the configured ONNX model on CPU: per batch size, then through the cache."""
+    from config.settings import settings
+    from memory.embeddings import CachedEmbeddingFunction, EmbeddingCache, OnnxEmbeddingFunction
+
+    try:
+        model = OnnxEmbeddingFunction.from_settings()
+    except Exception as e:
+        yield {"suite": "embeddings", "case": "skipped", "params": {}, "reason": f"Embedding model unavailable: {e}"}
+        return
+    model_params = {"model": settings.EMBEDDING_MODEL_PATH or settings.EMBEDDING_MODEL, "file": settings.EMBEDDING_ONNX_FILE}
+
+    for count in sizes:
+        inputs = {
+            "terms": [f"{t.english_term} -> {t.arabic_translation}: {t.definition}" for t in corpus.terms(count)],
+            "paragraphs": [corpus.paragraph() for _ in range(count)],
+        }
+        for kind, texts in inputs.items():
+            for batch_size in sorted({1, settings.EMBEDDING_BATCH_SIZE}):
+                model.batch_size = batch_size
+                params = dict(model_params, texts=count, input=kind, batch_size=batch_size)
+                yield result("embeddings", "onnx.encode", measure(lambda: model.encode(texts), 3), params, count, "embeddings/s")
+            model.batch_size = settings.EMBEDDING_BATCH_SIZE
+
+            params = dict(model_params, texts=count, input=kind, batch_size=model.batch_size)
+            with tempfile.TemporaryDirectory() as tmp:
+                url = f"sqlite:///{os.path.join(tmp, 'embedding_cache.db')}"
+                cached = CachedEmbeddingFunction(model, EmbeddingCache(url), "benchmark")
+                yield result("embeddings", "cached.miss", once(lambda: cached(texts)), params, count, "embeddings/s")
+                yield result("embeddings", "cached.hit", measure(lambda: cached(texts), 5), params, count, "embeddings/s")
+                # Fresh process: the memory tier is empty, vectors come from SQLite
+                reopened = CachedEmbeddingFunction(model, EmbeddingCache(url), "benchmark")
+                yield result("embeddings", "cached.hit_disk", once(lambda: reopened(texts)), params, count, "embeddings/s")
+
+
+SUITES = ("filters", "memory", "graph", "documents", "context", "embeddings")
+
+
+def run(suites: List[str], sizes: Dict[str, List[int]], seed: int) -> Iterator[Dict]:
+    corpus = CorpusGenerator(seed=seed)
+    for suite in suites:
+        if suite == "filters":
+            yield from bench_filters(sizes["filters"], corpus)
+        elif suite == "memory":
+            yield from bench_memory(sizes["memory"], corpus)
+        elif suite == "graph":
+            yield from bench_graph(sizes["graph"])
+        elif suite == "documents":
+            yield from bench_documents(sizes["documents"], corpus)
+        elif suite == "context":
+            yield from bench_context(sizes["context"])
+        elif suite == "embeddings":
+            yield from bench_embeddings(sizes["embeddings"], corpus)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--suite", choices=SUITES, action="append", help="Suite to run (repeatable; default: all)")
+    parser.add_argument("--quick", action="store_true", help="Small sizes only (smoke run)")
+    parser.add_argument("--seed", type=int, default=42, help="Corpus seed")
+    parser.add_argument("--output", help="Also append results to this JSON-lines file")
+    args = parser.parse_args()
+
+    sizes = QUICK_SIZES if args.quick else FULL_SIZES
+    stream = open(args.output, "a", encoding="utf-8") if args.output else None
+    try:
+        for record in run(args.suite or list(SUITES), sizes, args.seed):
+            emit(record, stream)
+    finally:
+        if stream is not None:
+            stream.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Cold-start profile: wall time of `import main` in fresh interpreters plus the
+heaviest imports reported by `python -X importtime`.
+
+Usage (from backend/):
+    python -m benchmarks.import_profile --runs 5 --top 15
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TIMER = "import time; t = time.perf_counter(); import {module}; print(time.perf_counter() - t)"
+
+
+def cold_import(module: str) -> float:
+    output = subprocess.run(
+        [sys.executable, "-c", TIMER.format(module=module)],
+        cwd=BACKEND, capture_output=True, text=True, check=True,
+    ).stdout
+    return float(output.strip().splitlines()[-1])
+
+
+def heaviest_imports(module: str, top: int) -> list:
+    """Top-level packages by cumulative import time (microseconds -> seconds)."""
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND, capture_output=True, text=True, check=True,
+    ).stderr
+    packages = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, name = line[len("import time:"):].split("|")
+        top_level = name.strip().split(".")[0]
+        # The outermost entry of a package carries its cumulative time
+        packages[top_level] = max(packages.get(top_level, 0), int(cumulative_us))
+    ranked = sorted(packages.items(), key=lambda item: item[1], reverse=True)[:top]
+    return [{"package": name, "cumulative_s": round(us / 1e6, 4)} for name, us in ranked]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="main")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    cold_import(args.module)  # Prime the OS file cache and .pyc files
+    samples = [cold_import(args.module) for _ in range(args.runs)]
+    print(json.dumps({
+        "module": args.module,
+        "runs": args.runs,
+        "import_s_median": round(statistics.median(samples), 4),
+        "import_s_min": round(min(samples), 4),
+        "heaviest": heaviest_imports(args.module, args.top),
+    }, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
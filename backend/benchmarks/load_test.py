@@ -0,0 +1,200 @@
+"""
+Load generator for the FastAPI app: drives /chat, /chat/stream, /upload or
+/upload/stream at a fixed concurrency and reports latency percentiles,
+throughput, time to first token (streaming endpoints) and token accounting.
+
+Run the app against the local stand-in LLM so no paid provider is hit:
+    python -m benchmarks.fake_llm --port 8100 --latency 0.3 --tokens-per-second 60
+    LLM_STUB_BASE_URL=http://127.0.0.1:8100/v1 uvicorn main:app --port 8000
+
+Usage (from backend/):
+    python -m benchmarks.load_test --endpoint chat-stream --concurrency 16 --requests 200
+    python -m benchmarks.load_test --endpoint upload --paragraphs 300 --concurrency 4 --output load.json
+"""
+import argparse
+import asyncio
+import io
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+import logging
+
+import httpx
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.corpus import CorpusGenerator
+from benchmarks.harness import meta
+
+ENDPOINTS = {
+    "chat": ("/chat", False),
+    "chat-stream": ("/chat/stream", True),
+    "upload": ("/upload", False),
+    "upload-stream": ("/upload/stream", True),
+}
+TOKEN_KEYS = (
+    "input_tokens", "output_tokens", "total_tokens", "cached_input_tokens", "uncached_input_tokens",
+    "cache_hits", "cache_misses", "revised_chunks",
+)
+
+
+def percentile(samples: List[float], q: float) -> Optional[float]:
+    """Nearest-rank percentile (q in 0..100)."""
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    rank = max(1, -(-len(ordered) * q // 100))
+    return round(ordered[int(rank) - 1], 4)
+
+
+def build_payloads(endpoint: str, count: int, chars: int, paragraphs: int, seed: int, repeat: bool) -> List:
+    """Request bodies, built before the clock starts. Distinct texts unless `repeat` (cache-hit runs)."""
+    corpus = CorpusGenerator(seed=seed)
+    distinct = 1 if repeat else count
+    if endpoint.startswith("chat"):
+        texts = [corpus.manuscript(chars) for _ in range(distinct)]
+        return [texts[i % distinct] for i in range(count)]
+    documents = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for i in range(distinct):
+            path = corpus.docx(os.path.join(tmp, f"load_{i}.docx"), paragraphs)
+            with open(path, "rb") as f:
+                documents.append(f.read())
+    return [documents[i % distinct] for i in range(count)]
+
+
+async def send(client: httpx.AsyncClient, endpoint: str, payload, mode: Optional[str]) -> Dict:
+    path, streaming = ENDPOINTS[endpoint]
+    if endpoint.startswith("chat"):
+        kwargs = {"json": {"message": payload, "mode": mode}}
+    else:
+        kwargs = {
+            "files": {"file": ("load.docx", io.BytesIO(payload), "application/vnd.openxmlformats-officedocument.wordprocessingml.document")},
+            "params": {"mode": mode} if mode else None,
+        }
+
+    record = {"ok": False, "status": None, "latency_s": None, "ttft_s": None, "token_usage": {}, "error": None}
+    start = time.perf_counter()
+    try:
+        if not streaming:
+            response = await client.post(path, **kwargs)
+            record["status"] = response.status_code
+            if response.status_code == 200:
+                record["token_usage"] = response.json().get("token_usage") or {}
+                record["ok"] = True
+            else:
+                record["error"] = response.text[:200]
+        else:
+            async with client.stream("POST", path, **kwargs) as response:
+                record["status"] = response.status_code
+                event = None
+                async for line in response.aiter_lines():
+                    if line.startswith("event: "):
+                        event = line[7:]
+                    elif line.startswith("data: "):
+                        if event == "token" and record["ttft_s"] is None:
+                            record["ttft_s"] = time.perf_counter() - start
+                        elif event == "done":
+                            record["token_usage"] = json.loads(line[6:]).get("token_usage") or {}
+                            record["ok"] = True
+                        elif event == "error":
+                            record["error"] = json.loads(line[6:]).get("detail")
+                if response.status_code != 200 and record["error"] is None:
+                    record["error"] = f"HTTP {response.status_code}"
+    except httpx.HTTPError as e:
+        record["error"] = f"{type(e).__name__}: {e}"
+    record["latency_s"] = time.perf_counter() - start
+    return record
+
+
+async def run(args) -> Dict:
+    payloads = build_payloads(args.endpoint, args.requests, args.chars, args.paragraphs, args.seed, args.repeat_text)
+    records: List[Dict] = []
+    queue: asyncio.Queue = asyncio.Queue()
+    for payload in payloads:
+        queue.put_nowait(payload)
+
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.url, timeout=args.timeout, limits=limits) as client:
+        async def worker():
+            while not queue.empty():
+                payload = queue.get_nowait()
+                records.append(await send(client, args.endpoint, payload, args.mode))
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+        elapsed = time.perf_counter() - start
+
+    return summarize(args, records, elapsed)
+
+
+def summarize(args, records: List[Dict], elapsed: float) -> Dict:
+    ok = [r for r in records if r["ok"]]
+    latencies = [r["latency_s"] for r in ok]
+    ttfts = [r["ttft_s"] for r in ok if r["ttft_s"] is not None]
+    errors: Dict[str, int] = {}
+    for r in records:
+        if not r["ok"]:
+            key = "stream_error" if r["status"] == 200 else str(r["status"] or "connection")
+            errors[key] = errors.get(key, 0) + 1
+    tokens = {key: sum(r["token_usage"].get(key) or 0 for r in ok) for key in TOKEN_KEYS}
+
+    return {
+        "endpoint": args.endpoint,
+        "params": {
+            "concurrency": args.concurrency,
+            "requests": args.requests,
+            "chars": args.chars if args.endpoint.startswith("chat") else None,
+            "paragraphs": args.paragraphs if args.endpoint.startswith("upload") else None,
+            "mode": args.mode,
+            "repeat_text": args.repeat_text,
+        },
+        "completed": len(ok),
+        "errors": errors,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(len(ok) / elapsed, 3) if elapsed else None,
+        "latency_s": {
+            "p50": percentile(latencies, 50),
+            "p95": percentile(latencies, 95),
+            "p99": percentile(latencies, 99),
+            "mean": round(statistics.fmean(latencies), 4) if latencies else None,
+            "max": round(max(latencies), 4) if latencies else None,
+        },
+        "ttft_s": {"p50": percentile(ttfts, 50), "p95": percentile(ttfts, 95), "p99": percentile(ttfts, 99)},
+        "tokens": tokens,
+        "output_tokens_per_s": round(tokens["output_tokens"] / elapsed, 2) if elapsed else None,
+        "meta": meta(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://127.0.0.1:8000", help="Base URL of the running app")
+    parser.add_argument("--endpoint", choices=sorted(ENDPOINTS), default="chat")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=50, help="Total requests")
+    parser.add_argument("--chars", type=int, default=6000, help="Manuscript size for /chat endpoints")
+    parser.add_argument("--paragraphs", type=int, default=200, help="DOCX size for /upload endpoints")
+    parser.add_argument("--mode", choices=["full", "selective"], help="Rewrite mode (default: server setting)")
+    parser.add_argument("--repeat-text", action="store_true", help="Send the same text every time (cache-hit path)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--timeout", type=float, default=600.0)
+    parser.add_argument("--output", help="Also append the summary to this JSON-lines file")
+    args = parser.parse_args()
+    logging.getLogger("httpx").setLevel(logging.WARNING)  # One INFO line per request otherwise
+
+    summary = asyncio.run(run(args))
+    line = json.dumps(summary, ensure_ascii=False)
+    print(line)
+    if args.output:
+        with open(args.output, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+
+if __name__ == "__main__":
+    main()
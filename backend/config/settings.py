@@ -19,21 +19,110 @@ class Settings(BaseSettings):
     # Vector DB (ChromaDB)
     CHROMA_DB_PATH: str = "./chroma_data"
     CHROMA_COLLECTION_NAME: str = "sovereign_memory"
+    VECTOR_BACKEND: str = "chroma"  # "chroma" (HNSW) or "numpy" (exact, memory-mapped; also the fallback when ChromaDB is unavailable)
+    MEMORY_QUERY_WORKERS: int = 4  # Thread pool size for blocking ChromaDB queries
+    MEMORY_MAX_SEGMENTS: int = 512  # Segments queried per document (one batched call)
+    MEMORY_RESULTS_PER_SEGMENT: int = 3
+    MEMORY_CONTEXT_TOKEN_BUDGET: int = 1500  # Cap on retrieved context injected into prompts
+    GRAPH_FLUSH_INTERVAL_SECONDS: float = 5.0  # Write-behind period for the concept graph (0 = explicit only)
+    GRAPH_JOURNAL_ENABLED: bool = True  # Append-only change journal between snapshots
+    GRAPH_SNAPSHOT_FORMAT: str = "sqlite"  # "sqlite" (node/edge tables, lazy load) or legacy "gml"
     
     # LLM Providers (Anthropic/OpenAI/Google)
     ANTHROPIC_API_KEY: Optional[str] = None
     OPENAI_API_KEY: Optional[str] = None
     GOOGLE_API_KEY: Optional[str] = None
     DEEPSEEK_API_KEY: Optional[str] = None
+    DEEPSEEK_BASE_URL: str = "https://api.deepseek.com"
+    LLM_STUB_BASE_URL: Optional[str] = None  # e.g. "http://127.0.0.1:8100/v1" (benchmarks.fake_llm); replaces every provider
+    LLM_STUB_MODEL: str = "fake-chat"
+    
+    # Provider Registry (Health Cache + Circuit Breaker)
+    PROVIDER_HEALTH_TTL: int = 300  # Seconds a health probe result stays fresh
+    PROVIDER_FAILURE_THRESHOLD: int = 3  # Consecutive failures before the circuit opens
+    PROVIDER_COOLDOWN_SECONDS: int = 60  # Open-circuit duration before a trial request
+    PROVIDER_MAX_CONNECTIONS: int = 20  # Shared HTTP connection pool size
+    PROVIDER_TIMEOUT_SECONDS: float = 600.0
     
     # Model Config
     DEFAULT_MODEL: str = "claude-3-5-sonnet-20240620"
     EMBEDDING_MODEL: str = "intfloat/multilingual-e5-large"
     
+    # Arabization (term lookup memo + static dictionary)
+    ARABIZATION_CACHE_SIZE: int = 4096  # Memoized lookups (hits and unknown terms); cleared when terms are added
+    ARABIZATION_MAX_DISTANCE: float = 0.5  # Semantic matches farther than this (cosine distance, 0-2) count as unknown; tune per embedder (E5 models score closer)
+    ARABIZATION_DICTIONARY_PATH: Optional[str] = None  # JSON {english: arabic}; defaults to processors/data/arabization_dictionary.json
+    
+    # Local Embeddings (SovereignMemory vector store)
+    EMBEDDING_BACKEND: str = "chroma"  # "chroma" (built-in all-MiniLM-L6-v2) or "onnx" (EMBEDDING_MODEL; pip install -r requirements-onnx.txt); switching needs a fresh CHROMA_DB_PATH (vector sizes differ)
+    EMBEDDING_MODEL_PATH: Optional[str] = None  # Local directory with tokenizer.json + ONNX file; else downloaded from the Hugging Face Hub
+    EMBEDDING_ONNX_FILE: str = "onnx/model.onnx"  # Relative to the model directory; point at a quantized export (e.g. onnx/model_quantized.onnx) for faster CPU inference
+    EMBEDDING_BATCH_SIZE: int = 32
+    EMBEDDING_MAX_LENGTH: int = 512  # Tokens per input (truncated beyond)
+    EMBEDDING_THREADS: int = 0  # ONNX Runtime intra-op threads (0 = all cores)
+    EMBEDDING_QUERY_PREFIX: str = "query: "  # E5 convention
+    EMBEDDING_DOCUMENT_PREFIX: str = "passage: "
+    EMBEDDING_CACHE_ENABLED: bool = True  # Content-hash cache: each distinct string is embedded once per model
+    EMBEDDING_CACHE_URL: Optional[str] = None  # Defaults to embedding_cache.db next to the vector store
+    EMBEDDING_CACHE_MEMORY_ENTRIES: int = 10_000
+    EMBEDDING_CACHE_MAX_ENTRIES: int = 500_000  # Oldest rows are dropped beyond this
+    
     # Business Logic
     STRICTNESS_THRESHOLD: float = 0.95
     MAJESTY_THRESHOLD: float = 0.30
     
+    # Local Quality Analysis (FilterEngine)
+    ANALYSIS_PROCESS_POOL_MIN_CHARS: int = 200_000  # Below this, chunks are scored inline
+    ANALYSIS_PROCESS_WORKERS: int = 2
+    ANALYSIS_MAX_VIOLATIONS: int = 500  # Cap on violations returned in the response
+    
+    # Chunked Generation (Long Documents)
+    CHUNK_MAX_TOKENS: int = 3000  # Input token budget per LLM call
+    CHUNK_CHARS_PER_TOKEN: float = 3.0  # Heuristic used by the token estimator
+    CHUNK_CONCURRENCY: int = 4  # Max chunks in flight at once
+    PROMPT_CACHE_WARMUP: bool = True  # Run the first chunk alone so parallel chunks hit the provider's prefix cache
+    REWRITE_MODE: str = "full"  # Default mode: "full" or "selective" (only failing paragraphs go to the LLM)
+    
+    # Critique-and-Revise Loop (only chunks failing local analysis are regenerated)
+    MAX_REVISIONS: int = 0  # Revision passes per request (0 disables the loop; raise once the gate passes known-good output)
+    REVISION_LATENCY_BUDGET_SECONDS: float = 180.0  # No new pass starts if it would likely overrun this
+    
+    # Uploads (spooled to disk, then extracted as a stream)
+    UPLOAD_MAX_BYTES: int = 20 * 1024 * 1024  # Larger uploads are rejected with 413
+    UPLOAD_MAX_CHARS: int = 2_000_000  # Extracted-text cap (guards against zip bombs)
+    UPLOAD_SPOOL_DIR: Optional[str] = None  # Defaults to the system temp directory
+    
+    # Incremental Re-processing (document version store in DATABASE_URL)
+    VERSION_CONTEXT_PARAGRAPHS: int = 2  # Final paragraphs shown on each side of a regenerated span
+    
+    # Background Jobs (queue in DATABASE_URL)
+    JOB_WORKERS: int = 2  # Jobs processed concurrently by this process (0 disables the runner)
+    JOB_POLL_INTERVAL_SECONDS: float = 1.0  # Idle workers / SSE subscribers poll at this rate
+    JOB_STALE_SECONDS: float = 120.0  # A running job without a heartbeat for this long is resumed elsewhere
+    JOB_MAX_ATTEMPTS: int = 3
+    JOB_GRAPH_CHECKPOINTS: bool = True  # LangGraph node checkpoints (needs langgraph-checkpoint-sqlite)
+    
+    # Logging (queue-based: request handlers only enqueue, a listener thread formats and writes)
+    LOG_LEVEL: str = "INFO"
+    LOG_FORMAT: str = "text"  # "text" or "json" (one object per line, with request_id)
+    LOG_FILE: Optional[str] = "server.log"  # None: console only
+    LOG_ROTATION: str = "size"  # "size" (LOG_MAX_BYTES) or "time" (LOG_ROTATE_WHEN)
+    LOG_MAX_BYTES: int = 10 * 1024 * 1024
+    LOG_ROTATE_WHEN: str = "midnight"  # TimedRotatingFileHandler `when`
+    LOG_BACKUP_COUNT: int = 5
+    
+    # Startup (provider SDKs, ChromaDB and the concept graph load lazily)
+    STARTUP_WARMUP: bool = True  # Initialize them in the background right after startup instead of on first use
+    
+    # Monitoring (Prometheus /metrics; needs prometheus-client)
+    METRICS_ENABLED: bool = True
+    
+    # Manuscript Cache (LRU memory tier + SQLite disk tier in DATABASE_URL)
+    MANUSCRIPT_CACHE_ENABLED: bool = True
+    MANUSCRIPT_CACHE_MEMORY_ENTRIES: int = 256
+    MANUSCRIPT_CACHE_MAX_BYTES: int = 256 * 1024 * 1024
+    MANUSCRIPT_CACHE_TTL_SECONDS: int = 30 * 24 * 3600
+    
     class Config:
         env_file = ".env"
         case_sensitive = True
@@ -0,0 +1,88 @@
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from config.settings import settings
+from filters.filter_engine import FilterEngine
+from filters.strictness_filter import StrictnessFilter
+from filters.majesty_filter import MajestyFilter
+from filters.superiority_filter import SuperiorityFilter
+
+# One engine per process (built lazily inside pool workers)
+_engine: Optional[FilterEngine] = None
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def get_engine() -> FilterEngine:
+    global _engine
+    if _engine is None:
+        _engine = FilterEngine([StrictnessFilter(), MajestyFilter(), SuperiorityFilter()])
+    return _engine
+
+
+def analyze_chunk(text: str) -> Tuple[Dict[str, float], List[Dict], int, int]:
+    """
+    Score one chunk. Returns (scores, violations, violation_count, token_count).
+    Violations are capped at ANALYSIS_MAX_VIOLATIONS to keep pool IPC small.
+    Top-level so it pickles.
+    """
+    scores, violations = get_engine().process(text)
+    return scores, violations[:settings.ANALYSIS_MAX_VIOLATIONS], len(violations), len(text.split())
+
+
+def merge_results(chunks: List[str], results: List[Tuple], separator: str = "\n\n") -> Tuple[Dict[str, float], List[Dict], int]:
+    """
+    Combine per-chunk results into document-level output:
+    scores are token-weighted means of the chunk scores; violation positions are
+    shifted into document coordinates (character spans, or token spans for token-level
+    violations). Returns (scores, violations, total_violation_count).
+    """
+    total_tokens = sum(r[3] for r in results)
+    total_violations = sum(r[2] for r in results)
+    scores: Dict[str, float] = {}
+    violations: List[Dict] = []
+    char_offset = 0
+    token_offset = 0
+
+    for chunk, (chunk_scores, chunk_violations, _, n_tokens) in zip(chunks, results):
+        weight = n_tokens / total_tokens if total_tokens else 1.0 / len(results)
+        for key, value in chunk_scores.items():
+            scores[key] = scores.get(key, 0.0) + value * weight
+
+        for violation in chunk_violations:
+            start, end = violation.get("position", (0, 0))
+            if violation.get("type") == "weak_lexicon":
+                position = (start + token_offset, end + token_offset)
+            elif violation.get("type") == "missing_authority":
+                position = (char_offset, char_offset + len(chunk))
+            else:
+                position = (start + char_offset, end + char_offset)
+            violations.append({**violation, "position": position})
+
+        char_offset += len(chunk) + len(separator)
+        token_offset += n_tokens
+
+    if not results:
+        scores = {flt.METRIC_KEY: 1.0 for flt in get_engine().filters}
+    return {key: round(value, 4) for key, value in scores.items()}, violations[:settings.ANALYSIS_MAX_VIOLATIONS], total_violations
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=settings.ANALYSIS_PROCESS_WORKERS)
+    return _pool
+
+
+async def score_chunks(chunks: List[str]) -> List[Tuple]:
+    """
+    Run the filter engine over every chunk concurrently; one `analyze_chunk` result per chunk.
+    Small documents are scored inline (sub-millisecond, no IPC); documents above
+    ANALYSIS_PROCESS_POOL_MIN_CHARS are spread across a process pool so CPU-bound
+    scanning neither holds the GIL nor blocks the event loop.
+    """
+    if sum(len(c) for c in chunks) < settings.ANALYSIS_PROCESS_POOL_MIN_CHARS:
+        return [analyze_chunk(chunk) for chunk in chunks]
+    loop = asyncio.get_running_loop()
+    pool = _get_pool()
+    return list(await asyncio.gather(*(loop.run_in_executor(pool, analyze_chunk, c) for c in chunks)))
@@ -1,10 +1,11 @@
 from abc import ABC, abstractmethod
-from typing import Tuple, List, Dict
-import logging
+from typing import Tuple, List, Dict, Optional
+import re
 
-# Configure logging (NF-011)
-logging.basicConfig(level=logging.INFO)
-logger = logging.getLogger("SovereignFilter")
+from utils.logger_config import setup_logger
+
+# Logging (NF-011): shared queue-based pipeline, no root configuration at import time
+logger = setup_logger("SovereignFilter")
 
 class BaseFilter(ABC):
     """
@@ -12,9 +13,13 @@ class BaseFilter(ABC):
     Enforces the 'process' and 'correct' interface.
     """
     
+    # Key used for this filter in AgentState.metric_scores
+    METRIC_KEY = ""
+    
     def __init__(self, name: str):
         self.name = name
         self.logger = logger
+        self._compiled_rules = [re.compile(pattern) for pattern, _ in self.phrase_rules()]
         
     @abstractmethod
     def process(self, text: str) -> Tuple[float, List[Dict]]:
@@ -32,4 +37,32 @@ class BaseFilter(ABC):
         pass
 
     def log_process(self, score: float, violations: int):
-        self.logger.info(f"Filter: {self.name} | Score: {score:.2f} | Violations: {violations}")
+        self.logger.info("Filter: %s | Score: %.2f | Violations: %s", self.name, score, violations)
+
+    # --- Single-Pass Engine Hooks (see filters/filter_engine.py) ---
+
+    def phrase_rules(self) -> List[Tuple[str, Optional[str]]]:
+        """
+        (regex, replacement) rules this filter detects in the raw text.
+        A replacement of None marks a detect-only rule.
+        """
+        return []
+
+    def token_replacements(self) -> Dict[str, str]:
+        """Whole-token (whitespace-delimited) replacements applied by `correct()`."""
+        return {}
+
+    def find_phrases(self, text: str) -> List[Tuple[int, "re.Match"]]:
+        """Standalone scan: one precompiled regex per rule. Returns (rule_index, match)."""
+        hits = []
+        for index, pattern in enumerate(self._compiled_rules):
+            hits.extend((index, match) for match in pattern.finditer(text))
+        return hits
+
+    @abstractmethod
+    def score(self, text: str, phrase_hits: List[Tuple[int, "re.Match"]], tokens: List[str]) -> Tuple[float, List[Dict]]:
+        """
+        Score pre-computed hits. Shared by `process()` and the single-pass FilterEngine,
+        so both paths produce identical results.
+        """
+        pass
@@ -0,0 +1,113 @@
+import re
+from typing import Dict, List, Tuple
+
+from filters.base_filter import BaseFilter, logger
+
+REGEX_METACHARS = set(".^$*+?{}[]\\|()")
+
+
+def _is_literal(pattern: str) -> bool:
+    return not any(c in REGEX_METACHARS for c in pattern)
+
+
+class FilterEngine:
+    """
+    Single-pass scanner for a set of filters.
+    Every filter's phrase rules are compiled into one alternation, so the document is
+    scanned once for all patterns and split into tokens once; each hit is then
+    dispatched to the owning filter's `score()`. `correct()` likewise applies all
+    phrase replacements in one `sub` pass and all token replacements in a second.
+
+    When every rule is a literal phrase (the shipped rule sets are), the alternation
+    carries no groups and hits are dispatched by their matched text: that keeps the
+    regex engine's fast literal-prefix scan, which named groups would defeat.
+    Alternatives are ordered longest-first; where two rules match at the same position
+    the longer one wins (the per-filter `process()` would count both).
+    """
+
+    def __init__(self, filters: List[BaseFilter]):
+        self.filters = filters
+        rules = []  # (pattern, replacement, f_index, r_index)
+        self._token_replacements: Dict[str, str] = {}
+        for f_index, flt in enumerate(filters):
+            for r_index, (pattern, replacement) in enumerate(flt.phrase_rules()):
+                rules.append((pattern, replacement, f_index, r_index))
+            self._token_replacements.update(flt.token_replacements())
+        rules.sort(key=lambda rule: len(rule[0]), reverse=True)
+
+        self.literal = all(_is_literal(rule[0]) for rule in rules)
+        self._by_literal: Dict[str, List[Tuple[int, int]]] = {}
+        self._groups: Dict[str, Tuple[int, int]] = {}
+        self._replacements: Dict[str, str] = {}
+
+        if self.literal:
+            for pattern, replacement, f_index, r_index in rules:
+                self._by_literal.setdefault(pattern, []).append((f_index, r_index))
+                if replacement is not None:
+                    self._replacements.setdefault(pattern, replacement)
+            self._combined = self._alternation([rule[0] for rule in rules])
+            self._correctable = self._alternation([rule[0] for rule in rules if rule[1] is not None])
+        else:
+            for pattern, replacement, f_index, r_index in rules:
+                group = f"f{f_index}_{r_index}"
+                self._groups[group] = (f_index, r_index)
+                if replacement is not None:
+                    self._replacements[group] = replacement
+            self._combined = self._alternation([f"(?P<f{r[2]}_{r[3]}>{r[0]})" for r in rules])
+            self._correctable = self._alternation(
+                [f"(?P<f{r[2]}_{r[3]}>{r[0]})" for r in rules if r[1] is not None]
+            )
+
+        # Whole-token replacements: whitespace-bounded alternation, so only hits reach Python
+        words = sorted(self._token_replacements, key=len, reverse=True)
+        self._token_pattern = (
+            re.compile(r"(?<!\S)(?:" + "|".join(re.escape(w) for w in words) + r")(?!\S)")
+            if words else None
+        )
+
+    @staticmethod
+    def _alternation(patterns: List[str]):
+        return re.compile("|".join(patterns)) if patterns else None
+
+    def _owners(self, match: "re.Match") -> List[Tuple[int, int]]:
+        if self.literal:
+            return self._by_literal[match.group()]
+        return [self._groups[match.lastgroup]]
+
+    def scan(self, text: str) -> Dict[str, Tuple[float, List[Dict]]]:
+        """Run every filter over `text` in one pass. Returns {filter.name: (score, violations)}."""
+        hits: List[List[Tuple[int, "re.Match"]]] = [[] for _ in self.filters]
+        if self._combined is not None:
+            for match in self._combined.finditer(text):
+                for f_index, r_index in self._owners(match):
+                    hits[f_index].append((r_index, match))
+
+        tokens = text.split()
+        return {
+            flt.name: flt.score(text, hits[f_index], tokens)
+            for f_index, flt in enumerate(self.filters)
+        }
+
+    def process(self, text: str) -> Tuple[Dict[str, float], List[Dict]]:
+        """
+        Scores keyed by each filter's METRIC_KEY, plus all violations tagged
+        with the filter that raised them.
+        """
+        scores = {}
+        violations = []
+        results = self.scan(text)
+        for flt in self.filters:
+            score, found = results[flt.name]
+            scores[flt.METRIC_KEY or flt.name] = score
+            violations.extend({**v, "filter": flt.name} for v in found)
+        logger.debug("FilterEngine | Scores: %s | Violations: %s", scores, len(violations))
+        return scores, violations
+
+    def correct(self, text: str) -> str:
+        """Apply every deterministic fix: one pass for phrases, one for whole tokens."""
+        if self._correctable is not None:
+            key = (lambda m: m.group()) if self.literal else (lambda m: m.lastgroup)
+            text = self._correctable.sub(lambda m: self._replacements[key(m)], text)
+        if self._token_pattern is not None:
+            text = self._token_pattern.sub(lambda m: self._token_replacements[m.group()], text)
+        return text
@@ -1,7 +1,11 @@
+import re
+from collections import Counter
 from typing import List, Dict, Tuple
 from filters.base_filter import BaseFilter
 from config.settings import settings
 
+TOKEN_PATTERN = re.compile(r"\S+")
+
 class MajestyFilter(BaseFilter):
     """
     RF-011: Majesty and Solemnity Filter.
@@ -25,17 +29,26 @@ class MajestyFilter(BaseFilter):
         "سريع": "خاطف"
     }
 
+    METRIC_KEY = "majesty"
+
     def __init__(self):
         super().__init__("MajestyFilter")
 
+    def token_replacements(self) -> Dict[str, str]:
+        return self.WEAK_TERMS_REPLACEMENT
+
     def process(self, text: str) -> Tuple[float, List[Dict]]:
+        return self.score(text, [], text.split())
+
+    def score(self, text: str, phrase_hits: List[Tuple[int, "re.Match"]], tokens: List[str]) -> Tuple[float, List[Dict]]:
         violations = []
-        words = text.split()
-        total_words = len(words)
+        total_words = len(tokens)
         if total_words == 0:
             return 1.0, []
 
-        majestic_count = sum(1 for w in words if w in self.MAJESTIC_TERMS)
+        # Counter runs in C; only the (few) lexicon entries are looked up in Python
+        counts = Counter(tokens)
+        majestic_count = sum(counts[w] for w in self.MAJESTIC_TERMS)
         density = majestic_count / total_words
 
         # Threshold from Settings (Default 0.3)
@@ -43,8 +56,10 @@ class MajestyFilter(BaseFilter):
         
         score = min(1.0, density / threshold) # 1.0 if density >= threshold
         
-        # Check for weak words
-        for i, word in enumerate(words):
+        # Check for weak words (positions need one more pass, only when any are present)
+        if not any(counts[w] for w in self.WEAK_TERMS_REPLACEMENT):
+            return score, violations
+        for i, word in enumerate(tokens):
             if word in self.WEAK_TERMS_REPLACEMENT:
                  violations.append({
                     "type": "weak_lexicon",
@@ -56,11 +71,7 @@ class MajestyFilter(BaseFilter):
         return score, violations
 
     def correct(self, text: str) -> str:
-        words = text.split()
-        corrected_words = []
-        for word in words:
-            if word in self.WEAK_TERMS_REPLACEMENT:
-                corrected_words.append(self.WEAK_TERMS_REPLACEMENT[word])
-            else:
-                corrected_words.append(word)
-        return " ".join(corrected_words)
+        # Replace whole tokens in place so paragraph breaks and spacing survive
+        return TOKEN_PATTERN.sub(
+            lambda m: self.WEAK_TERMS_REPLACEMENT.get(m.group(), m.group()), text
+        )
@@ -1,5 +1,5 @@
 import re
-from typing import List, Dict, Tuple
+from typing import List, Dict, Tuple, Optional
 from filters.base_filter import BaseFilter
 
 class StrictnessFilter(BaseFilter):
@@ -19,23 +19,29 @@ class StrictnessFilter(BaseFilter):
         (r"نرى أن", "الواقع يفرض"),
     ]
     
+    METRIC_KEY = "strictness"
+    
     def __init__(self):
         super().__init__("StrictnessFilter")
 
+    def phrase_rules(self) -> List[Tuple[str, Optional[str]]]:
+        return self.FORBIDDEN_PATTERNS
+
     def process(self, text: str) -> Tuple[float, List[Dict]]:
+        return self.score(text, self.find_phrases(text), [])
+
+    def score(self, text: str, phrase_hits: List[Tuple[int, "re.Match"]], tokens: List[str]) -> Tuple[float, List[Dict]]:
         violations = []
         score = 1.0
         
-        for weak, strong in self.FORBIDDEN_PATTERNS:
-            matches = re.finditer(weak, text)
-            for match in matches:
-                score -= 0.05 # Deduct points for each violation
-                violations.append({
-                    "type": "weak_language",
-                    "text": match.group(),
-                    "suggestion": strong,
-                    "position": match.span()
-                })
+        for index, match in phrase_hits:
+            score -= 0.05 # Deduct points for each violation
+            violations.append({
+                "type": "weak_language",
+                "text": match.group(),
+                "suggestion": self.FORBIDDEN_PATTERNS[index][1],
+                "position": match.span()
+            })
         
         # Ensure score is between 0 and 1
         return max(0.0, score), violations
@@ -45,6 +51,6 @@ class StrictnessFilter(BaseFilter):
         Auto-correction mechanism (Deterministic)
         """
         corrected_text = text
-        for weak, strong in self.FORBIDDEN_PATTERNS:
-            corrected_text = re.sub(weak, strong, corrected_text)
+        for pattern, (_, strong) in zip(self._compiled_rules, self.FORBIDDEN_PATTERNS):
+            corrected_text = pattern.sub(strong, corrected_text)
         return corrected_text
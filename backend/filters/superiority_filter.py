@@ -1,4 +1,4 @@
-from typing import List, Dict, Tuple
+from typing import List, Dict, Tuple, Optional
 from filters.base_filter import BaseFilter
 import re
 
@@ -22,28 +22,38 @@ class SuperiorityFilter(BaseFilter):
         r"استراتيجياً",
     ]
 
+    METRIC_KEY = "superiority"
+
     def __init__(self):
         super().__init__("SuperiorityFilter")
 
+    def phrase_rules(self) -> List[Tuple[str, Optional[str]]]:
+        # Required phrases are detect-only rules after the forbidden tones
+        return self.FORBIDDEN_TONES + [(phrase, None) for phrase in self.REQUIRED_PHRASES]
+
     def process(self, text: str) -> Tuple[float, List[Dict]]:
+        return self.score(text, self.find_phrases(text), text.split())
+
+    def score(self, text: str, phrase_hits: List[Tuple[int, "re.Match"]], tokens: List[str]) -> Tuple[float, List[Dict]]:
         violations = []
         score = 1.0
+        n_forbidden = len(self.FORBIDDEN_TONES)
         
         # Check Forbidden Tones (Apologetic/Submissive)
-        for weak, strong in self.FORBIDDEN_TONES:
-            matches = re.finditer(weak, text)
-            for match in matches:
-                score -= 0.1
-                violations.append({
-                    "type": "submissive_tone",
-                    "text": match.group(),
-                    "suggestion": strong,
-                    "position": match.span()
-                })
+        for index, match in phrase_hits:
+            if index >= n_forbidden:
+                continue
+            score -= 0.1
+            violations.append({
+                "type": "submissive_tone",
+                "text": match.group(),
+                "suggestion": self.FORBIDDEN_TONES[index][1],
+                "position": match.span()
+            })
         
         # Check Required Authority Markers
-        found_authority = any(re.search(phrase, text) for phrase in self.REQUIRED_PHRASES)
-        if not found_authority and len(text.split()) > 50: # Only penalize longer texts
+        found_authority = any(index >= n_forbidden for index, _ in phrase_hits)
+        if not found_authority and len(tokens) > 50: # Only penalize longer texts
             score -= 0.1
             violations.append({
                 "type": "missing_authority",
@@ -56,6 +66,6 @@ class SuperiorityFilter(BaseFilter):
 
     def correct(self, text: str) -> str:
         corrected_text = text
-        for weak, strong in self.FORBIDDEN_TONES:
-            corrected_text = re.sub(weak, strong, corrected_text)
+        for pattern, (_, strong) in zip(self._compiled_rules, self.FORBIDDEN_TONES):
+            corrected_text = pattern.sub(strong, corrected_text)
         return corrected_text
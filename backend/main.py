@@ -1,12 +1,65 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
+from typing import AsyncIterator, Dict, Literal, Optional
+from contextlib import asynccontextmanager
+import asyncio
+import json
+import time
 from agent.graph import app_graph
-from utils.logger_config import setup_logger
+from agent.providers import provider_registry
+from agent.jobs import job_runner
+from api.schemas import JobInfo, JobStatus
+from memory.job_store import job_store
+from memory.manuscript_cache import manuscript_cache
+from memory.sovereign_memory import sovereign_memory
+from memory.version_store import version_store
+from monitoring.metrics import MetricsMiddleware, metrics_payload
+from config.settings import settings
+from utils.logger_config import RequestIdMiddleware, setup_logger
 
 logger = setup_logger("main")
 
-app = FastAPI(title="The Linguistic Engineer Agent", version="2.0.0")
+# --- Startup ---
+# Importing this module stays cheap: provider SDKs are imported when a provider first
+# builds its client, and ChromaDB / the concept graph / the SQLite stores open on first
+# use. The warm-up does all of it in the background so the first request does not pay
+# for them, while health endpoints answer as soon as the server is up.
+
+warmup_state = {"status": "disabled" if not settings.STARTUP_WARMUP else "pending", "seconds": None}
+
+async def warm_up():
+    warmup_state["status"] = "running"
+    started = time.perf_counter()
+    try:
+        await asyncio.to_thread(sovereign_memory.initialize)
+        for store in (job_store, manuscript_cache, version_store):
+            await asyncio.to_thread(store.open)
+        await provider_registry.refresh()
+        provider = provider_registry.select()
+        await asyncio.to_thread(lambda: provider.client)  # Imports the provider SDK
+        warmup_state["status"] = "done"
+        logger.info("Warm-up finished in %.2fs (memory + %s).", time.perf_counter() - started, provider.label)
+    except Exception as e:
+        warmup_state["status"] = "failed"
+        logger.warning("Warm-up failed (resources will initialize on first use): %s", e)
+    warmup_state["seconds"] = round(time.perf_counter() - started, 3)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    warmup = asyncio.create_task(warm_up()) if settings.STARTUP_WARMUP else None
+    await job_runner.start()
+    yield
+    if warmup is not None:
+        warmup.cancel()
+    await job_runner.stop()
+
+app = FastAPI(title="The Linguistic Engineer Agent", version="2.0.0", lifespan=lifespan)
+
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware, routes=app.router.routes)
+app.add_middleware(RequestIdMiddleware)
 
 app.add_middleware(
     CORSMiddleware,
@@ -16,16 +69,19 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+RewriteMode = Literal["full", "selective"]
+
 class ChatRequest(BaseModel):
     message: str
+    mode: Optional[RewriteMode] = None  # Defaults to settings.REWRITE_MODE
+    document_id: Optional[str] = None  # Re-send edited versions under the same id to reprocess only changes
 
-@app.post("/chat")
-async def chat(request: ChatRequest):
-    logger.info(f"Received chat request. Input length: {len(request.message)}")
-    # Initial state
-    initial_state = {
-        "input_text": request.message,
-        "current_text": request.message,
+def build_initial_state(text: str, mode: Optional[str] = None, document_id: Optional[str] = None) -> Dict:
+    return {
+        "input_text": text,
+        "rewrite_mode": mode or settings.REWRITE_MODE,
+        "document_id": document_id,
+        "current_text": text,
         "manuscript": "",
         "editor_notes": [],
         "revision_count": 0,
@@ -35,6 +91,51 @@ async def chat(request: ChatRequest):
         "violations": [],
         "metric_scores": {}
     }
+
+# --- Server-Sent Events (Streaming) ---
+
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "X-Accel-Buffering": "no",  # Disable proxy buffering so tokens flush immediately
+}
+
+def format_sse(event: str, data: Dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+async def stream_graph_events(initial_state: Dict, include_original: bool = False) -> AsyncIterator[str]:
+    """
+    Run the agent graph and relay its custom stream (tokens + per-node progress)
+    as SSE. The final `done` event carries the same payload as the blocking endpoints.
+    """
+    result = initial_state
+    try:
+        logger.info("Streaming agent graph...")
+        async for mode, payload in app_graph.astream(initial_state, stream_mode=["custom", "values"]):
+            if mode == "custom":
+                yield format_sse(payload.get("event", "progress"), payload)
+            else:
+                result = payload
+        logger.info("Agent graph stream completed successfully.")
+
+        final = {
+            "manuscript": result.get("manuscript"),
+            "editor_notes": result.get("editor_notes"),
+            "metric_scores": result.get("metric_scores", {}),
+            "violations": result.get("violations", []),
+            "token_usage": result.get("token_usage", {}),
+            "status": "completed"
+        }
+        if include_original:
+            final["original_text"] = result.get("input_text")
+        yield format_sse("done", final)
+    except Exception as e:
+        logger.error("Error during streamed processing: %s", e, exc_info=True)
+        yield format_sse("error", {"status": "failed", "detail": str(e)})
+
+@app.post("/chat")
+async def chat(request: ChatRequest):
+    logger.info("Received chat request. Input length: %s", len(request.message))
+    initial_state = build_initial_state(request.message, request.mode, request.document_id)
     
     try:
         # Run the graph
@@ -51,40 +152,109 @@ async def chat(request: ChatRequest):
             "status": "completed"
         }
     except Exception as e:
-        logger.error(f"Error during chat processing: {str(e)}", exc_info=True)
+        logger.error("Error during chat processing: %s", e, exc_info=True)
         raise e
 
+@app.post("/chat/stream")
+async def chat_stream(request: ChatRequest):
+    logger.info("Received streaming chat request. Input length: %s", len(request.message))
+    return StreamingResponse(
+        stream_graph_events(build_initial_state(request.message, request.mode, request.document_id)),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS
+    )
+
 from fastapi import File, UploadFile, HTTPException
-from processors.document_processor import DocumentProcessor
+from starlette.background import BackgroundTask
+from processors.document_processor import DocumentError, DocumentProcessor
+import os
+import tempfile
 
-@app.post("/upload")
-async def upload_document(file: UploadFile = File(...)):
-    logger.info(f"Received file upload: {file.filename}")
+UPLOAD_READ_BYTES = 1024 * 1024
+
+async def spool_upload(file: UploadFile) -> str:
+    """
+    Copy the upload to a temporary file in bounded reads, rejecting it (413) as soon
+    as it exceeds UPLOAD_MAX_BYTES. The caller owns (and must remove) the file.
+    """
     if not file.filename.endswith(".docx"):
         logger.warning("Invalid file type uploaded.")
         raise HTTPException(status_code=400, detail="Only .docx files are supported")
-    
-    content = await file.read()
-    extracted_text = DocumentProcessor.extract_text_from_docx(content)
-    logger.info(f"Extracted {len(extracted_text)} characters from document.")
-    
+    if file.size is not None and file.size > settings.UPLOAD_MAX_BYTES:
+        raise HTTPException(status_code=413, detail=f"File exceeds {settings.UPLOAD_MAX_BYTES} bytes")
+
+    fd, path = tempfile.mkstemp(suffix=".docx", dir=settings.UPLOAD_SPOOL_DIR)
+    size = 0
+    try:
+        with os.fdopen(fd, "wb") as spool:
+            while data := await file.read(UPLOAD_READ_BYTES):
+                size += len(data)
+                if size > settings.UPLOAD_MAX_BYTES:
+                    raise HTTPException(status_code=413, detail=f"File exceeds {settings.UPLOAD_MAX_BYTES} bytes")
+                spool.write(data)
+    except BaseException:
+        os.remove(path)
+        raise
+    logger.info("Spooled %s bytes to %s.", size, path)
+    return path
+
+async def extract_upload_text(path: str) -> str:
+    """Extract the whole document (off the event loop). Raises 400 for unreadable or empty documents."""
+    try:
+        extracted_text = "\n\n".join([block async for block in DocumentProcessor.stream_docx_blocks(path)])
+    except DocumentError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     if not extracted_text:
         raise HTTPException(status_code=400, detail="Could not extract text from document")
+    logger.info("Extracted %s characters from document.", len(extracted_text))
+    return extracted_text
 
-    # Run the graph on the extracted text
-    initial_state = {
-        "input_text": extracted_text,
-        "current_text": extracted_text,
-        "manuscript": "",
-        "editor_notes": [],
-        "revision_count": 0,
-        "status": "processing",
-        "memory_context": [],
-        "violations": [],
-        "metric_scores": {}
-    }
-    
+async def build_upload_state(path: str, mode: Optional[str], document_id: Optional[str] = None) -> Dict:
+    """
+    Full mode: hand the graph a live block feed so extraction overlaps generation.
+    Selective mode (triage) and versioned documents (diffing) need the whole text
+    up front, so it is collected first.
+    Raises 400 for unreadable or empty documents.
+    """
+    if document_id or (mode or settings.REWRITE_MODE) == "selective":
+        return build_initial_state(await extract_upload_text(path), mode, document_id)
+
+    blocks = DocumentProcessor.stream_docx_blocks(path)
+    try:
+        first = await blocks.__anext__()
+    except StopAsyncIteration:
+        raise HTTPException(status_code=400, detail="Could not extract text from document")
+    except DocumentError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    async def feed():
+        try:
+            yield first
+            async for block in blocks:
+                yield block
+        finally:
+            await blocks.aclose()  # Stops the extraction thread if generation fails early
+
+    state = build_initial_state("", mode)
+    state["block_feed"] = feed()
+    return state
+
+def remove_spool(path: str):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+@app.post("/upload")
+async def upload_document(
+    file: UploadFile = File(...), mode: Optional[RewriteMode] = None, document_id: Optional[str] = None
+):
+    logger.info("Received file upload: %s", file.filename)
+    path = await spool_upload(file)
     try:
+        initial_state = await build_upload_state(path, mode, document_id)
+
+        # Run the graph on the extracted text
         logger.info("Invoking agent graph for document...")
         result = await app_graph.ainvoke(initial_state)
         logger.info("Agent graph execution for document completed.")
@@ -96,12 +266,124 @@ async def upload_document(file: UploadFile = File(...)):
             "violations": result.get("violations", []),
             "token_usage": result.get("token_usage", {}),
             "status": "completed",
-            "original_text": extracted_text
+            "original_text": result.get("input_text")
         }
+    except HTTPException:
+        raise
+    except DocumentError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
-        logger.error(f"Error during document processing: {str(e)}", exc_info=True)
+        logger.error("Error during document processing: %s", e, exc_info=True)
         raise e
+    finally:
+        remove_spool(path)
+
+@app.post("/upload/stream")
+async def upload_document_stream(
+    file: UploadFile = File(...), mode: Optional[RewriteMode] = None, document_id: Optional[str] = None
+):
+    logger.info("Received streaming file upload: %s", file.filename)
+    path = await spool_upload(file)
+    try:
+        initial_state = await build_upload_state(path, mode, document_id)
+    except BaseException:
+        remove_spool(path)
+        raise
+
+    return StreamingResponse(
+        stream_graph_events(initial_state, include_original=True),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS,
+        background=BackgroundTask(remove_spool, path)
+    )
+
+# --- Background Jobs ---
+# Submit, then poll /jobs/{id} (or subscribe to /jobs/{id}/events) and fetch /jobs/{id}/result.
+# Jobs survive restarts: they are queued in DATABASE_URL and resume from their checkpoints.
+
+async def submit_job(state: Dict, include_original: bool = False) -> Dict:
+    job_id = await job_store.asubmit({"state": state, "include_original": include_original})
+    job_runner.notify()
+    logger.info("Queued job %s.", job_id)
+    return {"job_id": job_id, "status": JobStatus.QUEUED}
+
+async def get_job_or_404(job_id: str) -> Dict:
+    job = await job_store.aget(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+def job_info(job: Dict) -> JobInfo:
+    return JobInfo(**{key: job[key] for key in JobInfo.model_fields})
+
+@app.post("/jobs")
+async def create_job(request: ChatRequest):
+    logger.info("Received job request. Input length: %s", len(request.message))
+    return await submit_job(build_initial_state(request.message, request.mode, request.document_id))
+
+@app.post("/jobs/upload")
+async def create_upload_job(
+    file: UploadFile = File(...), mode: Optional[RewriteMode] = None, document_id: Optional[str] = None
+):
+    logger.info("Received job upload: %s", file.filename)
+    path = await spool_upload(file)
+    try:
+        extracted_text = await extract_upload_text(path)
+    finally:
+        remove_spool(path)
+    return await submit_job(build_initial_state(extracted_text, mode, document_id), include_original=True)
+
+@app.get("/jobs/{job_id}", response_model=JobInfo)
+async def get_job(job_id: str):
+    return job_info(await get_job_or_404(job_id))
+
+@app.get("/jobs/{job_id}/result")
+async def get_job_result(job_id: str):
+    job = await get_job_or_404(job_id)
+    if job["status"] != JobStatus.COMPLETED:
+        raise HTTPException(status_code=409, detail={"status": job["status"], "error": job["error"]})
+    return job["result"]
+
+async def job_events(job_id: str) -> AsyncIterator[str]:
+    """Relay status/progress changes as SSE until the job finishes (works from any process)."""
+    last = None
+    while True:
+        job = await job_store.aget(job_id)
+        info = job_info(job).model_dump(mode="json")
+        current = (info["status"], json.dumps(info["progress"], sort_keys=True))
+        if current != last:
+            last = current
+            yield format_sse("status", info)
+        if job["status"] == JobStatus.COMPLETED:
+            yield format_sse("done", job["result"])
+            return
+        if job["status"] == JobStatus.FAILED:
+            yield format_sse("error", {"status": "failed", "detail": job["error"]})
+            return
+        await asyncio.sleep(settings.JOB_POLL_INTERVAL_SECONDS)
+
+@app.get("/jobs/{job_id}/events")
+async def subscribe_job(job_id: str):
+    await get_job_or_404(job_id)
+    return StreamingResponse(job_events(job_id), media_type="text/event-stream", headers=SSE_HEADERS)
 
 @app.get("/")
 async def root():
     return {"message": "The Linguistic Engineer is Online", "status": "sovereign", "version": "v2"}
+
+@app.get("/health")
+async def health():
+    """Liveness plus warm-up progress; never waits on the warm-up."""
+    return {"status": "ok", "warmup": warmup_state}
+
+@app.get("/health/providers")
+async def provider_health():
+    return provider_registry.status()
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    payload = metrics_payload()
+    if payload is None:
+        raise HTTPException(status_code=404, detail="Metrics are disabled (METRICS_ENABLED or prometheus-client missing)")
+    body, content_type = payload
+    return Response(content=body, media_type=content_type)
@@ -0,0 +1,365 @@
+import hashlib
+import os
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from config.settings import settings
+from monitoring.metrics import record_cache
+from utils.logger_config import setup_logger
+from utils.sqlite import connect
+
+try:
+    from chromadb.api.types import EmbeddingFunction
+    from chromadb.utils.embedding_functions.onnx_mini_lm_l6_v2 import ONNXMiniLM_L6_V2
+except ImportError:
+    EmbeddingFunction = object
+    ONNXMiniLM_L6_V2 = None  # Reported by SovereignMemory, which falls back to the NumPy index
+
+logger = setup_logger("embeddings")
+
+SQLITE_MAX_VARIABLES = 500  # Keys per SELECT ... IN (...)
+
+
+def content_key(model_id: str, kind: str, text: str) -> str:
+    """Content address of one embedding: sha256 over the model, the input kind and the text."""
+    return hashlib.sha256(f"{model_id}\0{kind}\0{text}".encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    Two-tier embedding cache, keyed by `content_key`:
+    1. In-process LRU (OrderedDict) for hot terms and queries.
+    2. Persistent SQLite table of float32 vectors; the oldest rows go first past the cap.
+    """
+
+    def __init__(self, url: str, max_memory_entries: int = None, max_entries: int = None):
+        self.max_memory_entries = settings.EMBEDDING_CACHE_MEMORY_ENTRIES if max_memory_entries is None else max_memory_entries
+        self.max_entries = settings.EMBEDDING_CACHE_MAX_ENTRIES if max_entries is None else max_entries
+        self._memory: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = None
+        try:
+            self._conn = connect(url)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS embedding_cache (key TEXT PRIMARY KEY, vector BLOB NOT NULL)"
+            )
+            self._conn.commit()
+        except Exception as e:
+            logger.warning("Embedding cache disk tier disabled: %s", e)
+            self._conn = None
+
+    def _remember(self, key: str, vector: np.ndarray):
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, np.ndarray]:
+        found: Dict[str, np.ndarray] = {}
+        with self._lock:
+            cold = []
+            for key in keys:
+                if key in self._memory:
+                    self._memory.move_to_end(key)
+                    found[key] = self._memory[key]
+                else:
+                    cold.append(key)
+            if not cold or self._conn is None:
+                return found
+
+            for start in range(0, len(cold), SQLITE_MAX_VARIABLES):
+                batch = cold[start:start + SQLITE_MAX_VARIABLES]
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embedding_cache WHERE key IN ({','.join('?' * len(batch))})", batch
+                ).fetchall()
+                for key, blob in rows:
+                    vector = np.frombuffer(blob, dtype=np.float32)
+                    found[key] = vector
+                    self._remember(key, vector)
+        return found
+
+    def put_many(self, vectors: Dict[str, np.ndarray]):
+        if not vectors:
+            return
+        with self._lock:
+            for key, vector in vectors.items():
+                self._remember(key, vector)
+            if self._conn is None:
+                return
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embedding_cache (key, vector) VALUES (?, ?)",
+                [(key, np.asarray(vector, dtype=np.float32).tobytes()) for key, vector in vectors.items()],
+            )
+            self._conn.execute(
+                "DELETE FROM embedding_cache WHERE rowid <= (SELECT MAX(rowid) FROM embedding_cache) - ?",
+                (self.max_entries,),
+            )
+            self._conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM embedding_cache")
+                self._conn.commit()
+
+
+class CachedEmbeddingFunction(EmbeddingFunction):
+    """
+    Wraps an embedding function so each distinct string is embedded once per model:
+    cached vectors are served from EmbeddingCache, duplicates within a call are
+    collapsed, and only the misses reach the model (as one batch). Reports the
+    wrapped function's name and config, so Chroma sees the same embedding space.
+    """
+
+    def __init__(self, inner, cache: EmbeddingCache, model_id: str):
+        self.inner = inner
+        self.cache = cache
+        self.model_id = model_id
+        # Models without a separate query encoding share one cache entry per string
+        self._distinct_queries = getattr(type(inner), "embed_query", None) not in (None, getattr(EmbeddingFunction, "embed_query", None))
+
+    def __call__(self, input):
+        return self._embed(list(input), query=False)
+
+    def embed_query(self, input):
+        return self._embed(list(input), query=True)
+
+    def _embed(self, texts: List[str], query: bool) -> List[np.ndarray]:
+        kind = "query" if query and self._distinct_queries else "document"
+        keys = [content_key(self.model_id, kind, text) for text in texts]
+        found = self.cache.get_many(set(keys))
+
+        missing: Dict[str, str] = {}
+        for key, text in zip(keys, texts):
+            if key not in found:
+                missing.setdefault(key, text)
+        record_cache("embedding", hit=True, count=len(texts) - len(missing))
+        record_cache("embedding", hit=False, count=len(missing))
+
+        if missing:
+            embed = getattr(self.inner, "embed_query", self.inner) if query else self.inner
+            fresh = {
+                key: np.asarray(vector, dtype=np.float32)
+                for key, vector in zip(missing, embed(list(missing.values())))
+            }
+            self.cache.put_many(fresh)
+            found.update(fresh)
+        return [found[key] for key in keys]
+
+    def name(self) -> str:
+        return self.inner.name()
+
+    def get_config(self) -> Dict:
+        return self.inner.get_config()
+
+    def default_space(self):
+        return self.inner.default_space()
+
+    def supported_spaces(self):
+        return self.inner.supported_spaces()
+
+
+class OnnxEmbeddingFunction(EmbeddingFunction):
+    """
+    Sentence embeddings from a local ONNX export (fp32 or quantized) on CPU.
+    Inputs are sorted by length and batched to keep padding small, then
+    mean-pooled over the attention mask and L2-normalised (E5 / MiniLM style).
+    """
+
+    def __init__(
+        self,
+        model_path: str,
+        model_file: str = "onnx/model.onnx",
+        batch_size: int = 32,
+        max_length: int = 512,
+        threads: int = 0,
+        query_prefix: str = "",
+        document_prefix: str = "",
+    ):
+        import onnxruntime
+        from tokenizers import Tokenizer
+
+        self.model_path = model_path
+        self.model_file = model_file
+        self.batch_size = batch_size
+        self.max_length = max_length
+        self.threads = threads
+        self.query_prefix = query_prefix
+        self.document_prefix = document_prefix
+
+        options = onnxruntime.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = onnxruntime.InferenceSession(
+            os.path.join(model_path, model_file), options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_path, "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length)
+        self.tokenizer.no_padding()  # Padded per batch, to the longest input in it
+        self.pad_id = next(
+            (i for i in map(self.tokenizer.token_to_id, ("<pad>", "[PAD]")) if i is not None), 0
+        )
+
+    @classmethod
+    def from_settings(cls) -> "OnnxEmbeddingFunction":
+        return cls(
+            model_path=resolve_model_path(settings.EMBEDDING_MODEL, settings.EMBEDDING_ONNX_FILE),
+            model_file=settings.EMBEDDING_ONNX_FILE,
+            batch_size=settings.EMBEDDING_BATCH_SIZE,
+            max_length=settings.EMBEDDING_MAX_LENGTH,
+            threads=settings.EMBEDDING_THREADS,
+            query_prefix=settings.EMBEDDING_QUERY_PREFIX,
+            document_prefix=settings.EMBEDDING_DOCUMENT_PREFIX,
+        )
+
+    def __call__(self, input):
+        return self.encode([self.document_prefix + text for text in input])
+
+    def embed_query(self, input):
+        return self.encode([self.query_prefix + text for text in input])
+
+    def encode(self, texts: List[str]) -> List[np.ndarray]:
+        encodings = self.tokenizer.encode_batch(texts)
+        order = sorted(range(len(texts)), key=lambda i: len(encodings[i].ids))
+        vectors: List[Optional[np.ndarray]] = [None] * len(texts)
+
+        for start in range(0, len(order), self.batch_size):
+            batch = order[start:start + self.batch_size]
+            width = max(len(encodings[i].ids) for i in batch)
+            input_ids = np.full((len(batch), width), self.pad_id, dtype=np.int64)
+            attention_mask = np.zeros((len(batch), width), dtype=np.int64)
+            for row, i in enumerate(batch):
+                ids = encodings[i].ids
+                input_ids[row, :len(ids)] = ids
+                attention_mask[row, :len(ids)] = 1
+
+            feed = {"input_ids": input_ids, "attention_mask": attention_mask}
+            if "token_type_ids" in self.input_names:
+                feed["token_type_ids"] = np.zeros_like(input_ids)
+            output = self.session.run(None, {k: v for k, v in feed.items() if k in self.input_names})[0]
+
+            if output.ndim == 3:
+                # Token states -> mean over real (unpadded) tokens
+                mask = attention_mask[..., None].astype(np.float32)
+                output = (output * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+            output = output / np.maximum(np.linalg.norm(output, axis=1, keepdims=True), 1e-12)
+            for row, i in enumerate(batch):
+                vectors[i] = output[row].astype(np.float32)
+        return vectors
+
+    @staticmethod
+    def name() -> str:
+        return "sovereign_onnx"
+
+    def default_space(self):
+        return "cosine"
+
+    def supported_spaces(self):
+        return ["cosine", "l2", "ip"]
+
+    def get_config(self) -> Dict:
+        return {
+            "model_path": self.model_path,
+            "model_file": self.model_file,
+            "batch_size": self.batch_size,
+            "max_length": self.max_length,
+            "threads": self.threads,
+            "query_prefix": self.query_prefix,
+            "document_prefix": self.document_prefix,
+        }
+
+    @staticmethod
+    def build_from_config(config: Dict) -> "OnnxEmbeddingFunction":
+        return OnnxEmbeddingFunction(**config)
+
+
+class HashingEmbeddingFunction(EmbeddingFunction):
+    """
+    Model-free fallback: hashed character n-grams per word, L2-normalised. Similarity
+    is lexical rather than semantic (shared roots and affixes still score), but it
+    needs no download and no ChromaDB.
+    """
+
+    def __init__(self, dimensions: int = 512, ngram: int = 3):
+        self.dimensions = dimensions
+        self.ngram = ngram
+
+    def __call__(self, input):
+        vectors = []
+        for text in input:
+            buckets = []
+            for word in text.lower().split():
+                padded = f" {word} "  # Word boundaries count as n-gram characters
+                for i in range(max(1, len(padded) - self.ngram + 1)):
+                    buckets.append(zlib.crc32(padded[i:i + self.ngram].encode("utf-8")) % self.dimensions)
+            vector = np.bincount(buckets, minlength=self.dimensions).astype(np.float32)
+            vectors.append(vector / max(float(np.linalg.norm(vector)), 1e-12))
+        return vectors
+
+    @staticmethod
+    def name() -> str:
+        return "sovereign_hashing"
+
+    def get_config(self) -> Dict:
+        return {"dimensions": self.dimensions, "ngram": self.ngram}
+
+    @staticmethod
+    def build_from_config(config: Dict) -> "HashingEmbeddingFunction":
+        return HashingEmbeddingFunction(**config)
+
+
+if ONNXMiniLM_L6_V2 is not None:
+    class ChromaDefaultEmbedding(ONNXMiniLM_L6_V2):
+        """
+        Chroma's default model (all-MiniLM-L6-v2) under the "default" identity, so
+        existing collections open unchanged. Chroma's own default builds a new ONNX
+        session on every call; this keeps one per process.
+        """
+
+        @staticmethod
+        def name() -> str:
+            return "default"
+
+        def get_config(self) -> Dict:
+            return {}
+
+
+def resolve_model_path(model: str, model_file: str) -> str:
+    """Local model directory: settings.EMBEDDING_MODEL_PATH, else a Hugging Face Hub snapshot."""
+    if settings.EMBEDDING_MODEL_PATH:
+        return settings.EMBEDDING_MODEL_PATH
+    from huggingface_hub import snapshot_download
+
+    return snapshot_download(model, allow_patterns=[model_file, model_file + "_data", "tokenizer.json"])
+
+
+def build_embedding_function(path: str):
+    """
+    Embedding function for SovereignMemory (settings.EMBEDDING_BACKEND), wrapped in
+    the embedding cache. Returns None when it cannot be loaded (the vector store's
+    default applies).
+    """
+    try:
+        if settings.EMBEDDING_BACKEND == "onnx":
+            inner = OnnxEmbeddingFunction.from_settings()
+            model_id = f"onnx:{settings.EMBEDDING_MODEL}:{settings.EMBEDDING_ONNX_FILE}:{settings.EMBEDDING_MAX_LENGTH}"
+        else:
+            if ONNXMiniLM_L6_V2 is None:
+                raise ImportError("chromadb is not installed")
+            inner = ChromaDefaultEmbedding()
+            model_id = "chroma:all-MiniLM-L6-v2"
+    except Exception as e:
+        print(f"WARNING: Embedding backend '{settings.EMBEDDING_BACKEND}' unavailable ({e}).")
+        return None
+
+    if not settings.EMBEDDING_CACHE_ENABLED:
+        return inner
+    url = settings.EMBEDDING_CACHE_URL or f"sqlite:///{os.path.join(path, 'embedding_cache.db')}"
+    return CachedEmbeddingFunction(inner, EmbeddingCache(url), model_id)
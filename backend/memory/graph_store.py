@@ -0,0 +1,278 @@
+import atexit
+import json
+import os
+import sqlite3
+import threading
+from typing import TYPE_CHECKING, Dict, Iterator, Optional, Tuple
+
+from config.settings import settings
+from utils.logger_config import setup_logger
+
+if TYPE_CHECKING:
+    import networkx as nx  # Imported where a graph is built (startup only scans SQLite rows)
+
+logger = setup_logger("graph_store")
+
+SNAPSHOT_SCHEMA = """
+CREATE TABLE IF NOT EXISTS nodes (
+    id TEXT PRIMARY KEY,
+    type TEXT,
+    attrs TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_nodes_type ON nodes(type);
+CREATE TABLE IF NOT EXISTS edges (
+    u TEXT NOT NULL,
+    v TEXT NOT NULL,
+    attrs TEXT NOT NULL,
+    PRIMARY KEY (u, v)
+) WITHOUT ROWID;
+"""
+
+
+class GraphStore:
+    """
+    Write-behind persistence for the concept graph.
+    Mutations only touch memory, record the change as pending and (optionally)
+    append one line to a change journal. Pending changes are persisted at most once
+    per flush: explicitly via `flush()`, periodically from a background timer, and at exit.
+    The journal is replayed on load so a crash between flushes loses nothing.
+
+    Snapshot formats (GRAPH_SNAPSHOT_FORMAT):
+    - "sqlite" (default): node/edge tables in `<base>.db`. Flushes upsert only the
+      changed rows; the NetworkX graph is built lazily on first access, and typed node
+      scans (e.g. term index seeding at startup) read the tables without building it.
+      An existing `<base>.gml` is migrated once and kept as `<base>.gml.migrated`.
+    - "gml": legacy full-file snapshot, written via temp file + atomic rename.
+    """
+
+    def __init__(self, base_path: str, fmt: str = None, journal: bool = None, flush_interval: float = None):
+        self.format = fmt or settings.GRAPH_SNAPSHOT_FORMAT
+        self.gml_path = base_path + ".gml"
+        self.db_path = base_path + ".db"
+        self.path = self.db_path if self.format == "sqlite" else self.gml_path
+        self.journal_path = base_path + ".journal"
+        self.journal_enabled = settings.GRAPH_JOURNAL_ENABLED if journal is None else journal
+        self.flush_interval = settings.GRAPH_FLUSH_INTERVAL_SECONDS if flush_interval is None else flush_interval
+
+        self._graph: Optional["nx.DiGraph"] = None
+        self._pending_nodes: Dict[str, Dict] = {}
+        self._pending_edges: Dict[Tuple[str, str], Dict] = {}
+        self._lock = threading.RLock()
+        self._journal = None
+        self._timer = None
+        self._closed = False
+        self._conn: Optional[sqlite3.Connection] = None
+
+        if self.format == "sqlite":
+            self._open_db()
+            self._migrate_gml()
+        self._replay_journal()
+        atexit.register(self.close)
+        if self.flush_interval > 0:
+            self._schedule()
+
+    @property
+    def dirty(self) -> bool:
+        return bool(self._pending_nodes or self._pending_edges)
+
+    @property
+    def graph(self) -> "nx.DiGraph":
+        """The full NetworkX graph, loaded on first access."""
+        if self._graph is None:
+            self.load()
+        return self._graph
+
+    @property
+    def loaded(self) -> bool:
+        return self._graph is not None
+
+    # --- SQLite Snapshot ---
+
+    def _open_db(self):
+        os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SNAPSHOT_SCHEMA)
+        self._conn.commit()
+
+    def _migrate_gml(self):
+        """One-time import of a legacy GML snapshot into the SQLite tables."""
+        if not os.path.exists(self.gml_path):
+            return
+        if self._conn.execute("SELECT 1 FROM nodes LIMIT 1").fetchone():
+            return
+        import networkx as nx
+        try:
+            legacy = nx.read_gml(self.gml_path)
+        except Exception as e:
+            print(f"Error loading graph, starting fresh: {e}")
+            return
+        self._write_rows(legacy.nodes(data=True), ((u, v, d) for u, v, d in legacy.edges(data=True)))
+        os.replace(self.gml_path, self.gml_path + ".migrated")
+        logger.info(
+            "Migrated %s nodes / %s edges from GML to %s.",
+            legacy.number_of_nodes(), legacy.number_of_edges(), self.db_path
+        )
+
+    def _write_rows(self, nodes, edges):
+        """Upsert node/edge rows in one transaction (attrs merged with json_patch)."""
+        with self._conn:
+            self._conn.executemany(
+                "INSERT INTO nodes (id, type, attrs) VALUES (?, ?, ?) "
+                "ON CONFLICT(id) DO UPDATE SET type = COALESCE(excluded.type, type), "
+                "attrs = json_patch(attrs, excluded.attrs)",
+                ((str(n), d.get("type"), json.dumps(d, ensure_ascii=False)) for n, d in nodes),
+            )
+            self._conn.executemany(
+                "INSERT INTO edges (u, v, attrs) VALUES (?, ?, ?) "
+                "ON CONFLICT(u, v) DO UPDATE SET attrs = json_patch(attrs, excluded.attrs)",
+                ((str(u), str(v), json.dumps(d, ensure_ascii=False)) for u, v, d in edges),
+            )
+
+    # --- Loading ---
+
+    def load(self):
+        """Build the NetworkX graph from the snapshot plus any unflushed changes."""
+        import networkx as nx
+        with self._lock:
+            graph = nx.DiGraph()
+            if self.format == "sqlite":
+                graph.add_nodes_from(
+                    (node_id, json.loads(attrs))
+                    for node_id, attrs in self._conn.execute("SELECT id, attrs FROM nodes")
+                )
+                graph.add_edges_from(
+                    (u, v, json.loads(attrs))
+                    for u, v, attrs in self._conn.execute("SELECT u, v, attrs FROM edges")
+                )
+            elif os.path.exists(self.gml_path):
+                try:
+                    graph = nx.read_gml(self.gml_path)
+                except Exception as e:
+                    print(f"Error loading graph, starting fresh: {e}")
+            for node_id, attrs in self._pending_nodes.items():
+                graph.add_node(node_id, **attrs)
+            for (u, v), attrs in self._pending_edges.items():
+                graph.add_edge(u, v, **attrs)
+            self._graph = graph
+
+    def iter_nodes(self, node_type: str) -> Iterator[Tuple[str, Dict]]:
+        """
+        Nodes of one type with their attributes. Served straight from the SQLite
+        tables when the graph is not loaded yet, so startup never parses the whole graph.
+        """
+        with self._lock:
+            if self._graph is not None or self.format != "sqlite":
+                nodes = [(n, d) for n, d in self.graph.nodes(data=True) if d.get("type") == node_type]
+            else:
+                nodes = {
+                    node_id: json.loads(attrs)
+                    for node_id, attrs in self._conn.execute("SELECT id, attrs FROM nodes WHERE type = ?", (node_type,))
+                }
+                for node_id, attrs in self._pending_nodes.items():
+                    if attrs.get("type", nodes.get(node_id, {}).get("type")) == node_type:
+                        nodes[node_id] = {**nodes.get(node_id, {}), **attrs}
+                nodes = list(nodes.items())
+        return iter(nodes)
+
+    def _replay_journal(self) -> int:
+        if not os.path.exists(self.journal_path):
+            return 0
+        count = 0
+        with open(self.journal_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    break  # Torn final line from a crash mid-write
+                if entry["op"] == "node":
+                    self._record_node(entry["id"], entry["attrs"])
+                elif entry["op"] == "edge":
+                    self._record_edge(entry["u"], entry["v"], entry["attrs"])
+                count += 1
+        if count:
+            logger.info("Replayed %s journaled graph change(s).", count)
+        return count
+
+    # --- Mutations ---
+
+    def _append(self, entry: Dict):
+        if not self.journal_enabled:
+            return
+        if self._journal is None:
+            os.makedirs(os.path.dirname(self.journal_path) or ".", exist_ok=True)
+            self._journal = open(self.journal_path, "a", encoding="utf-8")
+        self._journal.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self._journal.flush()
+
+    def _record_node(self, node_id: str, attrs: Dict):
+        self._pending_nodes[node_id] = {**self._pending_nodes.get(node_id, {}), **attrs}
+        if self._graph is not None:
+            self._graph.add_node(node_id, **attrs)
+
+    def _record_edge(self, u: str, v: str, attrs: Dict):
+        for node_id in (u, v):
+            if node_id not in self._pending_nodes:
+                self._pending_nodes[node_id] = {}
+        self._pending_edges[(u, v)] = {**self._pending_edges.get((u, v), {}), **attrs}
+        if self._graph is not None:
+            self._graph.add_edge(u, v, **attrs)
+
+    def add_node(self, node_id: str, **attrs):
+        with self._lock:
+            self._record_node(node_id, attrs)
+            self._append({"op": "node", "id": node_id, "attrs": attrs})
+
+    def add_edge(self, u: str, v: str, **attrs):
+        with self._lock:
+            self._record_edge(u, v, attrs)
+            self._append({"op": "edge", "u": u, "v": v, "attrs": attrs})
+
+    # --- Persistence ---
+
+    def flush(self, force: bool = False):
+        """Persist pending changes (incremental upsert or atomic GML rewrite), then truncate the journal."""
+        with self._lock:
+            if not (self.dirty or force):
+                return
+            try:
+                if self.format == "sqlite":
+                    self._write_rows(self._pending_nodes.items(), ((u, v, d) for (u, v), d in self._pending_edges.items()))
+                else:
+                    os.makedirs(os.path.dirname(self.gml_path) or ".", exist_ok=True)
+                    tmp_path = self.gml_path + ".tmp"
+                    import networkx as nx
+                    nx.write_gml(self.graph, tmp_path)
+                    os.replace(tmp_path, self.gml_path)
+            except Exception as e:
+                print(f"Error saving graph: {e}")
+                return
+            if self._journal is not None:
+                self._journal.close()
+                self._journal = None
+            if os.path.exists(self.journal_path):
+                os.remove(self.journal_path)
+            self._pending_nodes.clear()
+            self._pending_edges.clear()
+
+    def _schedule(self):
+        if self._closed:
+            return
+        self._timer = threading.Timer(self.flush_interval, self._periodic_flush)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _periodic_flush(self):
+        try:
+            self.flush()
+        finally:
+            self._schedule()
+
+    def close(self):
+        self._closed = True
+        if self._timer is not None:
+            self._timer.cancel()
+        self.flush()
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
@@ -0,0 +1,229 @@
+import asyncio
+import json
+import threading
+import time
+import uuid
+from typing import Dict, Optional, Tuple
+
+from config.settings import settings
+from utils.logger_config import setup_logger
+from utils.sqlite import connect
+
+logger = setup_logger("job_store")
+
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+
+JOB_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    result TEXT,
+    error TEXT,
+    progress TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status, created_at);
+CREATE TABLE IF NOT EXISTS job_chunks (
+    job_id TEXT NOT NULL,
+    key TEXT NOT NULL,
+    output TEXT NOT NULL,
+    usage TEXT NOT NULL,
+    PRIMARY KEY (job_id, key)
+) WITHOUT ROWID;
+"""
+
+
+class JobStore:
+    """
+    Persistent job queue in settings.DATABASE_URL.
+    Jobs move queued -> running -> completed/failed. A running job whose heartbeat
+    (`updated_at`) is older than JOB_STALE_SECONDS belongs to a dead worker and is
+    claimable again, up to JOB_MAX_ATTEMPTS.
+    `job_chunks` holds per-chunk generation checkpoints, so a resumed job only
+    generates the chunks that had not finished.
+    """
+
+    def __init__(self, url: str = None):
+        self._lock = threading.Lock()
+        self._url = url
+        self._conn = None  # Opened on first use (or by `open()`), so importing the module touches no files
+
+    def open(self):
+        """Open the database and create the schema (idempotent; called by the startup warm-up)."""
+        with self._lock:
+            self._open()
+
+    def _open(self):
+        # Caller holds self._lock
+        if self._conn is None:
+            conn = connect(self._url)
+            conn.executescript(JOB_SCHEMA)
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    @staticmethod
+    def _row(row) -> Dict:
+        keys = ("id", "status", "payload", "result", "error", "progress", "attempts", "created_at", "updated_at")
+        job = dict(zip(keys, row))
+        for key in ("payload", "result", "progress"):
+            job[key] = json.loads(job[key]) if job[key] else None
+        return job
+
+    # --- Queue ---
+
+    def submit(self, payload: Dict) -> str:
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._lock:
+            conn = self._open()
+            conn.execute(
+                "INSERT INTO jobs (id, status, payload, created_at, updated_at) VALUES (?, ?, ?, ?, ?)",
+                (job_id, QUEUED, json.dumps(payload, ensure_ascii=False), now, now),
+            )
+            conn.commit()
+        return job_id
+
+    def claim(self) -> Optional[Dict]:
+        """Atomically take the oldest queued (or abandoned) job; None if there is nothing to do."""
+        now = time.time()
+        with self._lock:
+            conn = self._open()
+            conn.execute("BEGIN IMMEDIATE")  # Serializes claims across processes
+            try:
+                conn.execute(
+                    "UPDATE jobs SET status = ?, error = ?, updated_at = ? "
+                    "WHERE status = ? AND updated_at < ? AND attempts >= ?",
+                    (FAILED, "Exceeded JOB_MAX_ATTEMPTS", now, RUNNING, now - settings.JOB_STALE_SECONDS, settings.JOB_MAX_ATTEMPTS),
+                )
+                row = conn.execute(
+                    "SELECT id FROM jobs WHERE status = ? OR (status = ? AND updated_at < ?) "
+                    "ORDER BY created_at LIMIT 1",
+                    (QUEUED, RUNNING, now - settings.JOB_STALE_SECONDS),
+                ).fetchone()
+                if row is not None:
+                    conn.execute(
+                        "UPDATE jobs SET status = ?, attempts = attempts + 1, updated_at = ? WHERE id = ?",
+                        (RUNNING, now, row[0]),
+                    )
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+        return self.get(row[0]) if row else None
+
+    def heartbeat(self, job_id: str, progress: Optional[Dict] = None):
+        with self._lock:
+            conn = self._open()
+            if progress is None:
+                conn.execute("UPDATE jobs SET updated_at = ? WHERE id = ?", (time.time(), job_id))
+            else:
+                conn.execute(
+                    "UPDATE jobs SET progress = ?, updated_at = ? WHERE id = ?",
+                    (json.dumps(progress, ensure_ascii=False), time.time(), job_id),
+                )
+            conn.commit()
+
+    def complete(self, job_id: str, result: Dict):
+        with self._lock:
+            conn = self._open()
+            conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = NULL, updated_at = ? WHERE id = ?",
+                (COMPLETED, json.dumps(result, ensure_ascii=False), time.time(), job_id),
+            )
+            conn.execute("DELETE FROM job_chunks WHERE job_id = ?", (job_id,))
+            conn.commit()
+
+    def fail(self, job_id: str, error: str, retry: bool = False):
+        """Record a failure; with `retry`, the job goes back to the queue (until JOB_MAX_ATTEMPTS)."""
+        with self._lock:
+            conn = self._open()
+            attempts = conn.execute("SELECT attempts FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            retry = retry and attempts is not None and attempts[0] < settings.JOB_MAX_ATTEMPTS
+            conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, updated_at = ? WHERE id = ?",
+                (QUEUED if retry else FAILED, error, time.time(), job_id),
+            )
+            conn.commit()
+
+    def release(self, job_id: str):
+        """Return an interrupted (not failed) job to the queue without spending an attempt."""
+        with self._lock:
+            conn = self._open()
+            conn.execute(
+                "UPDATE jobs SET status = ?, attempts = MAX(attempts - 1, 0), updated_at = ? WHERE id = ? AND status = ?",
+                (QUEUED, time.time(), job_id, RUNNING),
+            )
+            conn.commit()
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        with self._lock:
+            conn = self._open()
+            row = conn.execute(
+                "SELECT id, status, payload, result, error, progress, attempts, created_at, updated_at "
+                "FROM jobs WHERE id = ?",
+                (job_id,),
+            ).fetchone()
+        return self._row(row) if row else None
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            conn = self._open()
+            return dict(conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+
+    # --- Per-Chunk Checkpoints ---
+
+    def load_chunk(self, job_id: str, key: str) -> Optional[Tuple[str, Dict]]:
+        with self._lock:
+            conn = self._open()
+            row = conn.execute(
+                "SELECT output, usage FROM job_chunks WHERE job_id = ? AND key = ?", (job_id, key)
+            ).fetchone()
+        return (row[0], json.loads(row[1])) if row else None
+
+    def save_chunk(self, job_id: str, key: str, output: str, usage: Dict):
+        with self._lock:
+            conn = self._open()
+            conn.execute(
+                "INSERT OR REPLACE INTO job_chunks (job_id, key, output, usage) VALUES (?, ?, ?, ?)",
+                (job_id, key, output, json.dumps(usage)),
+            )
+            conn.commit()
+
+    # --- Async Wrappers (SQLite I/O off the event loop) ---
+
+    async def aget(self, job_id: str) -> Optional[Dict]:
+        return await asyncio.to_thread(self.get, job_id)
+
+    async def asubmit(self, payload: Dict) -> str:
+        return await asyncio.to_thread(self.submit, payload)
+
+    async def aclaim(self) -> Optional[Dict]:
+        return await asyncio.to_thread(self.claim)
+
+    async def aheartbeat(self, job_id: str, progress: Optional[Dict] = None):
+        await asyncio.to_thread(self.heartbeat, job_id, progress)
+
+    async def acomplete(self, job_id: str, result: Dict):
+        await asyncio.to_thread(self.complete, job_id, result)
+
+    async def afail(self, job_id: str, error: str, retry: bool = False):
+        await asyncio.to_thread(self.fail, job_id, error, retry)
+
+    async def arelease(self, job_id: str):
+        await asyncio.to_thread(self.release, job_id)
+
+    async def aload_chunk(self, job_id: str, key: str) -> Optional[Tuple[str, Dict]]:
+        return await asyncio.to_thread(self.load_chunk, job_id, key)
+
+    async def asave_chunk(self, job_id: str, key: str, output: str, usage: Dict):
+        await asyncio.to_thread(self.save_chunk, job_id, key, output, usage)
+
+
+job_store = JobStore()
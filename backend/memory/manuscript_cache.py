@@ -0,0 +1,190 @@
+import asyncio
+import hashlib
+import json
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from config.settings import settings
+from utils.logger_config import setup_logger
+from utils.sqlite import connect
+
+logger = setup_logger("manuscript_cache")
+
+_WHITESPACE = re.compile(r"[ \t\u00a0]+")
+_BLANK_LINES = re.compile(r"\n\s*\n+")
+
+
+def normalize_text(text: str) -> str:
+    """Normalize input so cosmetic whitespace/Unicode differences map to the same key."""
+    text = unicodedata.normalize("NFC", text).replace("\r\n", "\n").replace("\r", "\n")
+    text = _WHITESPACE.sub(" ", text)
+    text = _BLANK_LINES.sub("\n\n", text)
+    return "\n".join(line.strip() for line in text.strip().split("\n"))
+
+
+def make_cache_key(
+    text: str, constitution_version: str, memory_context: List[Dict], model: str, position: str = "", surrounding: str = ""
+) -> str:
+    """Content address of one generation: sha256 over everything that shapes the LLM output."""
+    fields = {
+        "text": normalize_text(text),
+        "constitution": constitution_version,
+        "context": memory_context,
+        "model": model,
+        "position": position,
+    }
+    if surrounding:
+        fields["surrounding"] = normalize_text(surrounding)  # Only present for incremental re-processing
+    payload = json.dumps(
+        fields,
+        ensure_ascii=False,
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ManuscriptCache:
+    """
+    Two-tier generation cache:
+    1. In-process LRU (OrderedDict) for hot entries.
+    2. Persistent SQLite table in settings.DATABASE_URL, evicted by age and total size.
+    Values are (output_text, token_usage) pairs.
+    """
+
+    def __init__(self, url: str = None):
+        self.max_memory_entries = settings.MANUSCRIPT_CACHE_MEMORY_ENTRIES
+        self._memory: "OrderedDict[str, Tuple[str, Dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._url = url
+        self._conn = None
+        self._opened = False  # The disk tier opens on first use (or by `open()`), not at import
+
+    def open(self):
+        """Open the disk tier (idempotent; called by the startup warm-up)."""
+        with self._lock:
+            self._open()
+
+    def _open(self):
+        # Caller holds self._lock; a failure disables the disk tier for the process
+        if self._opened:
+            return self._conn
+        self._opened = True
+        try:
+            self._conn = connect(self._url)
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS manuscript_cache (
+                    key TEXT PRIMARY KEY,
+                    output TEXT NOT NULL,
+                    usage TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )"""
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_manuscript_cache_access ON manuscript_cache(last_access)"
+            )
+            self._conn.commit()
+        except Exception as e:
+            logger.warning("Manuscript cache disk tier disabled: %s", e)
+            self._conn = None
+        return self._conn
+
+    # --- Memory Tier ---
+
+    def _remember(self, key: str, value: Tuple[str, Dict]):
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    # --- Public API (blocking) ---
+
+    def get(self, key: str) -> Optional[Tuple[str, Dict]]:
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return self._memory[key]
+            if self._open() is None:
+                return None
+
+            row = self._conn.execute(
+                "SELECT output, usage, created_at FROM manuscript_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+
+            now = time.time()
+            if now - row[2] > settings.MANUSCRIPT_CACHE_TTL_SECONDS:
+                self._conn.execute("DELETE FROM manuscript_cache WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+
+            self._conn.execute("UPDATE manuscript_cache SET last_access = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            value = (row[0], json.loads(row[1]))
+            self._remember(key, value)
+            return value
+
+    def put(self, key: str, output: str, usage: Dict):
+        with self._lock:
+            self._remember(key, (output, usage))
+            if self._open() is None:
+                return
+            now = time.time()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO manuscript_cache (key, output, usage, size, created_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, output, json.dumps(usage), len(output.encode("utf-8")), now, now),
+            )
+            self._evict(now)
+            self._conn.commit()
+
+    def _evict(self, now: float):
+        """Drop expired rows, then least-recently-used rows until under the size budget."""
+        self._conn.execute(
+            "DELETE FROM manuscript_cache WHERE created_at < ?",
+            (now - settings.MANUSCRIPT_CACHE_TTL_SECONDS,),
+        )
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM manuscript_cache").fetchone()[0]
+        excess = total - settings.MANUSCRIPT_CACHE_MAX_BYTES
+        if excess <= 0:
+            return
+        freed = 0
+        victims = []
+        for key, size in self._conn.execute("SELECT key, size FROM manuscript_cache ORDER BY last_access"):
+            victims.append((key,))
+            freed += size
+            if freed >= excess:
+                break
+        self._conn.executemany("DELETE FROM manuscript_cache WHERE key = ?", victims)
+        for (key,) in victims:
+            self._memory.pop(key, None)
+        logger.info("Evicted %s cache entries (%s bytes).", len(victims), freed)
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            if self._open() is not None:
+                self._conn.execute("DELETE FROM manuscript_cache")
+                self._conn.commit()
+
+    # --- Public API (async, keeps SQLite I/O off the event loop) ---
+
+    async def aget(self, key: str) -> Optional[Tuple[str, Dict]]:
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return self._memory[key]
+        return await asyncio.to_thread(self.get, key)
+
+    async def aput(self, key: str, output: str, usage: Dict):
+        await asyncio.to_thread(self.put, key, output, usage)
+
+
+manuscript_cache = ManuscriptCache()
@@ -1,113 +1,267 @@
-try:
-    import chromadb
-    from chromadb.config import Settings as ChromaSettings
-except ImportError:
-    chromadb = None
-    print("WARNING: ChromaDB module could not be imported. Using MOCK MEMORY.")
-
-import networkx as nx
-from typing import List, Dict, Optional
+import threading
+from typing import TYPE_CHECKING, List, Dict, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
 import os
 import json
 from datetime import datetime
 
 from api.schemas import ArabicTerm, Chapter
 from config.settings import settings
+from processors.chunker import split_segments, estimate_tokens
+from memory.term_index import TermIndex
+from memory.graph_store import GraphStore
+from monitoring.metrics import CHROMA_LATENCY
+
+if TYPE_CHECKING:
+    import networkx as nx
 
 class SovereignMemory:
     """
     Hybrid Memory System (RF-030)
-    Combines Vector Store (ChromaDB) for semantic search
+    Combines Vector Store (ChromaDB, or an in-process NumPy index) for semantic search
     and Graph Database (NetworkX) for relational consistency.
     """
     
-    def __init__(self):
-        self.use_mock = False
+    # Set by `initialize()`; the first access to any of them initializes the store
+    _LAZY_ATTRIBUTES = frozenset({
+        "vector_backend", "chroma_client", "terms_collection", "concepts_collection",
+        "graph_store", "graph_path", "term_index",
+    })
+    
+    def __init__(self, path: str = None, embedding_function=None, vector_backend: str = None):
+        """
+        `path` defaults to settings.CHROMA_DB_PATH; `embedding_function` overrides
+        the configured embedder (see memory/embeddings.py; benchmarks use a cheap offline one);
+        `vector_backend` overrides settings.VECTOR_BACKEND.
+        Construction is cheap: chromadb, the Chroma client and the concept graph are
+        set up by `initialize()`, on first use or from the startup warm-up.
+        """
+        self.path = path or settings.CHROMA_DB_PATH
+        self._embedding_function = embedding_function
+        self._vector_backend = vector_backend or settings.VECTOR_BACKEND
+        self._init_lock = threading.Lock()
+        self.terms_version = 0  # Bumped on every term write; lets callers invalidate memoized lookups
+        
+        # Bounded pool for blocking ChromaDB calls made from the event loop
+        self._executor = ThreadPoolExecutor(
+            max_workers=settings.MEMORY_QUERY_WORKERS,
+            thread_name_prefix="chroma-query"
+        )
+
+    def __getattr__(self, name: str):
+        # Only reached while an attribute is unset, i.e. before initialization
+        if name in SovereignMemory._LAZY_ATTRIBUTES:
+            self.initialize()
+            return object.__getattribute__(self, name)
+        raise AttributeError(name)
+
+    @property
+    def initialized(self) -> bool:
+        return "term_index" in self.__dict__
+
+    def initialize(self):
+        """Open the vector store and the concept graph (idempotent, thread-safe)."""
+        with self._init_lock:
+            if self.initialized:
+                return
+            # Cached local embedder (settings.EMBEDDING_BACKEND) unless one was passed in
+            embedding_function = self._embedding_function or self._build_embedding_function()
+            
+            # 1. Initialize Vector Store (ChromaDB; the in-process NumPy index if unavailable;
+            #    None without NumPy: exact index and concept graph only)
+            self.vector_backend = self._vector_backend
+            self.chroma_client = None
+            self.terms_collection = self.concepts_collection = None
+            if self.vector_backend == "chroma":
+                self._open_chroma(embedding_function)
+            if self.vector_backend == "numpy":
+                self._open_vector_index(embedding_function)
+            
+            # 2. Initialize Concept Graph (NetworkX, write-behind persistence)
+            self.graph_store = GraphStore(os.path.join(self.path, "concept_graph"))
+            self.graph_path = self.graph_store.path
+            
+            # 3. Exact-Match Index (Aho-Corasick) over every known term
+            term_index = TermIndex()
+            self._index_graph_terms(term_index)
+            self.term_index = term_index  # Set last: marks the store as initialized
+
+    def _build_embedding_function(self):
+        try:
+            from memory.embeddings import build_embedding_function
+        except ImportError as e:
+            print(f"WARNING: Embedding backends could not be imported ({e}).")
+            return None
+        return build_embedding_function(self.path)
+
+    def _open_chroma(self, embedding_function):
+        collection_options = {"embedding_function": embedding_function} if embedding_function is not None else {}
         try:
-            # 1. Initialize Vector Store (ChromaDB)
             # Try to import and init inside try block to catch runtime failures
-            self.chroma_client = chromadb.PersistentClient(path=settings.CHROMA_DB_PATH)
+            import chromadb
+            self.chroma_client = chromadb.PersistentClient(path=self.path)
             
             # Collections
             self.terms_collection = self.chroma_client.get_or_create_collection(
                 name="arabic_terms",
-                metadata={"hnsw:space": "cosine"}
+                metadata={"hnsw:space": "cosine"},
+                **collection_options
             )
             self.concepts_collection = self.chroma_client.get_or_create_collection(
                 name="book_concepts",
-                metadata={"hnsw:space": "cosine"}
+                metadata={"hnsw:space": "cosine"},
+                **collection_options
             )
+        except ImportError:
+            print("WARNING: ChromaDB module could not be imported. Using the NumPy vector index.")
+            self.vector_backend = "numpy"
         except Exception as e:
-            print(f"WARNING: ChromaDB initialization failed ({e}). Using MOCK MEMORY. (Python 3.14 Issue likely)")
-            self.use_mock = True
-        
-        # 2. Initialize Concept Graph (NetworkX)
-        self.graph = nx.DiGraph()
-        self.graph_path = os.path.join(settings.CHROMA_DB_PATH, "concept_graph.gml")
-        self._load_graph()
-
-    def _load_graph(self):
-        """Load NetworkX graph from disk if exists"""
-        if os.path.exists(self.graph_path):
-            try:
-                self.graph = nx.read_gml(self.graph_path)
-            except Exception as e:
-                print(f"Error loading graph, starting fresh: {e}")
+            print(f"WARNING: ChromaDB initialization failed ({e}). Using the NumPy vector index.")
+            self.vector_backend = "numpy"
 
-    def _save_graph(self):
-        """Persist NetworkX graph to disk"""
-        # Ensure directory exists
-        os.makedirs(os.path.dirname(self.graph_path), exist_ok=True)
+    def _open_vector_index(self, embedding_function):
+        """Exact NumPy search over memory-mapped vectors, stored next to the concept graph."""
         try:
-            # Convert non-serializable attributes if any
-            nx.write_gml(self.graph, self.graph_path)
-        except Exception as e:
-            print(f"Error saving graph: {e}")
+            from memory.embeddings import HashingEmbeddingFunction
+            from memory.vector_index import VectorIndex
+        except ImportError as e:
+            print(f"WARNING: NumPy vector index could not be imported ({e}). Semantic search is disabled.")
+            self.vector_backend = None
+            return
+
+        if embedding_function is None:
+            print("WARNING: No embedding model available. Vector index uses hashed n-gram embeddings.")
+            embedding_function = HashingEmbeddingFunction()
+        directory = os.path.join(self.path, "vector_index")
+        self.terms_collection = VectorIndex(os.path.join(directory, "arabic_terms"), embedding_function)
+        self.concepts_collection = VectorIndex(os.path.join(directory, "book_concepts"), embedding_function)
+
+    @property
+    def graph(self) -> "nx.DiGraph":
+        """Full concept graph (lazily loaded from the snapshot on first access)"""
+        return self.graph_store.graph
+
+    def _index_graph_terms(self, term_index: TermIndex):
+        """Seed the exact-match index from term nodes (read from the snapshot, no full graph load)"""
+        for node_id, data in self.graph_store.iter_nodes("term"):
+            term_index.add(node_id, data.get("english"), data.get("label"))
+
+    def _save_graph(self):
+        """Persist NetworkX graph to disk (no-op unless something changed)"""
+        self.graph_store.flush()
+
+    def flush(self):
+        """Force pending graph changes to disk (call at the end of a bulk ingestion)."""
+        self.graph_store.flush()
 
     # --- Terminology Management ---
 
+    @staticmethod
+    def _term_metadata(term: ArabicTerm) -> Dict:
+        """Flat metadata for the vector store (ChromaDB rejects None values)"""
+        return {k: v for k, v in term.model_dump(exclude={'alternatives'}).items() if v is not None}
+
     def add_term(self, term: ArabicTerm):
         """
         Add a term to both Vector Store and Knowledge Graph.
         """
-        if not self.use_mock:
+        self.add_terms([term])
+
+    def add_terms(self, terms: List[ArabicTerm]):
+        """
+        Bulk insert: one Vector Store `add` for the whole batch; graph changes are
+        journaled and written behind (see GraphStore).
+        """
+        # Last occurrence wins; ChromaDB rejects duplicate ids within one call
+        unique = list({term.id: term for term in terms}.values())
+        if not unique:
+            return
+        metadatas = [self._term_metadata(term) for term in unique]
+        
+        if self.vector_backend is not None:
             # Vector Store
-            self.terms_collection.add(
-                documents=[f"{term.english_term} -> {term.arabic_translation}: {term.definition}"],
-                metadatas=[term.model_dump(exclude={'alternatives'})],
-                ids=[term.id]
-            )
-        else:
-            print(f"[MOCK] Added term to vector store: {term.english_term}")
+            with CHROMA_LATENCY.labels("add").time():
+                self.terms_collection.add(
+                    documents=[f"{t.english_term} -> {t.arabic_translation}: {t.definition}" for t in unique],
+                    metadatas=metadatas,
+                    ids=[t.id for t in unique]
+                )
         
-        # Knowledge Graph
-        self.graph.add_node(
-            term.id,
-            type="term",
-            label=term.arabic_translation,
-            english=term.english_term
-        )
-        # Link to root if exists
-        if term.arabic_root:
-            self.graph.add_node(term.arabic_root, type="root")
-            self.graph.add_edge(term.id, term.arabic_root, relation="derived_from")
+        for term, metadata in zip(unique, metadatas):
+            # Knowledge Graph
+            self.graph_store.add_node(
+                term.id,
+                type="term",
+                label=term.arabic_translation,
+                english=term.english_term
+            )
+            # Link to root if exists
+            if term.arabic_root:
+                self.graph_store.add_node(term.arabic_root, type="root")
+                self.graph_store.add_edge(term.id, term.arabic_root, relation="derived_from")
             
-        self._save_graph()
+            self.term_index.add(term.id, term.english_term, term.arabic_translation, metadata)
+        self.terms_version += 1
+
+    def get_terms(self, term_ids: List[str]) -> Dict[str, Dict]:
+        """
+        Batched lookup by id: {term_id: full metadata} for the indexed terms among
+        `term_ids`. Terms seeded from the graph only carry id/english/arabic; their
+        remaining fields are fetched in one vector store `get` (no vector query).
+        """
+        metas = {tid: self.term_index.terms[tid] for tid in term_ids if tid in self.term_index.terms}
+        partial = [tid for tid, meta in metas.items() if "source" not in meta]
+        if partial and self.vector_backend is not None:
+            with CHROMA_LATENCY.labels("get").time():
+                fetched = self.terms_collection.get(ids=partial, include=["metadatas"])
+            for tid, meta in zip(fetched.get('ids') or [], fetched.get('metadatas') or []):
+                if meta:
+                    metas[tid] = meta
+                    self.term_index.terms[tid] = meta
+        return metas
+
+    def find_exact(self, text: str) -> List[Dict]:
+        """
+        Verbatim term occurrences in `text` (linear-time scan, no embedding).
+        Returns [{"term": metadata, "field", "text", "start", "end"}] in document order.
+        """
+        hits = self.term_index.scan(text)
+        metas = self.get_terms(list({h["term_id"] for h in hits}))
+        for hit in hits:
+            hit["term"] = metas.get(hit["term_id"], {"id": hit["term_id"]})
+        return hits
 
     def find_term(self, query: str, n_results: int = 5) -> List[Dict]:
         """
-        Semantic search for terms.
+        Term search: exact hits from the index first (most frequent first);
+        semantic search only fills the remaining slots.
         """
-        if self.use_mock:
-            # Mock Return
-            if "strategy" in query.lower():
-                 return [{"id": "mock_1", "english_term": "strategy", "arabic_translation": "استراتيجية", "definition": "Mock Definition"}]
-            return []
+        counts: Dict[str, int] = {}
+        for hit in self.term_index.scan(query):
+            counts[hit["term_id"]] = counts.get(hit["term_id"], 0) + 1
+        exact_ids = sorted(counts, key=counts.get, reverse=True)[:n_results]
+        metas = self.get_terms(exact_ids)
+        found_terms = [metas[tid] for tid in exact_ids if tid in metas]
+        if len(found_terms) >= n_results:
+            return found_terms
 
-        results = self.terms_collection.query(
-            query_texts=[query],
-            n_results=n_results
-        )
+        for meta in self._semantic_find(query, n_results):
+            if len(found_terms) >= n_results:
+                break
+            if meta.get('id') not in counts:
+                found_terms.append(meta)
+        return found_terms
+
+    def _semantic_find(self, query: str, n_results: int) -> List[Dict]:
+        """Vector (embedding + HNSW, or brute force on the NumPy backend) search."""
+        if self.vector_backend is None:
+            return []
+        with CHROMA_LATENCY.labels("query").time():
+            results = self.terms_collection.query(
+                query_texts=[query],
+                n_results=n_results
+            )
         
         found_terms = []
         if results['metadatas']:
@@ -116,36 +270,113 @@ class SovereignMemory:
                 
         return found_terms
 
+    def find_terms(self, queries: List[str], n_results: int = 3) -> List[List[Tuple[Dict, float]]]:
+        """
+        Batched semantic search: one vector store call for all queries.
+        Returns, per query, a list of (term metadata, cosine distance).
+        """
+        if not queries:
+            return []
+        if self.vector_backend is None:
+            return [[] for _ in queries]
+
+        with CHROMA_LATENCY.labels("query_batch").time():
+            results = self.terms_collection.query(
+                query_texts=queries,
+                n_results=n_results,
+                include=["metadatas", "distances"]
+            )
+        
+        batched = []
+        for metas, distances in zip(results.get('metadatas') or [], results.get('distances') or []):
+            batched.append(list(zip(metas, distances)))
+        return batched
+
+    def retrieve_context(self, text: str, token_budget: int = None) -> List[Dict]:
+        """
+        Segment-level retrieval: verbatim term hits from the exact index first, then one
+        batched vector query over paragraph/sentence segments. The union is deduplicated,
+        ranked by summed similarity (relevance x coverage) and capped by a token budget.
+        """
+        token_budget = token_budget or settings.MEMORY_CONTEXT_TOKEN_BUDGET
+        segments = split_segments(text)[:settings.MEMORY_MAX_SEGMENTS]
+        if not segments:
+            return []
+
+        scores: Dict[str, float] = {}
+        terms: Dict[str, Dict] = {}
+
+        # Exact occurrences rank above any semantic match (similarity <= 1 per segment)
+        for hit in self.find_exact(text):
+            term_id = hit["term_id"]
+            terms[term_id] = hit["term"]
+            scores[term_id] = scores.get(term_id, len(segments)) + 1.0
+
+        # Skip the vector query entirely when exact hits already fill the budget
+        exact_cost = sum(estimate_tokens(json.dumps(t, ensure_ascii=False)) for t in terms.values())
+        hits_per_segment = [] if exact_cost >= token_budget else self.find_terms(
+            segments, n_results=settings.MEMORY_RESULTS_PER_SEGMENT
+        )
+        for hits in hits_per_segment:
+            for meta, distance in hits:
+                term_id = meta.get('id') or meta.get('english_term')
+                terms[term_id] = meta
+                scores[term_id] = scores.get(term_id, 0.0) + max(0.0, 1.0 - (distance or 0.0))
+
+        context = []
+        used = 0
+        for term_id in sorted(scores, key=scores.get, reverse=True):
+            cost = estimate_tokens(json.dumps(terms[term_id], ensure_ascii=False))
+            if used + cost > token_budget:
+                break
+            context.append(terms[term_id])
+            used += cost
+        return context
+
+    async def aretrieve_context(self, text: str, token_budget: int = None) -> List[Dict]:
+        """Async variant of `retrieve_context` (runs on the bounded memory pool)."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self.retrieve_context, text, token_budget)
+
     # --- Context & Consistency ---
 
     def add_chapter_context(self, chapter: Chapter):
         """
         Ingest chapter content into memory for long-term consistency.
         """
-        if not self.use_mock:
+        self.add_chapters([chapter])
+
+    def add_chapters(self, chapters: List[Chapter]):
+        """
+        Bulk chapter ingestion: one Vector Store `add` for the chapter snippets,
+        one `add_terms` batch for every term they use, one graph flush at the end.
+        """
+        if not chapters:
+            return
+        if self.vector_backend is not None:
             # Vectorize Content (Chunks)
-            content_snippet = chapter.processed_content[:1000] if chapter.processed_content else chapter.raw_content[:1000]
-            
             self.concepts_collection.add(
-                documents=[content_snippet],
+                documents=[
+                    (c.processed_content or c.raw_content)[:1000] for c in chapters
+                ],
                 metadatas=[{
-                    "chapter_id": chapter.id,
-                    "book_id": chapter.book_id,
-                    "title": chapter.title
-                }],
-                ids=[chapter.id]
+                    "chapter_id": c.id,
+                    "book_id": c.book_id,
+                    "title": c.title
+                } for c in chapters],
+                ids=[c.id for c in chapters]
             )
-        else:
-            print(f"[MOCK] Added chapter context: {chapter.title}")
-            
+        
+        # Ensure terms exist
+        self.add_terms([term for c in chapters for term in c.arabic_terms])
+        
         # 2. Update Graph
-        self.graph.add_node(chapter.id, type="chapter", label=chapter.title)
+        for chapter in chapters:
+            self.graph_store.add_node(chapter.id, type="chapter", label=chapter.title)
+            # Link terms used in chapter
+            for term in chapter.arabic_terms:
+                self.graph_store.add_edge(chapter.id, term.id, relation="uses_term")
         
-        # Link terms used in chapter
-        for term in chapter.arabic_terms:
-            self.add_term(term) # Ensure term exists
-            self.graph.add_edge(chapter.id, term.id, relation="uses_term")
-            
         self._save_graph()
 
     def check_consistency(self, text: str) -> List[str]:
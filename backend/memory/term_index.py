@@ -0,0 +1,180 @@
+import re
+import threading
+from collections import deque
+from itertools import product
+from typing import Dict, List, Optional
+
+ARABIC_LETTER = re.compile(r"[\u0621-\u064A\u0671-\u06D3]")
+
+# Clitics that may attach to an Arabic term inside the same token:
+# conjunction + preposition + article in front ("والعلم", "بالعلم", "للعلم"), pronoun suffix behind ("علمه")
+PROCLITICS = frozenset(
+    conj + rest
+    for conj, rest in product(("", "و", "ف"), ("", "ب", "ك", "ل", "ال", "بال", "كال", "لل"))
+)
+ENCLITICS = frozenset(("", "ه", "ها", "هم", "هما", "هن", "ك", "كم", "كما", "كن", "ي", "نا"))
+
+# Boundary rules per pattern
+WORD = "word"  # ASCII: no letter or digit on either side
+CLITIC = "clitic"  # Arabic: only clitics between the match and the token edges
+
+
+def _boundary(pattern: str) -> Optional[str]:
+    if pattern.isascii() and any(c.isalnum() for c in pattern):
+        return WORD
+    if ARABIC_LETTER.search(pattern):
+        return CLITIC
+    return None
+
+
+def _token_edges(text: str, start: int, end: int):
+    """Extend [start, end) to the enclosing run of letters/digits."""
+    left, right = start, end
+    while left > 0 and text[left - 1].isalnum():
+        left -= 1
+    while right < len(text) and text[right].isalnum():
+        right += 1
+    return left, right
+
+
+def _fold(char: str) -> str:
+    """Case-fold one character without changing text length (keeps offsets valid)."""
+    lowered = char.lower()
+    return lowered if len(lowered) == 1 else char
+
+
+class TermIndex:
+    """
+    In-memory exact-match index over every known term (English and Arabic forms).
+    An Aho-Corasick automaton scans a document once, in time linear in its length,
+    and reports each verbatim occurrence with its offsets.
+
+    New terms are inserted into the trie immediately; failure links are rebuilt lazily
+    on the next scan, so bulk ingestion pays for a single rebuild.
+    ASCII patterns only match on word boundaries. Arabic patterns match on token
+    boundaries too, except that clitics may attach (و، ف، ب، ك، ل، ال in front, pronoun
+    suffixes behind), so "والعلم" contains "علم" but "معلم" does not.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._own: List[List[int]] = [[]]  # Pattern ids ending exactly at a node
+        self._out: List[List[int]] = [[]]  # Own + inherited via failure links
+        self._patterns: List[tuple] = []  # (pattern, term_id, field, boundary)
+        self._seen = set()
+        self._dirty = False
+
+        self.terms: Dict[str, Dict] = {}
+        self._by_english: Dict[str, str] = {}
+
+    def __len__(self) -> int:
+        return len(self.terms)
+
+    # --- Construction ---
+
+    def add(self, term_id: str, english: Optional[str], arabic: Optional[str], metadata: Optional[Dict] = None):
+        with self._lock:
+            self.terms[term_id] = metadata or {
+                "id": term_id, "english_term": english, "arabic_translation": arabic
+            }
+            if english:
+                self._by_english[english.strip().lower()] = term_id
+            for field, value in (("english", english), ("arabic", arabic)):
+                if value and value.strip():
+                    self._insert(value.strip(), term_id, field)
+
+    def _insert(self, pattern: str, term_id: str, field: str):
+        folded = "".join(_fold(c) for c in pattern)
+        if (folded, term_id) in self._seen:
+            return
+        self._seen.add((folded, term_id))
+
+        node = 0
+        for char in folded:
+            nxt = self._goto[node].get(char)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][char] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._own.append([])
+                self._out.append([])
+            node = nxt
+
+        self._own[node].append(len(self._patterns))
+        self._patterns.append((folded, term_id, field, _boundary(folded)))
+        self._dirty = True
+
+    def _build(self):
+        """Recompute failure links and output sets (BFS over the trie)."""
+        queue = deque()
+        self._out[0] = list(self._own[0])
+        for child in self._goto[0].values():
+            self._fail[child] = 0
+            self._out[child] = list(self._own[child])
+            queue.append(child)
+
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                fallback = self._fail[node]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[child] = target if target != child else 0
+                self._out[child] = self._own[child] + self._out[self._fail[child]]
+                queue.append(child)
+
+        self._dirty = False
+
+    # --- Queries ---
+
+    def scan(self, text: str) -> List[Dict]:
+        """
+        Return every exact occurrence as
+        {"term_id", "field", "text", "start", "end"}, ordered by position.
+        """
+        with self._lock:
+            if self._dirty:
+                self._build()
+            goto, fail, out, patterns = self._goto, self._fail, self._out, self._patterns
+
+            hits = []
+            node = 0
+            length = len(text)
+            for i, raw in enumerate(text):
+                char = _fold(raw)
+                while node and char not in goto[node]:
+                    node = fail[node]
+                node = goto[node].get(char, 0)
+                if not out[node]:
+                    continue
+                for pattern_id in out[node]:
+                    pattern, term_id, field, boundary = patterns[pattern_id]
+                    start = i - len(pattern) + 1
+                    end = i + 1
+                    if boundary == WORD and (
+                        (start > 0 and text[start - 1].isalnum()) or (end < length and text[end].isalnum())
+                    ):
+                        continue
+                    if boundary == CLITIC:
+                        left, right = _token_edges(text, start, end)
+                        if text[left:start] not in PROCLITICS or text[end:right] not in ENCLITICS:
+                            continue
+                    hits.append({
+                        "term_id": term_id,
+                        "field": field,
+                        "text": text[start:end],
+                        "start": start,
+                        "end": end,
+                    })
+
+        hits.sort(key=lambda h: (h["start"], -h["end"]))
+        return hits
+
+    def lookup(self, english_term: str) -> Optional[Dict]:
+        """Exact (case-insensitive) lookup of a single English term."""
+        term_id = self._by_english.get(english_term.strip().lower())
+        return self.terms.get(term_id) if term_id else None
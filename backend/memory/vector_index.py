@@ -0,0 +1,221 @@
+import json
+import os
+import threading
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from utils.logger_config import setup_logger
+
+logger = setup_logger("vector_index")
+
+QUERY_BLOCK_ELEMENTS = 1 << 23  # Query rows x index rows scored per matmul (~32 MB of float32)
+
+
+def embedder_id(embedding_function) -> str:
+    """Identity of an embedding function; vectors from different ones are not comparable."""
+    model_id = getattr(embedding_function, "model_id", None)
+    if model_id:
+        return model_id
+    try:
+        config = json.dumps(embedding_function.get_config(), sort_keys=True, default=str)
+    except Exception:
+        config = ""
+    return f"{embedding_function.name()}:{config}"
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    return vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+
+
+class VectorIndex:
+    """
+    In-process exact vector search with the subset of the ChromaDB collection API that
+    SovereignMemory uses (add / get / query / count), for when ChromaDB is unavailable
+    or settings.VECTOR_BACKEND is "numpy".
+
+    Vectors are L2-normalised rows of one contiguous float32 matrix; a query is a single
+    matmul plus argpartition (cosine distance, as in the HNSW collections). Brute force
+    is exact and, for glossaries of tens of thousands of terms, faster than HNSW.
+
+    Persistence (`path` is a file prefix):
+    - {path}.f32    raw row-major float32 matrix, memory-mapped on load, appended on add
+    - {path}.jsonl  one {"id", "document", "metadata"} record per row
+    - {path}.json   embedding function identity and dimensions
+    If the embedding function changes, stored documents are re-embedded on load.
+    Like ChromaDB's `add`, ids already present are skipped.
+    """
+
+    def __init__(self, path: str, embedding_function):
+        self.path = path
+        self.embedding_function = embedding_function
+        self.embedding_id = embedder_id(embedding_function)
+        self._lock = threading.RLock()
+
+        self._vectors: Optional[np.ndarray] = None  # Memory-mapped until the first add
+        self._count = 0
+        self.dimensions: Optional[int] = None
+        self.ids: List[str] = []
+        self.documents: List[str] = []
+        self.metadatas: List[Dict] = []
+        self._rows: Dict[str, int] = {}
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._load()
+
+    # --- Persistence ---
+
+    def _load(self):
+        meta_path, records_path, vectors_path = self.path + ".json", self.path + ".jsonl", self.path + ".f32"
+        if not os.path.exists(meta_path):
+            self._remove_files()  # Leftovers of a first write that never completed
+            return
+        with open(meta_path, encoding="utf-8") as f:
+            meta = json.load(f)
+
+        records, torn = [], False
+        if os.path.exists(records_path):
+            with open(records_path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        records.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        torn = True  # Final line of an interrupted write
+                        break
+        if not records or meta.get("embedding") != self.embedding_id:
+            self._remove_files()
+            if not records:
+                return
+            logger.info(
+                "Embedding function changed (%s -> %s); re-embedding %s document(s) in %s.",
+                meta.get("embedding"), self.embedding_id, len(records), self.path
+            )
+            self.add(
+                documents=[r["document"] for r in records],
+                metadatas=[r["metadata"] for r in records],
+                ids=[r["id"] for r in records],
+            )
+            return
+
+        dimensions = meta["dimensions"]
+        size = os.path.getsize(vectors_path) if os.path.exists(vectors_path) else 0
+        count = min(size // (4 * dimensions), len(records))
+        if torn or count < len(records) or size != count * 4 * dimensions:
+            # Appends must resume at a row boundary in both files
+            logger.warning("Vector index %s was not closed cleanly; keeping the first %s row(s).", self.path, count)
+            self._rewrite(records[:count], vectors_path, dimensions, count)
+        if not count:
+            return
+
+        self.dimensions = dimensions
+        self._vectors = np.memmap(vectors_path, dtype=np.float32, mode="r", shape=(count, dimensions))
+        self._count = count
+        for row, record in enumerate(records[:count]):
+            self.ids.append(record["id"])
+            self.documents.append(record["document"])
+            self.metadatas.append(record["metadata"])
+            self._rows[record["id"]] = row
+
+    def _remove_files(self):
+        for suffix in (".json", ".jsonl", ".f32"):
+            if os.path.exists(self.path + suffix):
+                os.remove(self.path + suffix)
+
+    def _rewrite(self, records: List[Dict], vectors_path: str, dimensions: int, count: int):
+        """Truncate both files to `count` consistent rows."""
+        with open(self.path + ".jsonl", "w", encoding="utf-8") as f:
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        if os.path.exists(vectors_path):
+            with open(vectors_path, "r+b") as f:
+                f.truncate(count * dimensions * 4)
+
+    def _append(self, ids: List[str], documents: List[str], metadatas: List[Dict], vectors: np.ndarray):
+        if not os.path.exists(self.path + ".json"):
+            with open(self.path + ".json", "w", encoding="utf-8") as f:
+                json.dump({"embedding": self.embedding_id, "dimensions": self.dimensions}, f)
+        with open(self.path + ".f32", "ab") as f:
+            f.write(np.ascontiguousarray(vectors, dtype=np.float32).tobytes())
+        with open(self.path + ".jsonl", "a", encoding="utf-8") as f:
+            for record_id, document, metadata in zip(ids, documents, metadatas):
+                f.write(json.dumps({"id": record_id, "document": document, "metadata": metadata}, ensure_ascii=False) + "\n")
+
+    # --- Collection API ---
+
+    def count(self) -> int:
+        return self._count
+
+    def add(self, documents: List[str], metadatas: Optional[List[Dict]] = None, ids: List[str] = None):
+        metadatas = metadatas or [{} for _ in documents]
+        with self._lock:
+            new, seen = [], set()
+            for i, record_id in enumerate(ids):
+                if record_id not in self._rows and record_id not in seen:  # First occurrence wins
+                    seen.add(record_id)
+                    new.append(i)
+            if not new:
+                return
+            ids = [ids[i] for i in new]
+            documents = [documents[i] for i in new]
+            metadatas = [metadatas[i] for i in new]
+
+            vectors = _normalize(np.asarray(self.embedding_function(documents), dtype=np.float32))
+            if self.dimensions is None:
+                self.dimensions = vectors.shape[1]
+            elif vectors.shape[1] != self.dimensions:
+                raise ValueError(f"Embedding dimension {vectors.shape[1]} does not match the index ({self.dimensions})")
+
+            needed = self._count + len(ids)
+            if self._vectors is None or isinstance(self._vectors, np.memmap) or needed > len(self._vectors):
+                # Grow geometrically; the memory-mapped matrix is copied once, on the first add
+                capacity = max(needed, 2 * self._count, 1024)
+                grown = np.empty((capacity, self.dimensions), dtype=np.float32)
+                if self._count:
+                    grown[:self._count] = self._vectors[:self._count]
+                self._vectors = grown
+            self._vectors[self._count:needed] = vectors
+
+            self._append(ids, documents, metadatas, vectors)
+            for offset, record_id in enumerate(ids):
+                self._rows[record_id] = self._count + offset
+            self.ids.extend(ids)
+            self.documents.extend(documents)
+            self.metadatas.extend(metadatas)
+            self._count = needed
+
+    def get(self, ids: List[str], include: List[str] = ("metadatas", "documents")) -> Dict:
+        rows = [self._rows[i] for i in ids if i in self._rows]
+        result = {"ids": [self.ids[r] for r in rows]}
+        if "metadatas" in include:
+            result["metadatas"] = [dict(self.metadatas[r]) for r in rows]
+        if "documents" in include:
+            result["documents"] = [self.documents[r] for r in rows]
+        return result
+
+    def query(self, query_texts: List[str], n_results: int = 10, include: List[str] = ("metadatas", "documents", "distances")) -> Dict:
+        """Exact top-k by cosine distance (1 - cosine similarity), one result list per query."""
+        with self._lock:
+            count = self._count
+            matrix = self._vectors[:count] if count else None
+
+        result = {"ids": [], "distances": [], "metadatas": [], "documents": []}
+        k = min(n_results, count)
+        if not query_texts or k <= 0:
+            for _ in query_texts:
+                for values in result.values():
+                    values.append([])
+            return {key: values for key, values in result.items() if key == "ids" or key in include}
+
+        embed = getattr(self.embedding_function, "embed_query", self.embedding_function)
+        queries = _normalize(np.asarray(embed(list(query_texts)), dtype=np.float32))
+        block = max(1, QUERY_BLOCK_ELEMENTS // count)
+        for start in range(0, len(queries), block):
+            scores = queries[start:start + block] @ matrix.T
+            top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+            for row_scores, candidates in zip(scores, top):
+                ranked = candidates[np.argsort(-row_scores[candidates])]
+                result["ids"].append([self.ids[r] for r in ranked])
+                result["distances"].append([float(1.0 - row_scores[r]) for r in ranked])
+                result["metadatas"].append([dict(self.metadatas[r]) for r in ranked])
+                result["documents"].append([self.documents[r] for r in ranked])
+        return {key: values for key, values in result.items() if key == "ids" or key in include}
@@ -0,0 +1,146 @@
+import asyncio
+import difflib
+import hashlib
+import json
+import threading
+import time
+from typing import Dict, List, Optional
+
+from memory.manuscript_cache import normalize_text
+from utils.logger_config import setup_logger
+from utils.sqlite import connect
+
+logger = setup_logger("version_store")
+
+
+def paragraph_hash(paragraph: str) -> str:
+    return hashlib.sha256(normalize_text(paragraph).encode("utf-8")).hexdigest()[:32]
+
+
+class DocumentVersionStore:
+    """
+    Latest processed version of each document, for incremental re-processing.
+    A document is stored as ordered units: the hashes of the source paragraphs one
+    LLM call covered, plus that call's output. Outputs cannot be split per paragraph,
+    so a unit is the smallest piece that can be reused.
+    """
+
+    def __init__(self, url: str = None):
+        self._lock = threading.Lock()
+        self._url = url
+        self._conn = None
+        self._opened = False  # Opened on first use (or by `open()`), not at import
+
+    def open(self):
+        """Open the database and create the schema (idempotent; called by the startup warm-up)."""
+        with self._lock:
+            self._open()
+
+    def _open(self):
+        # Caller holds self._lock; a failure disables the store for the process
+        if self._opened:
+            return self._conn
+        self._opened = True
+        try:
+            self._conn = connect(self._url)
+            self._conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS documents (
+                    doc_id TEXT PRIMARY KEY,
+                    version INTEGER NOT NULL,
+                    constitution TEXT NOT NULL,
+                    updated_at REAL NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS document_units (
+                    doc_id TEXT NOT NULL,
+                    unit INTEGER NOT NULL,
+                    hashes TEXT NOT NULL,
+                    output TEXT NOT NULL,
+                    PRIMARY KEY (doc_id, unit)
+                ) WITHOUT ROWID;
+                """
+            )
+            self._conn.commit()
+        except Exception as e:
+            logger.warning("Document version store disabled: %s", e)
+            self._conn = None
+        return self._conn
+
+    def load(self, doc_id: str, constitution_version: str) -> Optional[Dict]:
+        """
+        Latest version as {"version": int, "units": [{"hashes": [...], "output": str}]}.
+        Versions produced under a different constitution are not reusable (returns None).
+        """
+        with self._lock:
+            conn = self._open()
+            if conn is None:
+                return None
+            row = conn.execute(
+                "SELECT version, constitution FROM documents WHERE doc_id = ?", (doc_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            units = [
+                {"hashes": json.loads(hashes), "output": output}
+                for hashes, output in conn.execute(
+                    "SELECT hashes, output FROM document_units WHERE doc_id = ? ORDER BY unit", (doc_id,)
+                )
+            ]
+        if row[1] != constitution_version:
+            logger.info("Document %s v%s predates the current constitution; reprocessing fully.", doc_id, row[0])
+            return {"version": row[0], "units": []}
+        return {"version": row[0], "units": units}
+
+    def save(self, doc_id: str, constitution_version: str, units: List[Dict]) -> int:
+        """Replace the stored version with `units`; returns the new version number."""
+        with self._lock:
+            conn = self._open()
+            if conn is None:
+                return 0
+            with conn:
+                row = conn.execute("SELECT version FROM documents WHERE doc_id = ?", (doc_id,)).fetchone()
+                version = (row[0] if row else 0) + 1
+                conn.execute(
+                    "INSERT OR REPLACE INTO documents (doc_id, version, constitution, updated_at) VALUES (?, ?, ?, ?)",
+                    (doc_id, version, constitution_version, time.time()),
+                )
+                conn.execute("DELETE FROM document_units WHERE doc_id = ?", (doc_id,))
+                conn.executemany(
+                    "INSERT INTO document_units (doc_id, unit, hashes, output) VALUES (?, ?, ?, ?)",
+                    ((doc_id, i, json.dumps(u["hashes"]), u["output"]) for i, u in enumerate(units)),
+                )
+        return version
+
+    async def aload(self, doc_id: str, constitution_version: str) -> Optional[Dict]:
+        return await asyncio.to_thread(self.load, doc_id, constitution_version)
+
+    async def asave(self, doc_id: str, constitution_version: str, units: List[Dict]) -> int:
+        return await asyncio.to_thread(self.save, doc_id, constitution_version, units)
+
+
+def reusable_units(units: List[Dict], new_hashes: List[str]) -> Dict[int, int]:
+    """
+    Diff the stored paragraph sequence against the new one and return
+    {new paragraph index where a reusable unit starts: unit index}.
+    A unit is reusable when every paragraph it covered survives unchanged and
+    still contiguous (typo fixes, insertions and deletions elsewhere do not affect it).
+    """
+    old_hashes = [h for unit in units for h in unit["hashes"]]
+    matcher = difflib.SequenceMatcher(None, old_hashes, new_hashes, autojunk=False)
+    old_to_new = {}
+    for block in matcher.get_matching_blocks():
+        for offset in range(block.size):
+            old_to_new[block.a + offset] = block.b + offset
+
+    reusable = {}
+    cursor = 0
+    for index, unit in enumerate(units):
+        span = range(cursor, cursor + len(unit["hashes"]))
+        cursor += len(unit["hashes"])
+        mapped = [old_to_new.get(i) for i in span]
+        if mapped and None not in mapped and mapped == list(range(mapped[0], mapped[0] + len(mapped))):
+            reusable[mapped[0]] = index
+    return reusable
+
+
+version_store = DocumentVersionStore()
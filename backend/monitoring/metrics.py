@@ -0,0 +1,201 @@
+import contextlib
+import functools
+import inspect
+import time
+from typing import Dict, List
+
+try:
+    from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+except ImportError:
+    Counter = Gauge = Histogram = None
+    print("WARNING: prometheus_client import failed. /metrics disabled.")
+
+from config.settings import settings
+
+# Wide buckets: a full-manuscript request or LLM call can take minutes
+SLOW_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300, 600)
+FAST_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+TTFT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2, 3, 5, 10, 20, 30, 60)
+
+
+class _NoopMetric:
+    """Stand-in when prometheus_client is missing: instrumentation calls stay valid."""
+
+    def labels(self, *args, **kwargs):
+        return self
+
+    def observe(self, *args):
+        pass
+
+    def inc(self, *args):
+        pass
+
+    def dec(self, *args):
+        pass
+
+    def set(self, *args):
+        pass
+
+    @contextlib.contextmanager
+    def time(self):
+        yield
+
+
+def _metric(kind, name: str, documentation: str, labels: List[str], **kwargs):
+    if kind is None or not settings.METRICS_ENABLED:
+        return _NoopMetric()
+    return kind(name, documentation, labels, **kwargs)
+
+
+# --- HTTP ---
+REQUEST_LATENCY = _metric(
+    Histogram, "sovereign_request_duration_seconds",
+    "HTTP request latency until the last body byte (full SSE stream for streaming routes)",
+    ["method", "route", "status"], buckets=SLOW_BUCKETS,
+)
+REQUESTS_IN_FLIGHT = _metric(Gauge, "sovereign_requests_in_flight", "HTTP requests being served", ["route"])
+
+# --- Graph ---
+NODE_LATENCY = _metric(
+    Histogram, "sovereign_graph_node_duration_seconds", "LangGraph node latency", ["node"], buckets=SLOW_BUCKETS
+)
+NODE_ERRORS = _metric(Counter, "sovereign_graph_node_errors_total", "LangGraph node failures", ["node"])
+JOBS_IN_FLIGHT = _metric(Gauge, "sovereign_jobs_in_flight", "Background jobs being run", [])
+
+# --- LLM Providers ---
+LLM_LATENCY = _metric(
+    Histogram, "sovereign_llm_call_duration_seconds", "LLM call latency (full streamed response)",
+    ["provider", "node"], buckets=SLOW_BUCKETS,
+)
+LLM_TTFT = _metric(
+    Histogram, "sovereign_llm_time_to_first_token_seconds", "LLM time to first streamed chunk",
+    ["provider", "node"], buckets=TTFT_BUCKETS,
+)
+LLM_IN_FLIGHT = _metric(Gauge, "sovereign_llm_calls_in_flight", "LLM calls awaiting completion", ["provider"])
+LLM_ERRORS = _metric(Counter, "sovereign_llm_call_errors_total", "Failed LLM calls", ["provider", "node"])
+LLM_TOKENS = _metric(
+    Counter, "sovereign_llm_tokens_total",
+    "LLM tokens by kind (input, output, cached_input, cache_creation_input)", ["provider", "kind"],
+)
+
+# --- Memory & Caches ---
+CHROMA_LATENCY = _metric(
+    Histogram, "sovereign_chroma_query_duration_seconds", "Vector store call latency (embedding + HNSW or NumPy search)",
+    ["operation"], buckets=FAST_BUCKETS,
+)
+CACHE_REQUESTS = _metric(Counter, "sovereign_cache_requests_total", "Cache lookups", ["cache", "result"])
+CACHE_HIT_RATIO = _metric(
+    Gauge, "sovereign_cache_hit_ratio",
+    "Hit ratio since startup (manuscript: chunk lookups; embedding: strings; prompt: cached share of input tokens)", ["cache"],
+)
+
+_cache_totals: Dict[str, List[float]] = {}
+
+
+def _update_ratio(cache: str, hits: float, total: float):
+    totals = _cache_totals.setdefault(cache, [0.0, 0.0])
+    totals[0] += hits
+    totals[1] += total
+    if totals[1]:
+        CACHE_HIT_RATIO.labels(cache).set(totals[0] / totals[1])
+
+
+def record_cache(cache: str, hit: bool, count: int = 1):
+    if count:
+        CACHE_REQUESTS.labels(cache, "hit" if hit else "miss").inc(count)
+        _update_ratio(cache, count if hit else 0, count)
+
+
+def record_usage(provider: str, usage: Dict[str, int]):
+    """Token counters plus the prompt-cache ratio (cached share of input tokens)."""
+    for kind in ("input", "output", "cached_input", "cache_creation_input"):
+        value = usage.get(f"{kind}_tokens") or 0
+        if value:
+            LLM_TOKENS.labels(provider, kind).inc(value)
+    if usage.get("input_tokens"):
+        _update_ratio("prompt", usage.get("cached_input_tokens") or 0, usage["input_tokens"])
+
+
+def instrument_node(name: str, fn):
+    """Wrap a LangGraph node (sync or async) with latency/error metrics; the signature is preserved."""
+    if inspect.iscoroutinefunction(fn):
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return await fn(*args, **kwargs)
+            except Exception:
+                NODE_ERRORS.labels(name).inc()
+                raise
+            finally:
+                NODE_LATENCY.labels(name).observe(time.perf_counter() - started)
+    else:
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            except Exception:
+                NODE_ERRORS.labels(name).inc()
+                raise
+            finally:
+                NODE_LATENCY.labels(name).observe(time.perf_counter() - started)
+    return wrapper
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware for request latency and in-flight gauges. Latency is taken when
+    the last body chunk is sent, so streaming (SSE) routes report their full duration.
+    Routes are labelled by path template ("/jobs/{job_id}") to bound cardinality.
+    """
+
+    def __init__(self, app, routes: list):
+        self.app = app
+        self.routes = routes
+
+    def _route(self, scope) -> str:
+        from starlette.routing import Match
+
+        for route in self.routes:
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                return getattr(route, "path", "unknown")
+        return "unmatched"
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        route = self._route(scope)
+        started = time.perf_counter()
+        status = {"code": 500}
+        finished = False
+
+        def observe():
+            nonlocal finished
+            if not finished:
+                finished = True
+                REQUESTS_IN_FLIGHT.labels(route).dec()
+                REQUEST_LATENCY.labels(scope["method"], route, str(status["code"])).observe(time.perf_counter() - started)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                observe()
+
+        REQUESTS_IN_FLIGHT.labels(route).inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            observe()  # Errors and client disconnects
+
+
+def metrics_payload():
+    """(body, content type) for the /metrics endpoint; None when metrics are unavailable."""
+    if Counter is None or not settings.METRICS_ENABLED:
+        return None
+    return generate_latest(), CONTENT_TYPE_LATEST
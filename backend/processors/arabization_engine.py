@@ -1,64 +1,166 @@
-from typing import List, Dict
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import List, Dict, Optional
+
 from api.schemas import ArabicTerm
+from config.settings import settings
 from memory.sovereign_memory import sovereign_memory
+from monitoring.metrics import record_cache
+
+DEFAULT_DICTIONARY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "arabization_dictionary.json")
+
+
+def load_static_dictionary(path: str = None) -> Dict[str, str]:
+    """English -> Arabic pairs (keys lower-cased), read once per engine."""
+    with open(path or settings.ARABIZATION_DICTIONARY_PATH or DEFAULT_DICTIONARY_PATH, encoding="utf-8") as f:
+        return {english.strip().lower(): arabic for english, arabic in json.load(f).items()}
+
 
 class ArabizationEngine:
     """
     RF-020: Intelligent Arabization System.
+
+    Lookups are memoized in a bounded LRU keyed by the normalized term. Terms found
+    nowhere are cached too (negative entries), so repeated unknown loanwords cost
+    nothing. The memo is dropped whenever SovereignMemory's terms change.
     """
-    
-    def __init__(self):
-        self.memory = sovereign_memory
+
+    def __init__(self, memory=None):
+        self.memory = memory or sovereign_memory
+        self.static_db = load_static_dictionary()
+        self.cache_size = settings.ARABIZATION_CACHE_SIZE
+        self._cache: "OrderedDict[str, Optional[ArabicTerm]]" = OrderedDict()  # None = unknown term
+        self._cache_version = None
+        self._lock = threading.Lock()
 
     def arabize(self, english_term: str) -> ArabicTerm:
         """
         Main entry point for arabizing a term.
         Strategy:
-        1. Check Memory (ChromaDB/Graph)
-        2. Check Static Dictionary (Placeholder)
+        1. Check Memory (Exact Index, then ChromaDB/Graph)
+        2. Check Static Dictionary
         3. Generative Creation (Future: LLM)
         """
-        
-        # 1. Check Memory
-        existing = self.memory.find_term(english_term, n_results=1)
-        if existing:
-            # Reconstruct ArabicTerm from metadata
-            # Note: This is a simplified reconstruction
-            data = existing[0]
-            return ArabicTerm(
-                id=data.get('id', 'unknown'),
-                english_term=english_term,
-                arabic_translation=data.get('arabic_translation', ''),
-                source="memory",
-                confidence=float(data.get('confidence', 1.0)),
-                definition=data.get('definition', '')
-            )
-            
-        # 2. Static Dictionary / Fallback (Placeholder)
-        # In V2 full implementation, this calls an LLM or specific API
-        static_db = {
-            "strategy": "استراتيجية",
-            "logistics": "لوجستيات",
-            "agent": "وكيل",
-            "sovereign": "سيادي"
-        }
-        
-        if english_term.lower() in static_db:
+        return self.arabize_many([english_term])[0]
+
+    def arabize_many(self, english_terms: List[str]) -> List[ArabicTerm]:
+        """
+        Batch variant of `arabize` (one result per input, in order). Distinct terms are
+        resolved once: memo hits first, then the exact index, then a single batched
+        vector query for the rest, then the static dictionary.
+        """
+        keys = [term.strip().lower() for term in english_terms]
+        distinct = list(dict.fromkeys(keys))
+        version = self.memory.terms_version
+
+        resolved: Dict[str, Optional[ArabicTerm]] = {}
+        with self._lock:
+            if self._cache_version != version:
+                self._cache.clear()
+                self._cache_version = version
+            for key in distinct:
+                if key in self._cache:
+                    self._cache.move_to_end(key)
+                    resolved[key] = self._cache[key]
+        record_cache("arabization", hit=True, count=len(resolved))
+
+        pending = [key for key in distinct if key not in resolved]
+        record_cache("arabization", hit=False, count=len(pending))
+        if pending:
+            found = self._resolve(pending)
+            with self._lock:
+                # A term write during resolution makes these results stale: return, don't memoize
+                store = self._cache_version == self.memory.terms_version
+                for key in pending:
+                    resolved[key] = found.get(key)
+                    if store:
+                        self._remember(key, resolved[key])
+
+        return [
+            self._result(resolved[key], english_term)
+            for key, english_term in zip(keys, english_terms)
+        ]
+
+    def clear_cache(self):
+        with self._lock:
+            self._cache.clear()
+
+    # --- Resolution ---
+
+    def _remember(self, key: str, term: Optional[ArabicTerm]):
+        self._cache[key] = term
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def _resolve(self, keys: List[str]) -> Dict[str, ArabicTerm]:
+        """Memory first, then the static dictionary. Keys missing from the result are unknown."""
+        index = self.memory.term_index
+        term_ids: Dict[str, str] = {}
+        semantic = []
+        for key in keys:
+            exact = index.lookup(key)
+            if exact:
+                term_ids[key] = exact['id']
+                continue
+            # Known terms occurring inside the query (most frequent first), as in `find_term`
+            counts: Dict[str, int] = {}
+            for hit in index.scan(key):
+                counts[hit["term_id"]] = counts.get(hit["term_id"], 0) + 1
+            if counts:
+                term_ids[key] = max(counts, key=counts.get)
+            else:
+                semantic.append(key)
+
+        metas = self.memory.get_terms(list(set(term_ids.values())))
+        found = {key: self._memory_term(metas.get(tid, index.terms.get(tid, {"id": tid}))) for key, tid in term_ids.items()}
+
+        # One vector query for everything the index could not answer
+        max_distance = settings.ARABIZATION_MAX_DISTANCE
+        for key, hits in zip(semantic, self.memory.find_terms(semantic, n_results=1)):
+            if hits and (hits[0][1] or 0.0) <= max_distance:
+                found[key] = self._memory_term(hits[0][0])
+
+        for key in semantic:
+            if key not in found and key in self.static_db:
+                found[key] = ArabicTerm(
+                    id=f"auto_{key}",
+                    english_term=key,
+                    arabic_translation=self.static_db[key],
+                    source="static_dictionary",
+                    confidence=0.9,
+                    definition="Autogenerated from static DB"
+                )
+        return found
+
+    @staticmethod
+    def _memory_term(data: Dict) -> ArabicTerm:
+        # Reconstruct ArabicTerm from metadata (simplified reconstruction)
+        return ArabicTerm(
+            id=data.get('id', 'unknown'),
+            english_term=data.get('english_term') or '',
+            arabic_translation=data.get('arabic_translation', ''),
+            source="memory",
+            confidence=float(data.get('confidence', 1.0)),
+            definition=data.get('definition', '')
+        )
+
+    @staticmethod
+    def _result(term: Optional[ArabicTerm], english_term: str) -> ArabicTerm:
+        """Per-caller copy (memoized objects are shared), echoing the caller's spelling."""
+        if term is None:
+            # Fallback
             return ArabicTerm(
-                id=f"auto_{english_term}",
+                id=f"new_{english_term}",
                 english_term=english_term,
-                arabic_translation=static_db[english_term.lower()],
-                source="static_dictionary",
-                confidence=0.9,
-                definition="Autogenerated from static DB"
+                arabic_translation=f"[{english_term}]", # Mark for review
+                source="unknown",
+                confidence=0.0,
+                definition="Needs human review"
             )
-            
-        # 3. Fallback
-        return ArabicTerm(
-            id=f"new_{english_term}",
-            english_term=english_term,
-            arabic_translation=f"[{english_term}]", # Mark for review
-            source="unknown",
-            confidence=0.0,
-            definition="Needs human review"
-        )
+        update = {"english_term": english_term}
+        if term.source == "static_dictionary":
+            update["id"] = f"auto_{english_term}"
+        return term.model_copy(update=update)
@@ -0,0 +1,178 @@
+import re
+from typing import List, Tuple
+
+from config.settings import settings
+
+# Markdown-style headings ("# Title") or DOCX headings flattened by DocumentProcessor
+HEADING_PATTERN = re.compile(r"^\s{0,3}#{1,6}\s+\S")
+PARAGRAPH_SPLIT = re.compile(r"\n\s*\n")
+SENTENCE_SPLIT = re.compile(r"(?<=[\.\!\?؟۔])\s+")
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Cheap token estimate (no tokenizer dependency).
+    Uses the configured characters-per-token ratio; Arabic averages ~3 chars/token.
+    """
+    if not text:
+        return 0
+    return max(1, int(len(text) / settings.CHUNK_CHARS_PER_TOKEN) + 1)
+
+
+def split_segments(text: str, max_chars: int = 600) -> List[str]:
+    """
+    Split text into retrieval segments: paragraphs, with long paragraphs broken into
+    sentences. Duplicate segments are dropped (order preserved).
+    """
+    segments = []
+    seen = set()
+    for paragraph in PARAGRAPH_SPLIT.split(text):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        pieces = [paragraph] if len(paragraph) <= max_chars else SENTENCE_SPLIT.split(paragraph)
+        for piece in pieces:
+            piece = piece.strip()
+            if piece and piece not in seen:
+                seen.add(piece)
+                segments.append(piece)
+    return segments
+
+
+class TextChunker:
+    """
+    Splits long manuscripts into token-budgeted chunks on paragraph/heading boundaries.
+    A heading is never left dangling at the end of a chunk; oversized paragraphs
+    fall back to sentence boundaries and, as a last resort, a hard character split.
+    """
+
+    def __init__(self, max_tokens: int = None):
+        self.max_tokens = max_tokens or settings.CHUNK_MAX_TOKENS
+
+    @staticmethod
+    def is_heading(paragraph: str) -> bool:
+        return bool(HEADING_PATTERN.match(paragraph))
+
+    @staticmethod
+    def split_paragraphs(text: str) -> List[str]:
+        return [p.strip() for p in PARAGRAPH_SPLIT.split(text) if p.strip()]
+
+    def _split_oversized(self, paragraph: str) -> List[str]:
+        """Break a single paragraph that exceeds the budget on sentence boundaries."""
+        pieces = []
+        current = ""
+        for sentence in SENTENCE_SPLIT.split(paragraph):
+            candidate = f"{current} {sentence}".strip()
+            if current and estimate_tokens(candidate) > self.max_tokens:
+                pieces.append(current)
+                current = sentence
+            else:
+                current = candidate
+
+        if current:
+            pieces.append(current)
+
+        # Hard split for sentences that are still too long (no punctuation)
+        max_chars = int(self.max_tokens * settings.CHUNK_CHARS_PER_TOKEN)
+        result = []
+        for piece in pieces:
+            while estimate_tokens(piece) > self.max_tokens:
+                cut = piece.rfind(" ", 0, max_chars)
+                cut = cut if cut > 0 else max_chars
+                result.append(piece[:cut].strip())
+                piece = piece[cut:].strip()
+            if piece:
+                result.append(piece)
+        return result
+
+    def builder(self) -> "ChunkBuilder":
+        return ChunkBuilder(self)
+
+    def chunk(self, text: str) -> List[str]:
+        """
+        Greedily pack paragraphs into chunks of at most `max_tokens`.
+        Returns the chunks in document order.
+        """
+        builder = self.builder()
+        chunks: List[str] = []
+        for paragraph in self.split_paragraphs(text):
+            chunks.extend(builder.push(paragraph))
+        chunks.extend(builder.close())
+        return chunks
+
+    def pack_runs(self, paragraphs: List[str], selected: List[bool]) -> List[Tuple[int, int]]:
+        """
+        Group consecutive selected paragraphs into token-budgeted spans.
+        Returns (start, end) index ranges into `paragraphs`, in order; unselected
+        paragraphs always break a span so outputs can be stitched back in place.
+        """
+        spans: List[Tuple[int, int]] = []
+        start = None
+        tokens = 0
+        for i, (paragraph, keep) in enumerate(zip(paragraphs, selected)):
+            cost = estimate_tokens(paragraph)
+            if start is not None and (not keep or tokens + cost > self.max_tokens):
+                spans.append((start, i))
+                start = None
+            if keep:
+                if start is None:
+                    start, tokens = i, 0
+                tokens += cost
+        if start is not None:
+            spans.append((start, len(paragraphs)))
+        return spans
+
+
+class ChunkBuilder:
+    """
+    Incremental form of `TextChunker.chunk`: paragraphs are pushed one at a time and
+    each chunk is returned as soon as it is complete, so streamed input can start
+    generation before the whole document has been read.
+    """
+
+    def __init__(self, chunker: TextChunker):
+        self.chunker = chunker
+        self.current: List[str] = []
+        self.current_tokens = 0
+
+    def _flush(self) -> List[str]:
+        chunks = ["\n\n".join(self.current)] if self.current else []
+        self.current, self.current_tokens = [], 0
+        return chunks
+
+    def _pop_headings(self) -> List[str]:
+        """Remove and return the trailing headings of the current chunk (in order)."""
+        carried = []
+        while self.current and self.chunker.is_heading(self.current[-1]):
+            carried.insert(0, self.current.pop())
+        return carried
+
+    def push(self, paragraph: str) -> List[str]:
+        """Add one paragraph (or a multi-paragraph block); returns the chunks it completed."""
+        ready: List[str] = []
+        for paragraph in self.chunker.split_paragraphs(paragraph):
+            tokens = estimate_tokens(paragraph)
+
+            if tokens > self.chunker.max_tokens:
+                # The headings open the first piece instead of dangling at the end of the last chunk
+                carried = self._pop_headings()
+                ready.extend(self._flush())
+                pieces = self.chunker._split_oversized(paragraph)
+                pieces[0] = "\n\n".join(carried + [pieces[0]])
+                ready.extend(pieces)
+                continue
+
+            if self.current_tokens + tokens > self.chunker.max_tokens:
+                # Carry trailing headings over so they stay with their section body
+                carried = self._pop_headings()
+                ready.extend(self._flush())
+                self.current = carried
+                self.current_tokens = sum(estimate_tokens(p) for p in carried)
+
+            self.current.append(paragraph)
+            self.current_tokens += tokens
+        return ready
+
+    def close(self) -> List[str]:
+        """Return the final partial chunk, if any."""
+        return self._flush()
@@ -1,18 +1,216 @@
-from docx import Document
+import asyncio
 import io
+import re
+import threading
+import zipfile
+import xml.etree.ElementTree as ET
+from typing import AsyncIterator, Dict, Iterator, List, Union
+
+from config.settings import settings
+
+W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+HEADING_STYLE = re.compile(r"^(?:heading\s*(\d)|title)$", re.IGNORECASE)
+PART_NAME = re.compile(r"^word/(header|footer)(\d*)\.xml$")
+
+
+class DocumentError(ValueError):
+    """The upload is not a readable DOCX (or exceeds the extraction limits)."""
+
+
+def _style_levels(archive: zipfile.ZipFile) -> Dict[str, int]:
+    """Map paragraph style ids to heading levels (localized Word versions use non-English style ids)."""
+    levels = {}
+    try:
+        root = ET.fromstring(archive.read("word/styles.xml"))
+    except KeyError:
+        return levels
+    for style in root.iter(f"{W}style"):
+        style_id = style.get(f"{W}styleId")
+        name = style.find(f"{W}name")
+        outline = style.find(f"{W}pPr/{W}outlineLvl")
+        match = HEADING_STYLE.match(name.get(f"{W}val", "")) if name is not None else None
+        if match:
+            levels[style_id] = int(match.group(1) or 1)
+        elif outline is not None and int(outline.get(f"{W}val", 9)) < 6:
+            levels[style_id] = int(outline.get(f"{W}val")) + 1
+    return levels
+
+
+def _paragraph_text(paragraph: ET.Element) -> str:
+    parts = []
+    for node in paragraph.iter():
+        if node.tag == f"{W}t":
+            parts.append(node.text or "")
+        elif node.tag == f"{W}tab":
+            parts.append("\t")
+        elif node.tag in (f"{W}br", f"{W}cr"):
+            parts.append("\n")
+        elif node.tag == f"{W}footnoteReference":
+            parts.append(f"[^{node.get(f'{W}id')}]")
+    return "".join(parts).strip()
+
+
+def _heading_level(paragraph: ET.Element, styles: Dict[str, int]) -> int:
+    outline = paragraph.find(f"{W}pPr/{W}outlineLvl")
+    if outline is not None and int(outline.get(f"{W}val", 9)) < 6:
+        return int(outline.get(f"{W}val")) + 1
+    style = paragraph.find(f"{W}pPr/{W}pStyle")
+    return styles.get(style.get(f"{W}val"), 0) if style is not None else 0
+
+
+def _table_text(table: ET.Element) -> str:
+    """Render a table as Markdown-style rows so the LLM (and the chunker) see one block."""
+    rows = []
+    for row in table.iter(f"{W}tr"):
+        cells = [
+            " ".join(filter(None, (_paragraph_text(p) for p in cell.iter(f"{W}p")))).replace("|", "/")
+            for cell in row.findall(f"{W}tc")
+        ]
+        if any(cells):
+            rows.append("| " + " | ".join(cells) + " |")
+    return "\n".join(rows)
+
+
+def _footnotes(archive: zipfile.ZipFile) -> List[str]:
+    try:
+        root = ET.fromstring(archive.read("word/footnotes.xml"))
+    except KeyError:
+        return []
+    notes = []
+    for note in root.iter(f"{W}footnote"):
+        if note.get(f"{W}type") in ("separator", "continuationSeparator", "continuationNotice"):
+            continue
+        text = " ".join(filter(None, (_paragraph_text(p) for p in note.iter(f"{W}p"))))
+        if text:
+            notes.append(f"[^{note.get(f'{W}id')}]: {text}")
+    return notes
+
+
+def _headers_footers(archive: zipfile.ZipFile, kind: str) -> List[str]:
+    """
+    Text of the `word/header*.xml` or `word/footer*.xml` parts, in part order.
+    Sections and first/even-page variants repeat the same text, so each block is kept once.
+    """
+    names = []
+    for name in archive.namelist():
+        match = PART_NAME.match(name)
+        if match and match.group(1) == kind:
+            names.append((int(match.group(2) or 0), name))
+    blocks, seen = [], set()
+    for _, name in sorted(names):
+        root = ET.fromstring(archive.read(name))
+        text = "\n\n".join(filter(None, (_paragraph_text(p) for p in root.iter(f"{W}p"))))
+        if text and text not in seen:
+            seen.add(text)
+            blocks.append(text)
+    return blocks
+
 
 class DocumentProcessor:
     @staticmethod
-    def extract_text_from_docx(file_bytes: bytes) -> str:
+    def iter_docx_blocks(source: Union[str, io.IOBase]) -> Iterator[str]:
         """
-        Reads a DOCX file from bytes and extracts full text.
+        Stream a DOCX body as text blocks in document order, without building the
+        whole DOM: `word/document.xml` is read incrementally and each top-level
+        element is discarded once emitted.
+        Headings become Markdown headings ("## Title"), tables become "| a | b |" rows,
+        footnote markers stay inline ("[^1]") and footnote bodies follow the body.
+        Page headers come before the body and page footers after it, each distinct text once.
+        Raises DocumentError for unreadable files or when UPLOAD_MAX_CHARS is exceeded.
         """
         try:
-            doc = Document(io.BytesIO(file_bytes))
-            full_text = []
-            for para in doc.paragraphs:
-                if para.text.strip():
-                    full_text.append(para.text.strip())
-            return "\n\n".join(full_text)
-        except Exception as e:
-            return f"Error processing document: {str(e)}"
+            archive = zipfile.ZipFile(source)
+            styles = _style_levels(archive)
+            headers = _headers_footers(archive, "header")
+            footers = _headers_footers(archive, "footer")
+            document = archive.open("word/document.xml")
+        except (zipfile.BadZipFile, KeyError, ET.ParseError) as e:
+            raise DocumentError(f"Not a valid .docx file: {e}") from e
+
+        # Header and footer parts are small and read up front; they count toward the limit too
+        emitted = sum(len(block) for block in headers + footers)
+        if emitted > settings.UPLOAD_MAX_CHARS:
+            raise DocumentError(f"Document exceeds {settings.UPLOAD_MAX_CHARS} characters")
+        depth = 0
+        body = None
+        with archive, document:
+            yield from headers
+            try:
+                for event, elem in ET.iterparse(document, events=("start", "end")):
+                    if event == "start":
+                        depth += 1
+                        if elem.tag == f"{W}body":
+                            body = elem
+                        continue
+                    depth -= 1
+                    if depth != 2 or body is None:
+                        continue  # Only top-level body children (document > body > child)
+
+                    if elem.tag == f"{W}p":
+                        text = _paragraph_text(elem)
+                        level = _heading_level(elem, styles)
+                        block = f"{'#' * level} {text}" if text and level else text
+                    elif elem.tag == f"{W}tbl":
+                        block = _table_text(elem)
+                    elif elem.tag == f"{W}sdt":
+                        block = "\n\n".join(filter(None, (_paragraph_text(p) for p in elem.iter(f"{W}p"))))
+                    else:
+                        block = ""
+                    body.remove(elem)
+
+                    if block:
+                        emitted += len(block)
+                        if emitted > settings.UPLOAD_MAX_CHARS:
+                            raise DocumentError(f"Document exceeds {settings.UPLOAD_MAX_CHARS} characters")
+                        yield block
+            except ET.ParseError as e:
+                raise DocumentError(f"Corrupt document.xml: {e}") from e
+
+            yield from footers
+            yield from _footnotes(archive)
+
+    @staticmethod
+    async def stream_docx_blocks(path: str) -> AsyncIterator[str]:
+        """
+        Async view of `iter_docx_blocks`: parsing runs on a worker thread and blocks are
+        handed to the event loop through a bounded queue, so consumers can start on the
+        first blocks while the rest of the file is still being read.
+        """
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=64)
+        done = object()
+        cancelled = threading.Event()
+
+        def produce():
+            try:
+                for block in DocumentProcessor.iter_docx_blocks(path):
+                    if cancelled.is_set():
+                        return
+                    asyncio.run_coroutine_threadsafe(queue.put(block), loop).result()
+                item = done
+            except Exception as e:
+                item = e
+            asyncio.run_coroutine_threadsafe(queue.put(item), loop).result()
+
+        worker = loop.run_in_executor(None, produce)
+        try:
+            while True:
+                item = await queue.get()
+                if item is done:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            cancelled.set()
+            while not queue.empty():
+                queue.get_nowait()  # Unblock a producer waiting on a full queue
+            await worker
+
+    @staticmethod
+    def extract_text_from_docx(file_bytes: bytes) -> str:
+        """
+        Reads a DOCX file from bytes and extracts full text (headings, tables, footnotes).
+        Raises DocumentError instead of returning the error as text.
+        """
+        return "\n\n".join(DocumentProcessor.iter_docx_blocks(io.BytesIO(file_bytes)))
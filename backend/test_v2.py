@@ -1,5 +1,6 @@
 import sys
 import os
+import asyncio
 
 # Add backend to sys.path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
@@ -17,7 +18,8 @@ def test_sovereign_agent():
     inputs = {"input_text": input_text, "revision_count": 0}
     
     try:
-        result = app_graph.invoke(inputs)
+        # Generation node is async; run the graph through ainvoke
+        result = asyncio.run(app_graph.ainvoke(inputs))
         
         print(colored("\n--- Execution Successful ---", "green"))
         print(colored(f"Manuscript: {result['manuscript'][:100]}...", "white"))
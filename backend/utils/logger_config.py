@@ -1,28 +1,176 @@
+import atexit
+import contextvars
+import copy
+import json
 import logging
+import logging.handlers
 import os
+import queue
 import sys
+import uuid
+from datetime import datetime, timezone
+from typing import Optional
+
+from config.settings import settings
+
+# Correlation id of the request (or job) being served; "-" outside a request
+request_id: contextvars.ContextVar[str] = contextvars.ContextVar("request_id", default="-")
+
+TEXT_CONSOLE_FORMAT = "%(name)s - %(levelname)s - [%(request_id)s] %(message)s"
+TEXT_FILE_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - [%(request_id)s] %(message)s"
+
+_queue_handler: Optional[logging.Handler] = None
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def bind_request_id(value: Optional[str] = None) -> contextvars.Token:
+    """Set the correlation id for the current context (a new one if not given)."""
+    return request_id.set(value or uuid.uuid4().hex[:12])
+
+
+class RequestIdMiddleware:
+    """
+    ASGI middleware: binds the incoming X-Request-ID (or a new id) for everything the
+    request logs, including graph nodes and streamed responses, and echoes it back.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        incoming = dict(scope["headers"]).get(b"x-request-id", b"").decode("latin-1")[:64]
+        token = bind_request_id(incoming or None)
+        value = request_id.get().encode("latin-1")
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [(b"x-request-id", value)]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            request_id.reset(token)
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line (LOG_FORMAT="json")."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "request_id": getattr(record, "request_id", "-"),
+            "message": record.getMessage(),
+        }
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class _RequestIdFilter(logging.Filter):
+    """Runs on the caller's thread, where the request context is still visible."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id.get()
+        return True
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """
+    Hands records to the listener thread. Only the message is merged here (args may be
+    mutated after the call returns); layout, timestamps and I/O happen on the listener.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg, record.args = record.getMessage(), None
+        if record.exc_info:
+            # Tracebacks must be rendered while the frames are alive
+            record.exc_text = record.exc_text or logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def _formatter(file: bool) -> logging.Formatter:
+    if settings.LOG_FORMAT == "json":
+        return JsonFormatter()
+    return logging.Formatter(TEXT_FILE_FORMAT if file else TEXT_CONSOLE_FORMAT)
+
+
+def _file_handler() -> Optional[logging.Handler]:
+    if not settings.LOG_FILE:
+        return None
+    if settings.LOG_ROTATION == "time":
+        handler = logging.handlers.TimedRotatingFileHandler(
+            settings.LOG_FILE, when=settings.LOG_ROTATE_WHEN, backupCount=settings.LOG_BACKUP_COUNT,
+            encoding="utf-8", delay=True
+        )
+    else:
+        handler = logging.handlers.RotatingFileHandler(
+            settings.LOG_FILE, maxBytes=settings.LOG_MAX_BYTES, backupCount=settings.LOG_BACKUP_COUNT,
+            encoding="utf-8", delay=True
+        )
+    handler.setFormatter(_formatter(file=True))
+    return handler
+
+
+def _start_pipeline() -> logging.Handler:
+    """One queue and one listener thread for the whole process; started on first use."""
+    global _queue_handler, _listener
+    if _queue_handler is None:
+        records: queue.SimpleQueue = queue.SimpleQueue()
+        console = logging.StreamHandler(sys.stdout)
+        console.setFormatter(_formatter(file=False))
+        handlers = [h for h in (console, _file_handler()) if h is not None]
+
+        _queue_handler = _QueueHandler(records)
+        _queue_handler.addFilter(_RequestIdFilter())
+        _listener = logging.handlers.QueueListener(records, *handlers, respect_handler_level=True)
+        _listener.start()
+        atexit.register(stop_logging)
+    return _queue_handler
+
+
+def stop_logging():
+    """Drain the queue and stop the listener (also runs at exit)."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def _restart_after_fork():
+    """
+    Threads do not survive fork: a forked worker (e.g. the filter process pool) gets its
+    own queue and listener. Its handlers must not reuse the parent's stream buffers, whose
+    locks may have been held by the parent's listener at fork time.
+    """
+    global _listener
+    if _listener is None:
+        return
+    for handler in _listener.handlers:
+        if isinstance(handler, logging.FileHandler):
+            handler.stream = None  # Reopened on the next write
+        elif isinstance(handler, logging.StreamHandler):
+            handler.stream = open(handler.stream.fileno(), "w", encoding="utf-8", closefd=False)
+    _queue_handler.queue = queue.SimpleQueue()
+    _listener = logging.handlers.QueueListener(_queue_handler.queue, *_listener.handlers, respect_handler_level=True)
+    _listener.start()
+
+
+os.register_at_fork(after_in_child=_restart_after_fork)
+
 
 def setup_logger(name: str):
     logger = logging.getLogger(name)
-    logger.setLevel(logging.INFO)
-    
-    # Create handlers
-    c_handler = logging.StreamHandler(sys.stdout)
-    f_handler = logging.FileHandler('server.log', encoding='utf-8')
-    
-    c_handler.setLevel(logging.INFO)
-    f_handler.setLevel(logging.INFO)
-
-    # Create formatters and add it to handlers
-    c_format = logging.Formatter('%(name)s - %(levelname)s - %(message)s')
-    f_format = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-    
-    c_handler.setFormatter(c_format)
-    f_handler.setFormatter(f_format)
-
-    # Add handlers to the logger
+    logger.setLevel(settings.LOG_LEVEL.upper())
+    # Callers only enqueue; formatting and disk/console writes run on the listener thread
     if not logger.handlers:
-        logger.addHandler(c_handler)
-        logger.addHandler(f_handler)
-
+        logger.addHandler(_start_pipeline())
+        logger.propagate = False  # Root handlers (uvicorn, basicConfig) would write it again
     return logger
@@ -0,0 +1,27 @@
+import os
+import sqlite3
+
+from config.settings import settings
+
+
+def sqlite_path(url: str = None) -> str:
+    """Resolve a `sqlite:///path` URL (settings.DATABASE_URL by default) to a filesystem path."""
+    url = url or settings.DATABASE_URL
+    if not url.startswith("sqlite:///"):
+        raise ValueError(f"Only sqlite:/// URLs are supported, got: {url}")
+    return url[len("sqlite:///"):]
+
+
+def connect(url: str = None) -> sqlite3.Connection:
+    """
+    Open a connection to the application database, shareable across threads
+    (callers serialize access with their own lock). WAL keeps readers off the writer's back.
+    """
+    path = sqlite_path(url)
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn